@@ -0,0 +1,30 @@
+"""add assignment tier thresholds
+
+Revision ID: 3f9d2a7c8b15
+Revises: e81d4b6f2a37
+Create Date: 2026-01-19 10:24:05.318642
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9d2a7c8b15'
+down_revision: Union[str, Sequence[str], None] = 'e81d4b6f2a37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add tiered grading threshold columns to assignments."""
+    op.add_column('assignments', sa.Column('tier_low_similarity', sa.Float(), nullable=True))
+    op.add_column('assignments', sa.Column('tier_high_similarity', sa.Float(), nullable=True))
+    op.add_column('assignments', sa.Column('tier_min_words', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Remove tiered grading threshold columns."""
+    op.drop_column('assignments', 'tier_min_words')
+    op.drop_column('assignments', 'tier_high_similarity')
+    op.drop_column('assignments', 'tier_low_similarity')
@@ -0,0 +1,37 @@
+"""add ai grading cache table
+
+Revision ID: 4a1c2e7f9b10
+Revises: dc50f4368984
+Create Date: 2026-01-05 10:12:44.120311
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '4a1c2e7f9b10'
+down_revision: Union[str, Sequence[str], None] = 'dc50f4368984'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create ai_grading_cache table."""
+    op.create_table(
+        'ai_grading_cache',
+        sa.Column('cache_key', sa.String(length=64), primary_key=True),
+        sa.Column('question_key', sa.String(length=64), nullable=False),
+        sa.Column('llm_model', sa.String(length=100), nullable=False),
+        sa.Column('prompt_version', sa.String(length=20), nullable=False),
+        sa.Column('llm_score', sa.DECIMAL(precision=5, scale=2), nullable=False),
+        sa.Column('feedback', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=True),
+    )
+    op.create_index(op.f('ix_ai_grading_cache_question_key'), 'ai_grading_cache', ['question_key'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop ai_grading_cache table."""
+    op.drop_index(op.f('ix_ai_grading_cache_question_key'), table_name='ai_grading_cache')
+    op.drop_table('ai_grading_cache')
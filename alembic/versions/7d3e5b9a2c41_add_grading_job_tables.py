@@ -0,0 +1,58 @@
+"""add grading job tables
+
+Revision ID: 7d3e5b9a2c41
+Revises: 4a1c2e7f9b10
+Create Date: 2026-01-08 14:03:27.552190
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '7d3e5b9a2c41'
+down_revision: Union[str, Sequence[str], None] = '4a1c2e7f9b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create grading_jobs and grading_job_items tables."""
+    op.create_table(
+        'grading_jobs',
+        sa.Column('id_job', sa.Integer(), primary_key=True),
+        sa.Column('id_assignment', sa.Integer(), sa.ForeignKey('assignments.id_assignment', ondelete='CASCADE'), nullable=False),
+        sa.Column('created_by', sa.Integer(), sa.ForeignKey('users.id_user'), nullable=True),
+        sa.Column('status', sa.String(length=30), server_default='queued', nullable=False),
+        sa.Column('total_items', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=True),
+        sa.Column('started_at', sa.TIMESTAMP(), nullable=True),
+        sa.Column('finished_at', sa.TIMESTAMP(), nullable=True),
+    )
+    op.create_index(op.f('ix_grading_jobs_id_job'), 'grading_jobs', ['id_job'], unique=False)
+
+    op.create_table(
+        'grading_job_items',
+        sa.Column('id_item', sa.Integer(), primary_key=True),
+        sa.Column('id_job', sa.Integer(), sa.ForeignKey('grading_jobs.id_job', ondelete='CASCADE'), nullable=False),
+        sa.Column('id_submission', sa.Integer(), sa.ForeignKey('submissions.id_submission', ondelete='CASCADE'), nullable=False),
+        sa.Column('status', sa.String(length=20), server_default='pending', nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('skor_ai', sa.DECIMAL(precision=5, scale=2), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('started_at', sa.TIMESTAMP(), nullable=True),
+        sa.Column('finished_at', sa.TIMESTAMP(), nullable=True),
+    )
+    op.create_index(op.f('ix_grading_job_items_id_item'), 'grading_job_items', ['id_item'], unique=False)
+    op.create_index(op.f('ix_grading_job_items_id_job'), 'grading_job_items', ['id_job'], unique=False)
+    op.create_index(op.f('ix_grading_job_items_status'), 'grading_job_items', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop grading job tables."""
+    op.drop_index(op.f('ix_grading_job_items_status'), table_name='grading_job_items')
+    op.drop_index(op.f('ix_grading_job_items_id_job'), table_name='grading_job_items')
+    op.drop_index(op.f('ix_grading_job_items_id_item'), table_name='grading_job_items')
+    op.drop_table('grading_job_items')
+    op.drop_index(op.f('ix_grading_jobs_id_job'), table_name='grading_jobs')
+    op.drop_table('grading_jobs')
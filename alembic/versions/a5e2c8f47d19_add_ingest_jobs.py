@@ -0,0 +1,44 @@
+"""add ingest jobs
+
+Revision ID: a5e2c8f47d19
+Revises: f3c86e1a9d24
+Create Date: 2026-01-26 10:41:52.207316
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5e2c8f47d19'
+down_revision: Union[str, Sequence[str], None] = 'f3c86e1a9d24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create ingest_jobs table for bulk archive ingestion."""
+    op.create_table(
+        'ingest_jobs',
+        sa.Column('id_job', sa.Integer(), primary_key=True),
+        sa.Column('id_assignment', sa.Integer(), sa.ForeignKey('assignments.id_assignment', ondelete='CASCADE'), nullable=False),
+        sa.Column('created_by', sa.Integer(), sa.ForeignKey('users.id_user'), nullable=True),
+        sa.Column('filename', sa.String(length=255), nullable=True),
+        sa.Column('status', sa.String(length=30), server_default='queued', nullable=False),
+        sa.Column('total_files', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('processed_files', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('created_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('updated_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('failed_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('errors', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=True),
+        sa.Column('started_at', sa.TIMESTAMP(), nullable=True),
+        sa.Column('finished_at', sa.TIMESTAMP(), nullable=True),
+    )
+    op.create_index(op.f('ix_ingest_jobs_id_job'), 'ingest_jobs', ['id_job'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop ingest_jobs table."""
+    op.drop_index(op.f('ix_ingest_jobs_id_job'), table_name='ingest_jobs')
+    op.drop_table('ingest_jobs')
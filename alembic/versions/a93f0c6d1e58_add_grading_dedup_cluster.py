@@ -0,0 +1,28 @@
+"""add grading dedup cluster
+
+Revision ID: a93f0c6d1e58
+Revises: 7d3e5b9a2c41
+Create Date: 2026-01-12 09:41:05.318842
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'a93f0c6d1e58'
+down_revision: Union[str, Sequence[str], None] = '7d3e5b9a2c41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add dedup_cluster column to grading."""
+    op.add_column('grading', sa.Column('dedup_cluster', sa.String(length=40), nullable=True))
+    op.create_index(op.f('ix_grading_dedup_cluster'), 'grading', ['dedup_cluster'], unique=False)
+
+
+def downgrade() -> None:
+    """Remove dedup_cluster column."""
+    op.drop_index(op.f('ix_grading_dedup_cluster'), table_name='grading')
+    op.drop_column('grading', 'dedup_cluster')
@@ -0,0 +1,30 @@
+"""add grading job debounce
+
+Revision ID: b24e9c7d51a3
+Revises: 3f9d2a7c8b15
+Create Date: 2026-01-20 09:41:17.204836
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b24e9c7d51a3'
+down_revision: Union[str, Sequence[str], None] = '3f9d2a7c8b15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add job source and item available_at (debounced eager grading)."""
+    op.add_column('grading_jobs', sa.Column('source', sa.String(length=20), server_default='manual', nullable=False))
+    op.add_column('grading_job_items', sa.Column('available_at', sa.TIMESTAMP(), nullable=True))
+    op.create_index(op.f('ix_grading_job_items_id_submission'), 'grading_job_items', ['id_submission'], unique=False)
+
+
+def downgrade() -> None:
+    """Remove debounce columns."""
+    op.drop_index(op.f('ix_grading_job_items_id_submission'), table_name='grading_job_items')
+    op.drop_column('grading_job_items', 'available_at')
+    op.drop_column('grading_jobs', 'source')
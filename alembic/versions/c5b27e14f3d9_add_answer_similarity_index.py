@@ -0,0 +1,53 @@
+"""add answer similarity index
+
+Revision ID: c5b27e14f3d9
+Revises: a93f0c6d1e58
+Create Date: 2026-01-15 16:22:51.004127
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5b27e14f3d9'
+down_revision: Union[str, Sequence[str], None] = 'a93f0c6d1e58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create answer_signatures and answer_lsh_buckets tables."""
+    op.create_table(
+        'answer_signatures',
+        sa.Column('id_submission', sa.Integer(), sa.ForeignKey('submissions.id_submission', ondelete='CASCADE'), primary_key=True),
+        sa.Column('id_assignment', sa.Integer(), nullable=False),
+        sa.Column('id_question', sa.Integer(), nullable=False),
+        sa.Column('signature', sa.LargeBinary(), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('now()'), nullable=True),
+    )
+    op.create_index(op.f('ix_answer_signatures_id_assignment'), 'answer_signatures', ['id_assignment'], unique=False)
+    op.create_index(op.f('ix_answer_signatures_id_question'), 'answer_signatures', ['id_question'], unique=False)
+
+    op.create_table(
+        'answer_lsh_buckets',
+        sa.Column('id_bucket', sa.Integer(), primary_key=True),
+        sa.Column('id_submission', sa.Integer(), sa.ForeignKey('submissions.id_submission', ondelete='CASCADE'), nullable=False),
+        sa.Column('id_assignment', sa.Integer(), nullable=False),
+        sa.Column('id_question', sa.Integer(), nullable=False),
+        sa.Column('bucket_key', sa.String(length=80), nullable=False),
+    )
+    op.create_index(op.f('ix_answer_lsh_buckets_id_submission'), 'answer_lsh_buckets', ['id_submission'], unique=False)
+    op.create_index(op.f('ix_answer_lsh_buckets_id_assignment'), 'answer_lsh_buckets', ['id_assignment'], unique=False)
+    op.create_index('ix_answer_lsh_buckets_question_bucket', 'answer_lsh_buckets', ['id_question', 'bucket_key'], unique=False)
+
+
+def downgrade() -> None:
+    """Drop answer similarity index tables."""
+    op.drop_index('ix_answer_lsh_buckets_question_bucket', table_name='answer_lsh_buckets')
+    op.drop_index(op.f('ix_answer_lsh_buckets_id_assignment'), table_name='answer_lsh_buckets')
+    op.drop_index(op.f('ix_answer_lsh_buckets_id_submission'), table_name='answer_lsh_buckets')
+    op.drop_table('answer_lsh_buckets')
+    op.drop_index(op.f('ix_answer_signatures_id_question'), table_name='answer_signatures')
+    op.drop_index(op.f('ix_answer_signatures_id_assignment'), table_name='answer_signatures')
+    op.drop_table('answer_signatures')
@@ -0,0 +1,26 @@
+"""add question keywords
+
+Revision ID: d7a41c9e2b86
+Revises: b24e9c7d51a3
+Create Date: 2026-01-22 10:12:45.381902
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a41c9e2b86'
+down_revision: Union[str, Sequence[str], None] = 'b24e9c7d51a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add extracted keywords per question."""
+    op.add_column('questions', sa.Column('kata_kunci', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Remove question keywords."""
+    op.drop_column('questions', 'kata_kunci')
@@ -0,0 +1,26 @@
+"""add grading ai backend
+
+Revision ID: e81d4b6f2a37
+Revises: c5b27e14f3d9
+Create Date: 2026-01-17 13:08:42.551093
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e81d4b6f2a37'
+down_revision: Union[str, Sequence[str], None] = 'c5b27e14f3d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add ai_backend column to grading."""
+    op.add_column('grading', sa.Column('ai_backend', sa.String(length=40), nullable=True))
+
+
+def downgrade() -> None:
+    """Remove ai_backend column."""
+    op.drop_column('grading', 'ai_backend')
@@ -0,0 +1,26 @@
+"""add submission token bag
+
+Revision ID: f3c86e1a9d24
+Revises: d7a41c9e2b86
+Create Date: 2026-01-23 14:27:03.518644
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c86e1a9d24'
+down_revision: Union[str, Sequence[str], None] = 'd7a41c9e2b86'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add normalized (stemmed) token bag per submission."""
+    op.add_column('submissions', sa.Column('token_bag', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Remove submission token bag."""
+    op.drop_column('submissions', 'token_bag')
@@ -1,6 +1,7 @@
 # app/database.py
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
@@ -15,9 +16,22 @@ DB_PORT = os.getenv("DB_PORT")
 DB_NAME = os.getenv("DB_NAME")
 
 DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+ASYNC_DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
 # ===== SQLAlchemy setup =====
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# ===== Async engine (asyncpg) untuk endpoint baca yang sering dipanggil =====
+# Request async tidak memakai thread threadpool Starlette selama menunggu DB; batas
+# konkurensi ke DB ditentukan ukuran pool ini.
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_size=int(os.getenv("DB_ASYNC_POOL_SIZE", "10")),
+    max_overflow=int(os.getenv("DB_ASYNC_MAX_OVERFLOW", "20")),
+    pool_pre_ping=True,
+)
+# expire_on_commit=False: objek hasil query tetap bisa dibaca (serialisasi response) tanpa lazy load
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
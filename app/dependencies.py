@@ -3,10 +3,12 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.engine import URL, create_engine
 from sqlalchemy import text # Wajib untuk create_database_if_not_exists
 from jose import JWTError, jwt
-from app.database import SessionLocal, engine
+from app.database import SessionLocal, AsyncSessionLocal, engine
 from app.models.user import User
 from app.config import settings
 from pydantic import BaseModel
@@ -30,6 +32,11 @@ def get_db():
     finally:
         db.close()
 
+# Versi async (asyncpg) untuk endpoint `async def`
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 # Fungsi untuk membuat database secara programatis jika belum ada
 # Catatan: Fungsi ini hanya perlu dipanggil di awal (main.py)
 def create_database_if_not_exists():
@@ -68,35 +75,53 @@ def create_database_if_not_exists():
         print(f"FATAL DATABASE ERROR: {e}")
         print("Please check if your Docker container is running or if your credentials are correct.")
 
-# Fungsi Dependency untuk memverifikasi token dan mendapatkan user
-def get_current_user(db: Session = Depends(get_db), token: HTTPAuthorizationCredentials = Depends(http_bearer)):
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _token_subject(token: HTTPAuthorizationCredentials) -> str:
+    """Decode JWT dan ambil nim_nip (field 'sub'); 401 jika tidak valid."""
     try:
         # 1. Decode Payload JWT (ambil token dari credentials)
         raw_token = token.credentials if hasattr(token, "credentials") else token
         payload = jwt.decode(raw_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         nim_nip: str = payload.get("sub") # 'sub' adalah field untuk subject (nim_nip)
         if nim_nip is None:
-            raise credentials_exception
+            raise _credentials_exception()
         token_data = TokenData(nim_nip=nim_nip)
     except JWTError:
-        raise credentials_exception
-    
+        raise _credentials_exception()
+    return token_data.nim_nip
+
+# Fungsi Dependency untuk memverifikasi token dan mendapatkan user
+def get_current_user(db: Session = Depends(get_db), token: HTTPAuthorizationCredentials = Depends(http_bearer)):
+    nim_nip = _token_subject(token)
+
     # 2. Ambil User dari Database
-    user = db.query(User).filter(User.nim_nip == token_data.nim_nip).first()
+    user = db.query(User).filter(User.nim_nip == nim_nip).first()
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     return user # Mengembalikan objek User SQLAlchemy
 
+async def get_current_user_async(db: AsyncSession = Depends(get_async_db),
+                                 token: HTTPAuthorizationCredentials = Depends(http_bearer)):
+    nim_nip = _token_subject(token)
+    user = (await db.execute(select(User).where(User.nim_nip == nim_nip))).scalars().first()
+    if user is None:
+        raise _credentials_exception()
+    return user
+
 # Fungsi Dependency yang akan digunakan di router (misalnya untuk Course atau Assignment)
 def get_current_active_user(current_user: User = Depends(get_current_user)):
     # Saat ini, semua user yang login dianggap aktif
     return current_user
 
+async def get_current_active_user_async(current_user: User = Depends(get_current_user_async)):
+    return current_user
+
 # Fungsi Dependency untuk memverifikasi bahwa user adalah admin
 def get_current_admin_user(current_user: User = Depends(get_current_active_user)):
     if current_user.role != "admin":
@@ -1,13 +1,17 @@
 # app/main.py
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
 from app.database import Base, engine
 from app.dependencies import create_database_if_not_exists
+from app.utils.grading_worker import grading_workers
+from app.utils.file_extract import pdf_extractor
 
 # Import router
-from app.routers import auth, course, assignment, submission, predict, upload, grading
+from app.routers import auth, course, assignment, submission, predict, upload, grading, metrics
 
 # 1. Buat database jika belum ada
 create_database_if_not_exists()
@@ -15,8 +19,16 @@ create_database_if_not_exists()
 # 2. Buat Tabel (Create Tables)
 Base.metadata.create_all(bind=engine)
 
+# --- Lifespan: worker background AI grading ikut hidup/mati bersama app ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    grading_workers.start()
+    yield
+    grading_workers.stop()
+    pdf_extractor.shutdown()
+
 # --- Inisialisasi App ---
-app = FastAPI(title="Essay Autograding API")
+app = FastAPI(title="Essay Autograding API", lifespan=lifespan)
 
 # --- UPDATE CONFIG CORS ---
 origins = [
@@ -68,4 +80,5 @@ app.include_router(assignment.router, prefix="/assignment", tags=["assignment"])
 app.include_router(submission.router, prefix="/submission", tags=["submission"])
 app.include_router(predict.router, prefix="/predict", tags=["predict"])
 app.include_router(upload.router, prefix="/upload", tags=["upload"])
-app.include_router(grading.router, prefix="/grading", tags=["grading"])
\ No newline at end of file
+app.include_router(grading.router, prefix="/grading", tags=["grading"])
+app.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
@@ -0,0 +1,21 @@
+# app/models/ai_grading_cache.py
+from sqlalchemy import Column, String, Text, DECIMAL, TIMESTAMP
+from sqlalchemy.sql import func
+from app.database import Base
+
+class AIGradingCache(Base):
+    __tablename__ = "ai_grading_cache"
+
+    # SHA-256 dari (soal, kunci_jawaban, jawaban, model, versi prompt)
+    cache_key = Column(String(64), primary_key=True)
+
+    # SHA-256 dari (soal, kunci_jawaban) -> dipakai untuk invalidasi saat soal/kunci diubah
+    question_key = Column(String(64), nullable=False, index=True)
+
+    llm_model = Column(String(100), nullable=False)
+    prompt_version = Column(String(20), nullable=False)
+
+    llm_score = Column(DECIMAL(5,2), nullable=False)
+    feedback = Column(Text, nullable=True)
+
+    created_at = Column(TIMESTAMP, server_default=func.now())
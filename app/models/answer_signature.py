@@ -0,0 +1,31 @@
+# app/models/answer_signature.py
+from sqlalchemy import Column, Integer, String, LargeBinary, ForeignKey, TIMESTAMP, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+class AnswerSignature(Base):
+    """Signature MinHash per jawaban (dipakai untuk verifikasi kemiripan kandidat LSH)."""
+    __tablename__ = "answer_signatures"
+
+    id_submission = Column(Integer, ForeignKey("submissions.id_submission", ondelete="CASCADE"), primary_key=True)
+    id_assignment = Column(Integer, nullable=False, index=True)
+    id_question = Column(Integer, nullable=False, index=True)
+
+    # num_perm x uint64 (bytes)
+    signature = Column(LargeBinary, nullable=False)
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+
+
+class AnswerLSHBucket(Base):
+    """Bucket LSH (1 baris per band per jawaban). Jawaban di bucket yang sama = kandidat mirip."""
+    __tablename__ = "answer_lsh_buckets"
+
+    id_bucket = Column(Integer, primary_key=True)
+    id_submission = Column(Integer, ForeignKey("submissions.id_submission", ondelete="CASCADE"), nullable=False, index=True)
+    id_assignment = Column(Integer, nullable=False, index=True)
+    id_question = Column(Integer, nullable=False)
+    bucket_key = Column(String(80), nullable=False)
+
+    __table_args__ = (
+        Index("ix_answer_lsh_buckets_question_bucket", "id_question", "bucket_key"),
+    )
@@ -1,6 +1,6 @@
 # app/models/assignments.py
 
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, Float
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -22,6 +22,11 @@ class Assignment(Base):
     # kalau di DB sudah NOT NULL, ini harus ada di model juga
     points = Column(Integer, nullable=False, server_default="0")
 
+    # Ambang penilaian bertingkat (NULL = pakai default env AI_TIER_*)
+    tier_low_similarity = Column(Float, nullable=True)
+    tier_high_similarity = Column(Float, nullable=True)
+    tier_min_words = Column(Integer, nullable=True)
+
     created_at = Column(DateTime, server_default=func.now())
     created_by = Column(Integer, ForeignKey("users.id_user"), nullable=True)
 
@@ -1,6 +1,6 @@
 # app/models/grading.py
 
-from sqlalchemy import Column, Integer, DECIMAL, Text, ForeignKey, TIMESTAMP
+from sqlalchemy import Column, Integer, String, DECIMAL, Text, ForeignKey, TIMESTAMP
 from sqlalchemy.orm import relationship
 from app.database import Base
 from sqlalchemy.sql import func
@@ -25,6 +25,12 @@ class Grading(Base):
     llm_score = Column(DECIMAL(5,2), default=0)
     # ---------------------------------------
 
+    # ID klaster jawaban identik/hampir identik (diisi jika skor AI disalin dari perwakilan klaster)
+    dedup_cluster = Column(String(40), nullable=True, index=True)
+
+    # Backend yang menghasilkan skor AI (gemini / openai / heuristic / similarity / ...)
+    ai_backend = Column(String(40), nullable=True)
+
     # Timestamp (tambah onupdate agar waktu berubah saat diedit)
     graded_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
 
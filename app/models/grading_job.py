@@ -0,0 +1,45 @@
+# app/models/grading_job.py
+from sqlalchemy import Column, Integer, String, Text, DECIMAL, ForeignKey, TIMESTAMP
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.database import Base
+
+class GradingJob(Base):
+    __tablename__ = "grading_jobs"
+
+    id_job = Column(Integer, primary_key=True, index=True)
+    id_assignment = Column(Integer, ForeignKey("assignments.id_assignment", ondelete="CASCADE"), nullable=False)
+    created_by = Column(Integer, ForeignKey("users.id_user"), nullable=True)
+
+    # queued -> running -> completed / completed_with_errors
+    status = Column(String(30), nullable=False, server_default="queued")
+    # "manual" = dienqueue dosen, "eager" = otomatis saat mahasiswa submit
+    source = Column(String(20), nullable=False, server_default="manual")
+    total_items = Column(Integer, nullable=False, server_default="0")
+
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    started_at = Column(TIMESTAMP, nullable=True)
+    finished_at = Column(TIMESTAMP, nullable=True)
+
+    items = relationship("GradingJobItem", back_populates="job", cascade="all, delete-orphan")
+
+
+class GradingJobItem(Base):
+    __tablename__ = "grading_job_items"
+
+    id_item = Column(Integer, primary_key=True, index=True)
+    id_job = Column(Integer, ForeignKey("grading_jobs.id_job", ondelete="CASCADE"), nullable=False, index=True)
+    id_submission = Column(Integer, ForeignKey("submissions.id_submission", ondelete="CASCADE"), nullable=False, index=True)
+
+    # pending -> running -> done / failed
+    status = Column(String(20), nullable=False, server_default="pending", index=True)
+    attempts = Column(Integer, nullable=False, server_default="0")
+    skor_ai = Column(DECIMAL(5,2), nullable=True)
+    error = Column(Text, nullable=True)
+
+    # Item baru boleh diklaim setelah waktu ini (debounce submit ulang); NULL = langsung
+    available_at = Column(TIMESTAMP, nullable=True)
+    started_at = Column(TIMESTAMP, nullable=True)
+    finished_at = Column(TIMESTAMP, nullable=True)
+
+    job = relationship("GradingJob", back_populates="items")
@@ -0,0 +1,27 @@
+# app/models/ingest_job.py
+from sqlalchemy import Column, Integer, String, ForeignKey, TIMESTAMP, JSON
+from sqlalchemy.sql import func
+from app.database import Base
+
+class IngestJob(Base):
+    """Impor massal jawaban dari arsip zip (file PDF/TXT per mahasiswa per soal)."""
+    __tablename__ = "ingest_jobs"
+
+    id_job = Column(Integer, primary_key=True, index=True)
+    id_assignment = Column(Integer, ForeignKey("assignments.id_assignment", ondelete="CASCADE"), nullable=False)
+    created_by = Column(Integer, ForeignKey("users.id_user"), nullable=True)
+    filename = Column(String(255), nullable=True)
+
+    # queued -> running -> completed / completed_with_errors / failed
+    status = Column(String(30), nullable=False, server_default="queued")
+    total_files = Column(Integer, nullable=False, server_default="0")
+    processed_files = Column(Integer, nullable=False, server_default="0")
+    created_count = Column(Integer, nullable=False, server_default="0")
+    updated_count = Column(Integer, nullable=False, server_default="0")
+    failed_count = Column(Integer, nullable=False, server_default="0")
+    # [{"file": ..., "error": ...}] (dibatasi, lihat INGEST_MAX_ERRORS)
+    errors = Column(JSON, nullable=True)
+
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    started_at = Column(TIMESTAMP, nullable=True)
+    finished_at = Column(TIMESTAMP, nullable=True)
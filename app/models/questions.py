@@ -1,5 +1,5 @@
 # app/models/questions.py
-from sqlalchemy import Column, Integer, String, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, JSON
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -15,6 +15,8 @@ class Question(Base):
     teks_soal = Column(Text, nullable=False)
     bobot = Column(Integer, nullable=False)
     kunci_jawaban = Column(Text, nullable=True)
+    # Kata kunci hasil ekstraksi TF-IDF dari kunci_jawaban (dihitung saat soal dibuat / diedit)
+    kata_kunci = Column(JSON, nullable=True)
 
     # Relasi Balik
     assignment = relationship("Assignment", back_populates="questions")
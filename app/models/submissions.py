@@ -1,5 +1,5 @@
 # app/models/submissions.py
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -20,6 +20,8 @@ class Submission(Base):
     # ----------------------------------------
     
     jawaban = Column(Text, nullable=False)
+    # Bag stem {stem: jumlah} hasil normalisasi jawaban (app.utils.stemmer), diisi saat submit
+    token_bag = Column(JSON, nullable=True)
     submitted_at = Column(DateTime, server_default=func.now())
 
     # Relasi
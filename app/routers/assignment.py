@@ -1,22 +1,39 @@
 # app/routers/assignment.py
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 from app.dependencies import get_db, get_current_active_user
 
-from app.dependencies import get_db, get_current_active_user
+from app.dependencies import get_db, get_async_db, get_current_active_user
 from app.models.assignments import Assignment
 from app.models.questions import Question
 from app.models.submissions import Submission
 from app.models.user import User
 
 from app.schemas.assignment import AssignmentCreate, AssignmentOut, AssignmentWithQuestionsCreate
+from app.utils.ai_grader import grader
+from app.utils.keywords import refresh_question_keywords
+from app.utils.tiering import TierPolicy
 
 router = APIRouter(tags=["assignment"])
 
+TIER_FIELDS = ("tier_low_similarity", "tier_high_similarity", "tier_min_words")
+
+
+def _check_tier_policy(low: float | None, high: float | None):
+    """Ambang efektif (kolom None = default env) harus low < high, kalau tidak semua jawaban jatuh ke satu tier."""
+    policy = TierPolicy(low_similarity=low, high_similarity=high)
+    if policy.low_similarity >= policy.high_similarity:
+        raise HTTPException(
+            status_code=400,
+            detail=f"tier_low_similarity ({policy.low_similarity}) harus lebih kecil dari "
+                   f"tier_high_similarity ({policy.high_similarity})."
+        )
+
 
 # ==========================================
 # 1. CREATE ASSIGNMENT WITH QUESTIONS (FITUR UTAMA)
@@ -37,6 +54,7 @@ def create_assignment_with_questions(
     total_points = sum((q.bobot or 0) for q in payload.questions)
     if total_points <= 0:
         raise HTTPException(status_code=400, detail="Total points harus > 0. Pastikan bobot soal terisi.")
+    _check_tier_policy(payload.tier_low_similarity, payload.tier_high_similarity)
 
     try:
         # 1) Buat assignment header + points (INI FIX UTAMA)
@@ -46,12 +64,16 @@ def create_assignment_with_questions(
             deadline=payload.deadline,
             id_course=payload.id_course,
             created_by=current_user.id_user,
-            points=total_points
+            points=total_points,
+            tier_low_similarity=payload.tier_low_similarity,
+            tier_high_similarity=payload.tier_high_similarity,
+            tier_min_words=payload.tier_min_words
         )
         db.add(new_assignment)
         db.flush()
 
         # 2) Buat questions
+        new_questions = []
         for q in payload.questions:
             new_question = Question(
                 id_assignment=new_assignment.id_assignment,
@@ -61,6 +83,10 @@ def create_assignment_with_questions(
                 kunci_jawaban=q.kunci_jawaban
             )
             db.add(new_question)
+            new_questions.append(new_question)
+
+        # 3) Kata kunci per soal (TF-IDF terhadap korpus soal course), dihitung sekali di sini
+        refresh_question_keywords(db, new_questions, payload.id_course)
 
         db.commit()
         db.refresh(new_assignment)
@@ -76,21 +102,24 @@ def create_assignment_with_questions(
 # 2. GET SINGLE ASSIGNMENT / DETAIL
 # ==========================================
 @router.get("/{assignment_id}", response_model=AssignmentOut)
-def get_assignment_detail(
+async def get_assignment_detail(
     assignment_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    assignment = db.query(Assignment).filter(Assignment.id_assignment == assignment_id).first()
+    # Soal dimuat sekaligus (selectinload): lazy load tidak tersedia pada AsyncSession
+    assignment = (await db.execute(
+        select(Assignment)
+        .where(Assignment.id_assignment == assignment_id)
+        .options(selectinload(Assignment.questions))
+    )).scalars().first()
     if not assignment:
         raise HTTPException(status_code=404, detail="Assignment tidak ditemukan")
 
-    total_count = (
-        db.query(Submission.id_mahasiswa)
+    total_count = (await db.execute(
+        select(func.count(func.distinct(Submission.id_mahasiswa)))
         .join(Question, Question.id_question == Submission.id_question)
-        .filter(Question.id_assignment == assignment_id)
-        .distinct()
-        .count()
-    )
+        .where(Question.id_assignment == assignment_id)
+    )).scalar_one()
     assignment.total_submitted = total_count
 
     return assignment
@@ -124,6 +153,8 @@ def create_assignment(
             detail="Hanya dosen atau admin yang dapat membuat assignment."
         )
 
+    _check_tier_policy(assignment.tier_low_similarity, assignment.tier_high_similarity)
+
     db_assignment = Assignment(
         id_course=assignment.id_course,
         judul=assignment.judul,
@@ -131,7 +162,10 @@ def create_assignment(
         deadline=assignment.deadline,
         # ✅ minimal biar tidak null
         points=0,
-        created_by=current_user.id_user
+        created_by=current_user.id_user,
+        tier_low_similarity=assignment.tier_low_similarity,
+        tier_high_similarity=assignment.tier_high_similarity,
+        tier_min_words=assignment.tier_min_words
     )
 
     db.add(db_assignment)
@@ -181,16 +215,35 @@ def update_assignment(
     assignment_db.judul = payload.judul
     assignment_db.deskripsi = payload.deskripsi
     assignment_db.deadline = payload.deadline
+    # Ambang tier hanya diubah jika dikirim client; form edit lama yang tidak mengenal
+    # field ini tidak boleh mereset ambang yang sudah diatur ke default.
+    tier_updates = {f: getattr(payload, f) for f in TIER_FIELDS if f in payload.model_fields_set}
+    _check_tier_policy(
+        tier_updates.get("tier_low_similarity", assignment_db.tier_low_similarity),
+        tier_updates.get("tier_high_similarity", assignment_db.tier_high_similarity),
+    )
+    for field, value in tier_updates.items():
+        setattr(assignment_db, field, value)
 
     existing_questions = db.query(Question).filter(Question.id_assignment == assignment_id).all()
     existing_questions_map = {q.id_question: q for q in existing_questions}
     processed_ids = []
+    keyword_targets = []  # soal baru / kunci berubah / belum punya kata kunci
 
     for q_data in payload.questions:
         q_id = getattr(q_data, "id_question", None)
 
         if q_id and q_id in existing_questions_map:
             ex = existing_questions_map[q_id]
+
+            # Soal/kunci berubah -> hasil AI lama untuk soal ini tidak berlaku lagi
+            if ex.teks_soal != q_data.teks_soal or (ex.kunci_jawaban or "") != (q_data.kunci_jawaban or ""):
+                grader.cache.invalidate_question(ex.teks_soal, ex.kunci_jawaban or "", db=db)
+                grader.context_cache.invalidate_question(ex.teks_soal, ex.kunci_jawaban or "", client=grader.client)
+
+            if (ex.kunci_jawaban or "") != (q_data.kunci_jawaban or "") or ex.kata_kunci is None:
+                keyword_targets.append(ex)
+
             ex.teks_soal = q_data.teks_soal
             ex.kunci_jawaban = q_data.kunci_jawaban
             ex.bobot = q_data.bobot
@@ -205,15 +258,19 @@ def update_assignment(
                 bobot=q_data.bobot
             )
             db.add(new_q)
+            keyword_targets.append(new_q)
 
     # delete question yang hilang (kalau aman)
     for ex_q in existing_questions:
         if ex_q.id_question not in processed_ids:
             has_submission = db.query(Submission).filter(Submission.id_question == ex_q.id_question).first()
             if not has_submission:
+                grader.context_cache.invalidate_question(ex_q.teks_soal, ex_q.kunci_jawaban or "", client=grader.client)
                 db.delete(ex_q)
 
     try:
+        refresh_question_keywords(db, keyword_targets, assignment_db.id_course)
+
         # ✅ recompute points setelah update soal (pakai query aggregate)
         assignment_db.points = (
             db.query(func.coalesce(func.sum(Question.bobot), 0))
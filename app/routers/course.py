@@ -1,6 +1,8 @@
 # app/routers/course.py
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
 from typing import List
 
@@ -9,7 +11,7 @@ from app.models.course import Course
 from app.models.course_enroll import CourseEnroll
 from app.schemas.course import CourseCreate, CourseOut
 from app.schemas.course_enroll import CourseEnrollCreate, CourseEnrollOut
-from app.dependencies import get_db, get_current_active_user
+from app.dependencies import get_db, get_async_db, get_current_active_user, get_current_active_user_async
 
 router = APIRouter(tags=["course"])
 
@@ -63,18 +65,22 @@ def leave_course(
 # 2. MY COURSES (Untuk Mahasiswa & Dosen Umum)
 # ============================================================
 @router.get("/my", response_model=List[CourseOut])
-def get_my_courses(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+async def get_my_courses(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user_async)
 ):
     # Gabungkan kursus yang di-join DAN yang diampu
-    enrollments = db.query(CourseEnroll).filter(
-        CourseEnroll.id_mahasiswa == current_user.id_user
-    ).options(joinedload(CourseEnroll.course)).all()
+    enrollments = (await db.execute(
+        select(CourseEnroll)
+        .where(CourseEnroll.id_mahasiswa == current_user.id_user)
+        .options(joinedload(CourseEnroll.course))
+    )).scalars().all()
     joined = [e.course for e in enrollments if e.course]
 
-    taught = db.query(Course).filter(Course.id_dosen == current_user.id_user).all()
-    
+    taught = (await db.execute(
+        select(Course).where(Course.id_dosen == current_user.id_user)
+    )).scalars().all()
+
     combined = {c.id_course: c for c in (joined + taught)}
     return list(combined.values())
 
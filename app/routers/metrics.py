@@ -0,0 +1,60 @@
+# app/routers/metrics.py
+
+import os
+import secrets
+from typing import Dict, Any, Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+
+from app.dependencies import get_current_active_user, get_current_user, get_db
+from app.models.user import User
+from app.utils.llm_metrics import llm_metrics
+
+router = APIRouter(tags=["metrics"])
+
+GroupBy = Literal["model", "outcome", "course", "assignment"]
+
+
+# =========================
+# Ringkasan metrik panggilan LLM (admin)
+# =========================
+@router.get("/llm", response_model=Dict[str, Any])
+def get_llm_metrics(
+    group_by: list[GroupBy] = Query(default=["course", "assignment"]),
+    current_user: User = Depends(get_current_active_user)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Hanya admin.")
+
+    return llm_metrics.snapshot(tuple(dict.fromkeys(group_by)))
+
+
+# =========================
+# Penilaian bertingkat: jumlah jawaban per tier & panggilan LLM yang terhindarkan (admin)
+# =========================
+@router.get("/tiers", response_model=Dict[str, Any])
+def get_tier_metrics(current_user: User = Depends(get_current_active_user)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Hanya admin.")
+
+    return llm_metrics.tier_snapshot()
+
+
+# =========================
+# Exporter Prometheus (text exposition format)
+# =========================
+@router.get("/prometheus", response_class=PlainTextResponse)
+def get_prometheus_metrics(authorization: Optional[str] = Header(default=None), db: Session = Depends(get_db)):
+    # Scraper Prometheus tidak memakai JWT: jika METRICS_TOKEN di-set, token itu diterima sebagai Bearer.
+    # Selain itu (termasuk METRICS_TOKEN kosong) hanya JWT admin yang boleh, sama seperti /llm dan /tiers.
+    expected = os.getenv("METRICS_TOKEN")
+    if not (expected and secrets.compare_digest(authorization or "", f"Bearer {expected}")):
+        scheme, _, token = (authorization or "").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            raise HTTPException(status_code=401, detail="Token metrics tidak valid.")
+        if get_current_user(db, token).role != "admin":
+            raise HTTPException(status_code=403, detail="Hanya admin.")
+
+    return PlainTextResponse(llm_metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
@@ -1,29 +1,61 @@
 # app/routers/predict.py
 
+import json
+
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func as sql_func
+from sqlalchemy import func as sql_func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from decimal import Decimal
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal
 
-from app.dependencies import get_db, get_current_active_user
+from app.dependencies import get_db, get_async_db, get_current_active_user, get_current_active_user_async
 from app.models.submissions import Submission
 from app.models.grading import Grading
 from app.models.user import User
 from app.models.questions import Question
+from app.models.assignments import Assignment
+from app.models.grading_job import GradingJob, GradingJobItem
 
 # ✅ pakai grader Gemini kamu
 from app.utils.ai_grader import grader
+from app.utils.grading_worker import grading_workers, enqueue_submissions, ACTIVE_ITEM_STATUSES
+from app.utils.llm_metrics import metrics_scope
+from app.utils.tiering import TierPolicy
 
 router = APIRouter(tags=["predict"])
 
 
+def _assignment_scope(db: Session, assignment_id: int):
+    """Label course/assignment untuk metrik panggilan LLM di dalam request ini."""
+    id_course = db.query(Assignment.id_course).filter(Assignment.id_assignment == assignment_id).scalar()
+    return metrics_scope(id_course, assignment_id)
+
+
+def _tier_policy(db: Session, assignment_id: int) -> TierPolicy:
+    """Ambang penilaian bertingkat milik assignment (kolom kosong = default env)."""
+    return TierPolicy.for_assignment(db.query(Assignment).filter(Assignment.id_assignment == assignment_id).first())
+
+
+async def _aassignment_context(db: AsyncSession, assignment_id: int):
+    """Versi async dari _assignment_scope + _tier_policy (1 query): (scope metrik, TierPolicy)."""
+    assignment = (await db.execute(
+        select(Assignment).where(Assignment.id_assignment == assignment_id)
+    )).scalars().first()
+    id_course = assignment.id_course if assignment else None
+    return metrics_scope(id_course, assignment_id), TierPolicy.for_assignment(assignment)
+
+
 # =========================
 # Request schemas
 # =========================
 class PredictSingleRequest(BaseModel):
     id_submission: int
+    # None = pakai default server (AI_GRADER_METHOD); "similarity" = penilai offline TF-IDF;
+    # "tiered" = skor lokal dulu, LLM hanya untuk jawaban ambigu
+    method: Optional[Literal["llm", "similarity", "tiered"]] = None
 
 
 class PredictBulkRequest(BaseModel):
@@ -31,6 +63,7 @@ class PredictBulkRequest(BaseModel):
     Untuk menilai 1 mahasiswa pada 1 assignment (semua soal).
     """
     min_answer_len: int = 5  # optional guard
+    method: Optional[Literal["llm", "similarity", "tiered"]] = None
 
 
 # =========================
@@ -56,12 +89,16 @@ def predict_one_submission(
         raise HTTPException(status_code=404, detail="Question untuk submission ini tidak ditemukan.")
 
     # Nilai pakai LLM (0..bobot)
-    result = grader.grade_essay(
-        soal=q.teks_soal,
-        kunci_jawaban=q.kunci_jawaban or "",
-        jawaban_mahasiswa=sub.jawaban or "",
-        max_score_dosen=float(q.bobot or 0)
-    )
+    with _assignment_scope(db, sub.id_assignment):
+        result = grader.grade_essay(
+            soal=q.teks_soal,
+            kunci_jawaban=q.kunci_jawaban or "",
+            jawaban_mahasiswa=sub.jawaban or "",
+            max_score_dosen=float(q.bobot or 0),
+            method=request.method,
+            tier_policy=_tier_policy(db, sub.id_assignment),
+            keywords=q.kata_kunci
+        )
 
     return {
         "id_submission": sub.id_submission,
@@ -69,10 +106,76 @@ def predict_one_submission(
         "bobot": q.bobot,
         "skor_ai": result["final_score"],
         "feedback_ai": result["feedback"],
-        "method": result.get("method", "-")
+        "method": result.get("method", "-"),
+        "backend": result.get("backend"),
+        "tier": result.get("tier")
     }
 
 
+# =========================
+# 1b) PREVIEW AI grading 1 submission secara streaming (Server-Sent Events)
+# =========================
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/predict/stream")
+async def predict_one_submission_stream(
+    request: PredictSingleRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user_async)
+):
+    """
+    Sama seperti /predict tetapi feedback dikirim bertahap selama Gemini menulis.
+    Event: `start` (metadata), `feedback` ({"delta": ...}) berulang, lalu `result`
+    (payload sama dengan /predict).
+    """
+    if current_user.role not in ["dosen", "admin"]:
+        raise HTTPException(status_code=403, detail="Hanya dosen/admin yang dapat melakukan prediksi.")
+
+    sub = (await db.execute(
+        select(Submission).where(Submission.id_submission == request.id_submission)
+    )).scalars().first()
+    if not sub:
+        raise HTTPException(status_code=404, detail="Submission tidak ditemukan.")
+
+    q = (await db.execute(select(Question).where(Question.id_question == sub.id_question))).scalars().first()
+    if not q:
+        raise HTTPException(status_code=404, detail="Question untuk submission ini tidak ditemukan.")
+
+    # Ambil semua nilai sebelum streaming dimulai (session DB tidak dipakai di dalam generator)
+    scope, tier_policy = await _aassignment_context(db, sub.id_assignment)
+    id_submission, id_question, bobot = sub.id_submission, sub.id_question, q.bobot
+    soal, kunci, jawaban, keywords = q.teks_soal, q.kunci_jawaban or "", sub.jawaban or "", q.kata_kunci
+
+    async def _events():
+        yield _sse("start", {"id_submission": id_submission, "id_question": id_question, "bobot": bobot})
+        with scope:
+            async for kind, value in grader.agrade_essay_stream(
+                soal, kunci, jawaban, float(bobot or 0), method=request.method, tier_policy=tier_policy,
+                keywords=keywords
+            ):
+                if kind == "feedback":
+                    yield _sse("feedback", {"delta": value})
+                else:
+                    yield _sse("result", {
+                        "id_submission": id_submission,
+                        "id_question": id_question,
+                        "bobot": bobot,
+                        "skor_ai": value["final_score"],
+                        "feedback_ai": value["feedback"],
+                        "method": value.get("method", "-"),
+                        "backend": value.get("backend"),
+                        "tier": value.get("tier")
+                    })
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # =========================
 # 2) SIMPAN AI grading 1 submission (upsert) ke DB
 # =========================
@@ -93,23 +196,34 @@ def save_ai_grade_one_submission(
     if not q:
         raise HTTPException(status_code=404, detail="Question untuk submission ini tidak ditemukan.")
 
-    result = grader.grade_essay(
-        soal=q.teks_soal,
-        kunci_jawaban=q.kunci_jawaban or "",
-        jawaban_mahasiswa=sub.jawaban or "",
-        max_score_dosen=float(q.bobot or 0)
-    )
+    with _assignment_scope(db, sub.id_assignment):
+        result = grader.grade_essay(
+            soal=q.teks_soal,
+            kunci_jawaban=q.kunci_jawaban or "",
+            jawaban_mahasiswa=sub.jawaban or "",
+            max_score_dosen=float(q.bobot or 0),
+            method=request.method,
+            tier_policy=_tier_policy(db, sub.id_assignment),
+            keywords=q.kata_kunci
+        )
+
+    # Skor fallback breaker (503) atau AI gagal (502) tidak disimpan sebagai skor AI
+    unsaved = grader.unsaved_result_status(result, sub.jawaban or "")
+    if unsaved:
+        raise HTTPException(status_code=unsaved, detail=f"AI grading tidak disimpan: {result['feedback']}")
 
     try:
         existing = db.query(Grading).filter(Grading.id_submission == sub.id_submission).first()
         if existing:
             existing.skor_ai = Decimal(str(result["final_score"]))
             existing.feedback_ai = result["feedback"]
+            existing.ai_backend = result.get("backend")
         else:
             db.add(Grading(
                 id_submission=sub.id_submission,
                 skor_ai=Decimal(str(result["final_score"])),
                 feedback_ai=result["feedback"],
+                ai_backend=result.get("backend"),
             ))
 
         db.commit()
@@ -120,7 +234,9 @@ def save_ai_grade_one_submission(
             "bobot": q.bobot,
             "skor_ai": float(result["final_score"]),
             "feedback_ai": result["feedback"],
-            "method": result.get("method", "-")
+            "method": result.get("method", "-"),
+            "backend": result.get("backend"),
+            "tier": result.get("tier")
         }
 
     except Exception as e:
@@ -128,41 +244,72 @@ def save_ai_grade_one_submission(
         raise HTTPException(status_code=500, detail=f"Gagal menyimpan AI grading: {str(e)}")
 
 
+# =========================
+# Helper bulk: ambil pasangan (submission, question) 1 mahasiswa pada 1 assignment
+# =========================
+async def _load_student_answers(db: AsyncSession, assignment_id: int, student_id: int):
+    subs = (await db.execute(
+        select(Submission).where(
+            Submission.id_assignment == assignment_id,
+            Submission.id_mahasiswa == student_id
+        )
+    )).scalars().all()
+
+    if not subs:
+        return []
+
+    # Satu query untuk semua soal (bukan 1 query per submission)
+    question_ids = {sub.id_question for sub in subs}
+    questions = (await db.execute(
+        select(Question).where(Question.id_question.in_(question_ids))
+    )).scalars().all()
+    question_by_id = {q.id_question: q for q in questions}
+
+    return [(sub, question_by_id[sub.id_question]) for sub in subs if sub.id_question in question_by_id]
+
+
+def _grading_item(sub: Submission, q: Question, method: Optional[str] = None,
+                  tier_policy: Optional[TierPolicy] = None) -> Dict[str, Any]:
+    return {
+        "soal": q.teks_soal,
+        "kunci_jawaban": q.kunci_jawaban or "",
+        "jawaban_mahasiswa": sub.jawaban or "",
+        "max_score_dosen": float(q.bobot or 0),
+        "method": method,
+        "tier_policy": tier_policy,
+        "keywords": q.kata_kunci,
+    }
+
+
 # =========================
 # 3) PREVIEW AI grading untuk SEMUA soal (1 assignment + 1 mahasiswa) - tidak simpan
 # =========================
 @router.post("/predict/assignment/{assignment_id}/student/{student_id}", response_model=List[Dict[str, Any]])
-def predict_bulk_assignment_student(
+async def predict_bulk_assignment_student(
     assignment_id: int,
     student_id: int,
     request: PredictBulkRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user_async)
 ):
     if current_user.role not in ["dosen", "admin"]:
         raise HTTPException(status_code=403, detail="Hanya dosen/admin.")
 
-    subs = db.query(Submission).filter(
-        Submission.id_assignment == assignment_id,
-        Submission.id_mahasiswa == student_id
-    ).all()
-
-    if not subs:
+    pairs = await _load_student_answers(db, assignment_id, student_id)
+    if not pairs:
         return []
 
-    results: List[Dict[str, Any]] = []
-    for sub in subs:
-        q = db.query(Question).filter(Question.id_question == sub.id_question).first()
-        if not q:
-            continue
-
-        result = grader.grade_essay(
-            soal=q.teks_soal,
-            kunci_jawaban=q.kunci_jawaban or "",
-            jawaban_mahasiswa=sub.jawaban or "",
-            max_score_dosen=float(q.bobot or 0)
-        )
+    # Semua soal dinilai bersamaan (dibatasi AI_GRADER_CONCURRENCY)
+    scope, tier_policy = await _aassignment_context(db, assignment_id)
+    items = [_grading_item(sub, q, request.method, tier_policy) for sub, q in pairs]
+    # Tutup transaksi baca sebelum menunggu Gemini agar koneksi kembali ke pool (tidak
+    # "idle in transaction" selama fan-out); expire_on_commit=False menjaga objek tetap terbaca.
+    await db.commit()
+    with scope:
+        graded = await grader.agrade_many(items)
 
+    results: List[Dict[str, Any]] = []
+    for (sub, q), result in zip(pairs, graded):
         results.append({
             "id_submission": sub.id_submission,
             "id_question": sub.id_question,
@@ -170,7 +317,9 @@ def predict_bulk_assignment_student(
             "bobot": q.bobot,
             "skor_ai": float(result["final_score"]),
             "feedback_ai": result["feedback"],
-            "method": result.get("method", "-")
+            "method": result.get("method", "-"),
+            "backend": result.get("backend"),
+            "tier": result.get("tier")
         })
 
     return results
@@ -180,48 +329,68 @@ def predict_bulk_assignment_student(
 # 4) SIMPAN AI grading untuk SEMUA soal (1 assignment + 1 mahasiswa) - upsert
 # =========================
 @router.post("/grade/assignment/{assignment_id}/student/{student_id}", response_model=List[Dict[str, Any]])
-def save_ai_grade_bulk_assignment_student(
+async def save_ai_grade_bulk_assignment_student(
     assignment_id: int,
     student_id: int,
     request: PredictBulkRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user_async)
 ):
     if current_user.role not in ["dosen", "admin"]:
         raise HTTPException(status_code=403, detail="Hanya dosen/admin.")
 
-    subs = db.query(Submission).filter(
-        Submission.id_assignment == assignment_id,
-        Submission.id_mahasiswa == student_id
-    ).all()
-
-    if not subs:
+    pairs = await _load_student_answers(db, assignment_id, student_id)
+    if not pairs:
         return []
 
+    scope, tier_policy = await _aassignment_context(db, assignment_id)
+    items = [_grading_item(sub, q, request.method, tier_policy) for sub, q in pairs]
+    # Tutup transaksi baca sebelum menunggu Gemini agar koneksi kembali ke pool (tidak
+    # "idle in transaction" selama fan-out); expire_on_commit=False menjaga objek tetap terbaca.
+    await db.commit()
+    with scope:
+        graded = await grader.agrade_many(items)
+
     try:
         out: List[Dict[str, Any]] = []
 
-        for sub in subs:
-            q = db.query(Question).filter(Question.id_question == sub.id_question).first()
-            if not q:
-                continue
+        existing_by_sub = {
+            g.id_submission: g
+            for g in (await db.execute(
+                select(Grading).where(Grading.id_submission.in_([sub.id_submission for sub, _ in pairs]))
+            )).scalars().all()
+        }
 
-            result = grader.grade_essay(
-                soal=q.teks_soal,
-                kunci_jawaban=q.kunci_jawaban or "",
-                jawaban_mahasiswa=sub.jawaban or "",
-                max_score_dosen=float(q.bobot or 0)
-            )
+        for (sub, q), result in zip(pairs, graded):
+            # Skor fallback breaker / AI gagal tidak disimpan; status per soal 503 / 502
+            unsaved = grader.unsaved_result_status(result, sub.jawaban or "")
+            if unsaved:
+                out.append({
+                    "id_submission": sub.id_submission,
+                    "id_question": sub.id_question,
+                    "nomor_soal": q.nomor_soal,
+                    "bobot": q.bobot,
+                    "skor_ai": None,
+                    "feedback_ai": result["feedback"],
+                    "method": result.get("method", "-"),
+                    "backend": result.get("backend"),
+                    "tier": result.get("tier"),
+                    "saved": False,
+                    "status_code": unsaved
+                })
+                continue
 
-            existing = db.query(Grading).filter(Grading.id_submission == sub.id_submission).first()
+            existing = existing_by_sub.get(sub.id_submission)
             if existing:
                 existing.skor_ai = Decimal(str(result["final_score"]))
                 existing.feedback_ai = result["feedback"]
+                existing.ai_backend = result.get("backend")
             else:
                 db.add(Grading(
                     id_submission=sub.id_submission,
                     skor_ai=Decimal(str(result["final_score"])),
-                    feedback_ai=result["feedback"]
+                    feedback_ai=result["feedback"],
+                    ai_backend=result.get("backend")
                 ))
 
             out.append({
@@ -231,17 +400,257 @@ def save_ai_grade_bulk_assignment_student(
                 "bobot": q.bobot,
                 "skor_ai": float(result["final_score"]),
                 "feedback_ai": result["feedback"],
-                "method": result.get("method", "-")
+                "method": result.get("method", "-"),
+                "backend": result.get("backend"),
+                "tier": result.get("tier"),
+                "saved": True,
+                "status_code": 200
             })
 
-        db.commit()
+        await db.commit()
         return out
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Gagal menyimpan AI grading bulk: {str(e)}")
 
 
+# =========================
+# PREVIEW penilaian offline (similarity) untuk SEMUA submission 1 assignment - tidak simpan
+# =========================
+@router.post("/similarity/assignment/{assignment_id}", response_model=List[Dict[str, Any]])
+def predict_similarity_assignment(
+    assignment_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    if current_user.role not in ["dosen", "admin"]:
+        raise HTTPException(status_code=403, detail="Hanya dosen/admin.")
+
+    subs = db.query(Submission).filter(Submission.id_assignment == assignment_id).all()
+    if not subs:
+        return []
+
+    questions = db.query(Question).filter(Question.id_assignment == assignment_id).all()
+    subs_by_question: Dict[int, List[Submission]] = {}
+    for sub in subs:
+        subs_by_question.setdefault(sub.id_question, []).append(sub)
+
+    out: List[Dict[str, Any]] = []
+    for q in questions:
+        q_subs = subs_by_question.get(q.id_question, [])
+        if not q_subs:
+            continue
+
+        # Semua jawaban untuk 1 soal dinilai dalam satu operasi matriks
+        results = grader.grade_similarity(
+            soal=q.teks_soal,
+            kunci_jawaban=q.kunci_jawaban or "",
+            jawaban_list=[sub.jawaban or "" for sub in q_subs],
+            max_score_dosen=float(q.bobot or 0)
+        )
+        for sub, result in zip(q_subs, results):
+            out.append({
+                "id_submission": sub.id_submission,
+                "id_mahasiswa": sub.id_mahasiswa,
+                "id_question": q.id_question,
+                "nomor_soal": q.nomor_soal,
+                "bobot": q.bobot,
+                "skor_ai": float(result["final_score"]),
+                "similarity": result.get("similarity"),
+                "feedback_ai": result["feedback"],
+                "method": result.get("method", "-"),
+                "backend": result.get("backend"),
+                "tier": result.get("tier")
+            })
+
+    return out
+
+
+# =========================
+# 6) JOB AI grading 1 assignment penuh (background)
+# =========================
+@router.post("/jobs/assignment/{assignment_id}", status_code=status.HTTP_202_ACCEPTED, response_model=Dict[str, Any])
+def enqueue_assignment_grading_job(
+    assignment_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    if current_user.role not in ["dosen", "admin"]:
+        raise HTTPException(status_code=403, detail="Hanya dosen/admin.")
+
+    assignment = db.query(Assignment).filter(Assignment.id_assignment == assignment_id).first()
+    if not assignment:
+        raise HTTPException(status_code=404, detail="Assignment tidak ditemukan.")
+
+    # Submission yang sudah ada di antrean aktif tidak dimasukkan lagi
+    queued_ids = (
+        db.query(GradingJobItem.id_submission)
+        .filter(GradingJobItem.status.in_(ACTIVE_ITEM_STATUSES))
+    )
+
+    # Belum dinilai AI = belum punya Grading, atau Grading.skor_ai masih kosong
+    ungraded = (
+        db.query(Submission.id_submission)
+        .outerjoin(Grading, Grading.id_submission == Submission.id_submission)
+        .filter(
+            Submission.id_assignment == assignment_id,
+            Grading.skor_ai.is_(None),
+            ~Submission.id_submission.in_(queued_ids)
+        )
+        .order_by(Submission.id_submission)
+        .all()
+    )
+    submission_ids = [sid for (sid,) in ungraded]
+
+    if not submission_ids:
+        return {"id_job": None, "status": "nothing_to_do", "total_items": 0}
+
+    try:
+        job = enqueue_submissions(db, assignment_id, submission_ids, created_by=current_user.id_user)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Gagal membuat job AI grading: {str(e)}")
+
+    grading_workers.start()
+    grading_workers.notify()
+
+    return {"id_job": job.id_job, "status": job.status, "total_items": job.total_items}
+
+
+@router.get("/jobs/{job_id}", response_model=Dict[str, Any])
+def get_grading_job_status(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    if current_user.role not in ["dosen", "admin"]:
+        raise HTTPException(status_code=403, detail="Hanya dosen/admin.")
+
+    job = db.query(GradingJob).filter(GradingJob.id_job == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job tidak ditemukan.")
+
+    counts = dict(
+        db.query(GradingJobItem.status, sql_func.count(GradingJobItem.id_item))
+        .filter(GradingJobItem.id_job == job_id)
+        .group_by(GradingJobItem.status)
+        .all()
+    )
+    done = counts.get("done", 0)
+    failed = counts.get("failed", 0)
+    finished = done + failed
+    total = job.total_items or 0
+
+    # Throughput dihitung dari jam DB agar konsisten dengan kolom timestamp
+    elapsed_seconds = None
+    throughput_per_minute = None
+    eta_seconds = None
+    if job.started_at:
+        end = job.finished_at or db.query(sql_func.localtimestamp()).scalar()
+        elapsed_seconds = max((end - job.started_at).total_seconds(), 0.0)
+        if elapsed_seconds > 0 and finished:
+            throughput_per_minute = round(finished / elapsed_seconds * 60, 2)
+            eta_seconds = round((total - finished) / (finished / elapsed_seconds), 1)
+
+    failures = (
+        db.query(GradingJobItem.id_submission, GradingJobItem.attempts, GradingJobItem.error)
+        .filter(GradingJobItem.id_job == job_id, GradingJobItem.status == "failed")
+        .order_by(GradingJobItem.id_item)
+        .limit(50)
+        .all()
+    )
+
+    return {
+        "id_job": job.id_job,
+        "id_assignment": job.id_assignment,
+        "status": job.status,
+        "source": job.source,
+        "total_items": total,
+        "pending": counts.get("pending", 0),
+        "running": counts.get("running", 0),
+        "done": done,
+        "failed": failed,
+        "progress_percent": round(finished / total * 100, 1) if total else 100.0,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "elapsed_seconds": elapsed_seconds,
+        "throughput_per_minute": throughput_per_minute,
+        "eta_seconds": eta_seconds,
+        "failures": [
+            {"id_submission": sid, "attempts": attempts, "error": error}
+            for sid, attempts, error in failures
+        ],
+    }
+
+
+# =========================
+# Statistik cache hasil AI grading (hit/miss)
+# =========================
+@router.get("/cache/stats", response_model=Dict[str, Any])
+def get_ai_cache_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    if current_user.role not in ["dosen", "admin"]:
+        raise HTTPException(status_code=403, detail="Hanya dosen/admin.")
+
+    return grader.cache.stats()
+
+
+# =========================
+# Statistik context cache prefix rubrik per soal
+# =========================
+@router.get("/context_cache/stats", response_model=Dict[str, Any])
+def get_ai_context_cache_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    if current_user.role not in ["dosen", "admin"]:
+        raise HTTPException(status_code=403, detail="Hanya dosen/admin.")
+
+    return grader.context_cache.stats()
+
+
+# =========================
+# Statistik rate limiter Gemini (termasuk waktu tunggu antrean)
+# =========================
+@router.get("/rate_limit/stats", response_model=Dict[str, Any])
+def get_ai_rate_limit_stats(
+    current_user: User = Depends(get_current_active_user)
+):
+    if current_user.role not in ["dosen", "admin"]:
+        raise HTTPException(status_code=403, detail="Hanya dosen/admin.")
+
+    return grader.rate_limiter.stats()
+
+
+# =========================
+# Status circuit breaker LLM (closed / open / half_open)
+# =========================
+@router.get("/breaker", response_model=Dict[str, Any])
+def get_ai_breaker_status(
+    current_user: User = Depends(get_current_active_user)
+):
+    if current_user.role not in ["dosen", "admin"]:
+        raise HTTPException(status_code=403, detail="Hanya dosen/admin.")
+
+    return {**grader.breaker.stats(), "fallback": grader.breaker_fallback}
+
+
+# =========================
+# Registry backend penilai + statistik hedging
+# =========================
+@router.get("/backends", response_model=Dict[str, Any])
+def get_ai_backends(
+    current_user: User = Depends(get_current_active_user)
+):
+    if current_user.role not in ["dosen", "admin"]:
+        raise HTTPException(status_code=403, detail="Hanya dosen/admin.")
+
+    return grader.hedge_stats()
+
+
 # =========================
 # 5) Statistik mahasiswa (berdasarkan skor_ai)
 # =========================
@@ -1,10 +1,14 @@
 # BE/app/routers/submission.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any
 
-from app.dependencies import get_db, get_current_active_user
+from app.dependencies import get_db, get_async_db, get_current_active_user, get_current_active_user_async
 from app.models.submissions import Submission
 from app.models.user import User
 from app.models.grading import Grading
@@ -17,6 +21,12 @@ from app.schemas.submission import (
     SubmissionOut,
     MySubmissionOut
 )
+from app.models.grading_job import GradingJobItem
+from app.utils.stemmer import token_bag
+from app.utils.plagiarism import index_submissions, ensure_indexed, similar_pairs, clusters_from_pairs, INDEX_THRESHOLD
+from app.utils.grading_worker import (
+    grading_workers, enqueue_debounced, EAGER_GRADING_ENABLED, ACTIVE_ITEM_STATUSES
+)
 
 router = APIRouter(tags=["submission"])
 # ----------------------------------
@@ -34,6 +44,7 @@ def submit_answers(
         raise HTTPException(status_code=403, detail="Hanya mahasiswa yang bisa submit.")
 
     saved_count = 0
+    saved_submissions = []
 
     for item in payload.items:
         existing_submission = db.query(Submission).filter(
@@ -43,19 +54,50 @@ def submit_answers(
 
         if existing_submission:
             existing_submission.jawaban = item.jawaban
+            existing_submission.token_bag = token_bag(item.jawaban)
+            saved_submissions.append(existing_submission)
         else:
             new_submission = Submission(
                 id_assignment=payload.id_assignment,
                 id_mahasiswa=current_user.id_user,
                 id_question=item.id_question,
-                jawaban=item.jawaban
+                jawaban=item.jawaban,
+                # Token ternormalisasi (stem) dihitung sekali di sini untuk penilaian keyword
+                token_bag=token_bag(item.jawaban)
             )
             db.add(new_submission)
+            saved_submissions.append(new_submission)
 
         saved_count += 1
 
     try:
+        db.flush()
+
+        # Update indeks kemiripan (MinHash LSH); gagal index tidak boleh membatalkan submit
+        try:
+            with db.begin_nested():
+                index_submissions(db, saved_submissions)
+        except Exception as e:
+            logging.warning(f"⚠️ Gagal update indeks kemiripan jawaban: {e}")
+
+        # Pre-grading AI: item antrean ikut commit bersama jawaban, dinilai worker di background
+        # setelah jeda debounce (tidak menambah latency request ini)
+        eager_queued = False
+        if EAGER_GRADING_ENABLED and saved_submissions:
+            try:
+                with db.begin_nested():
+                    enqueue_debounced(
+                        db, payload.id_assignment,
+                        [s.id_submission for s in saved_submissions],
+                        created_by=current_user.id_user,
+                    )
+                eager_queued = True
+            except Exception as e:
+                logging.warning(f"⚠️ Gagal mengantrekan pre-grading AI: {e}")
+
         db.commit()
+        if eager_queued:
+            grading_workers.start()
         return {"message": "Jawaban berhasil dikirim", "total_saved": saved_count}
     except Exception as e:
         db.rollback()
@@ -81,6 +123,20 @@ def get_assignment_submissions(
         .all()
     )
 
+    # Mahasiswa yang jawabannya masih di antrean AI (pre-grading / job dosen)
+    ai_pending_students = {
+        sid for (sid,) in (
+            db.query(Submission.id_mahasiswa)
+            .join(GradingJobItem, GradingJobItem.id_submission == Submission.id_submission)
+            .filter(
+                Submission.id_assignment == assignment_id,
+                GradingJobItem.status.in_(ACTIVE_ITEM_STATUSES)
+            )
+            .distinct()
+            .all()
+        )
+    }
+
     result_list = []
 
     for (s_id,) in student_ids:
@@ -103,24 +159,76 @@ def get_assignment_submissions(
             .all()
         )
 
-        is_graded = len(grading_records) > 0
+        # Baris Grading bisa berisi skor AI saja (pre-grading); "dinilai" = sudah ada skor dosen
+        is_graded = any(g.skor_dosen is not None for g in grading_records)
         status_text = "Sudah Dinilai" if is_graded else "Belum Dinilai"
 
         total_score = 0
         if is_graded:
             total_score = sum(g.skor_dosen for g in grading_records if g.skor_dosen is not None)
 
+        ai_scores = [g.skor_ai for g in grading_records if g.skor_ai is not None]
+        ai_pending = s_id in ai_pending_students
+
         result_list.append({
             "id_mahasiswa": student.id_user,
             "nama_mahasiswa": student.nama,
             "submitted_at": last_sub.submitted_at if last_sub else None,
             "status_grading": status_text,
-            "total_score": total_score
+            "total_score": total_score,
+            "total_skor_ai": float(sum(ai_scores)) if ai_scores else None,
+            "status_ai": "Diproses" if ai_pending else ("Siap" if ai_scores else "Belum Ada")
         })
 
     return result_list
 
 
+# ==========================================
+# 2b. DOSEN CEK KEMIRIPAN JAWABAN ANTAR MAHASISWA (Indikasi Plagiarisme)
+# ==========================================
+@router.get("/assignment/{assignment_id}/similarity", response_model=Dict[str, Any])
+def get_assignment_similarity(
+    assignment_id: int,
+    threshold: float = Query(0.7, ge=INDEX_THRESHOLD, le=1.0),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    if current_user.role not in ["dosen", "admin"]:
+        raise HTTPException(status_code=403, detail="Akses ditolak.")
+
+    # Submission lama yang belum ter-index dilengkapi dulu
+    ensure_indexed(db, assignment_id)
+
+    pairs = similar_pairs(db, assignment_id, threshold)
+    involved = {sid for a, b, _, _ in pairs for sid in (a, b)}
+
+    students = {}
+    if involved:
+        rows = (
+            db.query(Submission.id_submission, User.id_user, User.nama)
+            .join(User, User.id_user == Submission.id_mahasiswa)
+            .filter(Submission.id_submission.in_(involved))
+            .all()
+        )
+        students = {sid: {"id_mahasiswa": uid, "nama_mahasiswa": nama} for sid, uid, nama in rows}
+
+    def _member(sid: int) -> Dict[str, Any]:
+        return {"id_submission": sid, **students.get(sid, {})}
+
+    return {
+        "id_assignment": assignment_id,
+        "threshold": threshold,
+        "pairs": [
+            {"id_question": qid, "similarity": sim, "a": _member(a), "b": _member(b)}
+            for a, b, qid, sim in pairs
+        ],
+        "clusters": [
+            {**cluster, "members": [_member(sid) for sid in cluster["members"]]}
+            for cluster in clusters_from_pairs(pairs)
+        ],
+    }
+
+
 # ==========================================
 # 3. GET DETAIL JAWABAN MAHASISWA (Check Answer)
 # ==========================================
@@ -146,60 +254,44 @@ def get_student_submissions(
 # 4. GET "MY ESSAYS" (Riwayat Mahasiswa)
 # ==========================================
 @router.get("/my", response_model=List[MySubmissionOut])
-def get_my_submissions(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+async def get_my_submissions(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user_async)
 ):
     if current_user.role != "mahasiswa":
         raise HTTPException(status_code=403, detail="Hanya mahasiswa.")
 
-    assignment_ids = (
-        db.query(Submission.id_assignment)
-        .filter(Submission.id_mahasiswa == current_user.id_user)
-        .distinct()
-        .all()
-    )
-
-    results = []
-
-    for (aid,) in assignment_ids:
-        assignment = db.query(Assignment).filter(Assignment.id_assignment == aid).first()
-        if not assignment:
-            continue
-
-        course = db.query(Course).filter(Course.id_course == assignment.id_course).first()
-        course_name = course.nama_course if course else "Unknown Course"
-
-        last_sub = db.query(Submission).filter(
-            Submission.id_assignment == aid,
-            Submission.id_mahasiswa == current_user.id_user
-        ).order_by(Submission.submitted_at.desc()).first()
-
-        grades = (
-            db.query(Grading)
-            .join(Submission)
-            .filter(
-                Submission.id_assignment == aid,
-                Submission.id_mahasiswa == current_user.id_user
-            )
-            .all()
+    # Satu query agregat per assignment (sebelumnya 4 query per assignment):
+    # submit terakhir, jumlah soal yang sudah dinilai dosen, dan total skor dosen
+    rows = (await db.execute(
+        select(
+            Assignment.id_assignment,
+            Assignment.judul,
+            Course.nama_course,
+            func.max(Submission.submitted_at),
+            func.count(Grading.skor_dosen),
+            func.coalesce(func.sum(Grading.skor_dosen), 0),
         )
+        .select_from(Submission)
+        .join(Assignment, Assignment.id_assignment == Submission.id_assignment)
+        .outerjoin(Course, Course.id_course == Assignment.id_course)
+        .outerjoin(Grading, Grading.id_submission == Submission.id_submission)
+        .where(Submission.id_mahasiswa == current_user.id_user)
+        .group_by(Assignment.id_assignment, Assignment.judul, Course.nama_course)
+        .order_by(Assignment.id_assignment)
+    )).all()
 
-        final_score = 0
-        status_text = "Submitted"
-
-        if grades:
-            total_score = sum(g.skor_dosen for g in grades if g.skor_dosen)
-            final_score = total_score
-            status_text = "Graded"
-
+    results = []
+    for aid, judul, course_name, submitted_at, graded_count, total_score in rows:
+        # Skor AI hasil pre-grading tidak dihitung "Graded" sebelum dosen menilai
+        graded = graded_count > 0
         results.append({
-            "id_assignment": assignment.id_assignment,
-            "judul_assignment": assignment.judul,
-            "nama_course": course_name,
-            "submitted_at": last_sub.submitted_at if last_sub else None,
-            "status": status_text,
-            "nilai": float(final_score)
+            "id_assignment": aid,
+            "judul_assignment": judul,
+            "nama_course": course_name or "Unknown Course",
+            "submitted_at": submitted_at,
+            "status": "Graded" if graded else "Submitted",
+            "nilai": float(total_score) if graded else 0.0
         })
 
     return results
@@ -260,7 +352,7 @@ def get_my_submission_detail(
             "jawaban_kamu": sub.jawaban if sub else "-",
             "nilai_dosen": grade.skor_dosen if (grade and grade.skor_dosen is not None) else 0,
             "feedback_dosen": grade.feedback_dosen if (grade and grade.feedback_dosen) else "-",
-            "status_nilai": "Sudah Dinilai" if grade else "Belum Dinilai"
+            "status_nilai": "Sudah Dinilai" if (grade and grade.skor_dosen is not None) else "Belum Dinilai"
         })
 
     return result
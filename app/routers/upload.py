@@ -1,8 +1,21 @@
 # app/routers/upload.py
-from fastapi import APIRouter, File, UploadFile
+import asyncio
+from typing import Dict, Any
+
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, HTTPException, UploadFile, status
 from pydantic import BaseModel
-import io
-from PyPDF2 import PdfReader
+from sqlalchemy import func as sql_func
+from sqlalchemy.orm import Session
+
+from app.dependencies import get_db, get_current_active_user
+from app.models.ingest_job import IngestJob
+from app.models.user import User
+from app.utils.file_extract import (
+    spool_upload, pdf_extractor, count_words, text_stats, UploadTooLarge, ExtractionTimeout, ExtractionError
+)
+from app.utils.archive_ingest import (
+    parse_mapping, create_ingest_job, run_ingest_job, IngestError, INGEST_MAX_ARCHIVE_BYTES
+)
 
 router = APIRouter(tags=["upload"])
 
@@ -22,26 +35,139 @@ def upload_essay(essay: EssayUpload):
     }
 
 # ---- Upload file (txt atau pdf) ----
+# Upload di-spool per chunk (dibatasi UPLOAD_MAX_BYTES); ekstraksi PDF berjalan di process
+# pool dan decode/hitung kata di thread, sehingga event loop tetap melayani request lain.
+# File teks didecode per chunk dengan encoding yang dideteksi (UTF-8, cp1252, dll).
+# Hasil ekstraksi PDF di-cache per SHA-256 isi file; include_timings=true menyertakan waktu
+# ekstraksi per halaman untuk mendiagnosis dokumen yang lambat.
 @router.post("/file")
-async def upload_file(file: UploadFile = File(...)):
-    filename = file.filename
-    content = await file.read()
-    
-    if filename.lower().endswith(".pdf"):
-        pdf_file = io.BytesIO(content)
-        reader = PdfReader(pdf_file)
-        text = ""
-        for page in reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + "\n"
-        word_count = len(text.split())
+async def upload_file(file: UploadFile = File(...), include_timings: bool = False):
+    filename = file.filename or ""
+    try:
+        spool, digest = await spool_upload(file)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+
+    try:
+        if filename.lower().endswith(".pdf"):
+            content = await asyncio.to_thread(spool.read)
+        else:
+            # txt / lain: decode per chunk langsung dari spool (memory konstan, encoding dideteksi)
+            stats = await asyncio.to_thread(text_stats, spool)
+            return {"filename": filename, **stats}
+    finally:
+        spool.close()
+
+    try:
+        extraction = await pdf_extractor.extract(content, digest=digest)
+    except ExtractionTimeout as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    except ExtractionError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    word_count = await asyncio.to_thread(count_words, extraction["text"])
+
+    response = {
+        "filename": filename,
+        "word_count": word_count,
+        "pages": extraction["pages"],
+        "cached": extraction["cached"],
+        "extract_seconds": extraction["extract_seconds"],
+    }
+    if include_timings:
+        response["page_seconds"] = extraction["page_seconds"]
+    return response
+
+
+# ---- Impor massal jawaban dari arsip zip (dosen) ----
+# `mapping` = JSON {nama_file: {"nim_nip": ..., "id_question": ...}}. Submission dibuat /
+# diperbarui oleh job background; progres dipantau lewat GET /upload/archive/jobs/{id_job}.
+@router.post("/archive/{assignment_id}", status_code=status.HTTP_202_ACCEPTED, response_model=Dict[str, Any])
+async def upload_archive(
+    assignment_id: int,
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    mapping: str = Form(...),
+    current_user: User = Depends(get_current_active_user)
+):
+    if current_user.role not in ["dosen", "admin"]:
+        raise HTTPException(status_code=403, detail="Hanya dosen/admin.")
+
+    try:
+        targets = parse_mapping(mapping)
+    except IngestError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    try:
+        archive, _ = await spool_upload(file, max_bytes=INGEST_MAX_ARCHIVE_BYTES)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+
+    try:
+        job, plan = await asyncio.to_thread(
+            create_ingest_job, archive, assignment_id, current_user.id_user, file.filename, targets
+        )
+    except LookupError as e:
+        archive.close()
+        raise HTTPException(status_code=404, detail=str(e))
+    except IngestError as e:
+        archive.close()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        archive.close()
+        raise HTTPException(status_code=500, detail=f"Gagal membuat job impor: {str(e)}")
+
+    if plan:
+        # Arsip (spool) diserahkan ke job dan ditutup di sana
+        background_tasks.add_task(run_ingest_job, job.id_job, archive, assignment_id, plan)
     else:
-        # txt / lain
-        text = content.decode()
-        word_count = len(text.split())
+        archive.close()
 
     return {
-        "filename": filename,
-        "word_count": word_count
-    }
\ No newline at end of file
+        "id_job": job.id_job,
+        "status": job.status,
+        "total_files": job.total_files,
+        "queued_files": len(plan),
+        "failed_files": job.failed_count,
+    }
+
+
+@router.get("/archive/jobs/{job_id}", response_model=Dict[str, Any])
+def get_archive_job_status(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    if current_user.role not in ["dosen", "admin"]:
+        raise HTTPException(status_code=403, detail="Hanya dosen/admin.")
+
+    job = db.query(IngestJob).filter(IngestJob.id_job == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job tidak ditemukan.")
+
+    total = job.total_files or 0
+    elapsed_seconds = None
+    throughput_per_minute = None
+    if job.started_at:
+        end = job.finished_at or db.query(sql_func.localtimestamp()).scalar()
+        elapsed_seconds = max((end - job.started_at).total_seconds(), 0.0)
+        if elapsed_seconds > 0 and job.processed_files:
+            throughput_per_minute = round(job.processed_files / elapsed_seconds * 60, 2)
+
+    return {
+        "id_job": job.id_job,
+        "id_assignment": job.id_assignment,
+        "filename": job.filename,
+        "status": job.status,
+        "total_files": total,
+        "processed_files": job.processed_files,
+        "created": job.created_count,
+        "updated": job.updated_count,
+        "failed": job.failed_count,
+        "progress_percent": round(job.processed_files / total * 100, 1) if total else 100.0,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "elapsed_seconds": elapsed_seconds,
+        "throughput_per_minute": throughput_per_minute,
+        "errors": job.errors or [],
+    }
@@ -1,6 +1,6 @@
 # app/schemas/assignment.py
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional
 from datetime import datetime
 
@@ -22,6 +22,7 @@ class QuestionOut(BaseModel):
     teks_soal: str
     bobot: int
     kunci_jawaban: Optional[str] = None
+    kata_kunci: Optional[List[str]] = None
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -48,6 +49,10 @@ class AssignmentCreate(BaseModel):
     questions: List[QuestionInput] 
     deadline: Optional[datetime] = None
     points: Optional[int] = 0 
+    # Ambang penilaian bertingkat per assignment (None = default server)
+    tier_low_similarity: Optional[float] = Field(default=None, ge=0, le=1)
+    tier_high_similarity: Optional[float] = Field(default=None, ge=0, le=1)
+    tier_min_words: Optional[int] = Field(default=None, ge=0)
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -63,6 +68,9 @@ class AssignmentOut(BaseModel):
     deadline: Optional[datetime] = None
     created_at: Optional[datetime] = None
     points: int = 0
+    tier_low_similarity: Optional[float] = None
+    tier_high_similarity: Optional[float] = None
+    tier_min_words: Optional[int] = None
     total_submitted: int = 0
     questions: List[QuestionOut] = []
 
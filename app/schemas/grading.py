@@ -21,6 +21,8 @@ class GradingOut(BaseModel):
     skor_dosen: Optional[float] = None
     feedback_ai: Optional[str] = None
     feedback_dosen: Optional[str] = None
+    dedup_cluster: Optional[str] = None
+    ai_backend: Optional[str] = None
     graded_at: Optional[datetime] = None
 
     # ✅ Pydantic v2
@@ -1,12 +1,32 @@
 import os
+import re
 import json
+import time
+import random
+import asyncio
 import logging
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait as futures_wait
+from contextlib import aclosing
+from types import SimpleNamespace
 from dotenv import load_dotenv
 from decimal import Decimal
 
 # --- PERUBAHAN 1: Ganti library Groq ke Google GenAI ---
 from google import genai
 from google.genai.errors import APIError 
+import httpx
+
+from app.utils.llm_backends import build_backend
+from app.utils.llm_metrics import llm_metrics
+from app.utils.grading_cache import GradingResultCache, make_cache_key, make_question_key
+from app.utils.context_cache import RubricPrompt, RubricContextCache
+from app.utils.scoring import calculate_essay_score
+from app.utils.dedup import cluster_answers, cluster_id_for
+from app.utils.similarity import similarity_to_key, similarity_to_score, similarity_feedback
+from app.utils.tiering import TierPolicy, classify_answers
 
 # Konfigurasi Logging sederhana
 logging.basicConfig(level=logging.INFO)
@@ -14,6 +34,380 @@ logging.basicConfig(level=logging.INFO)
 # Load env variables
 load_dotenv()
 
+# Naikkan versi ini setiap kali isi prompt penilaian diubah agar cache lama tidak terpakai
+PROMPT_VERSION = "v2"
+BATCH_PROMPT_VERSION = "v2-batch"
+
+
+class TokenBucketRateLimiter:
+    """
+    Rate limiter proses-wide untuk panggilan Gemini dengan dua bucket:
+    requests-per-minute (RPM) dan tokens-per-minute (TPM). Nilai <= 0 menonaktifkan bucket.
+
+    Bisa dipakai dari thread (acquire) maupun coroutine (aacquire). Saat API mengembalikan 429,
+    `pause()` menahan SEMUA pemanggil sampai retry-after lewat agar tidak terus menghantam quota.
+    """
+
+    def __init__(self, rpm: float, tpm: float):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._req_tokens = float(rpm)
+        self._tok_tokens = float(tpm)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+        # Metrik antrean
+        self.acquired = 0
+        self.waited = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.pauses = 0
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._updated = now
+        if self.rpm > 0:
+            self._req_tokens = min(float(self.rpm), self._req_tokens + elapsed * self.rpm / 60.0)
+        if self.tpm > 0:
+            self._tok_tokens = min(float(self.tpm), self._tok_tokens + elapsed * self.tpm / 60.0)
+
+    def _try_acquire(self, tokens: int) -> float:
+        """Ambil kuota jika tersedia (return 0), selain itu return lama tunggu (detik)."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+
+            if now < self._paused_until:
+                return self._paused_until - now
+
+            tokens = min(tokens, self.tpm) if self.tpm > 0 else tokens
+            wait = 0.0
+            if self.rpm > 0 and self._req_tokens < 1:
+                wait = max(wait, (1 - self._req_tokens) * 60.0 / self.rpm)
+            if self.tpm > 0 and self._tok_tokens < tokens:
+                wait = max(wait, (tokens - self._tok_tokens) * 60.0 / self.tpm)
+            if wait > 0:
+                return wait
+
+            if self.rpm > 0:
+                self._req_tokens -= 1
+            if self.tpm > 0:
+                self._tok_tokens -= tokens
+            return 0.0
+
+    def _record(self, waited: float):
+        with self._lock:
+            self.acquired += 1
+            if waited > 0:
+                self.waited += 1
+                self.total_wait_seconds += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def acquire(self, tokens: int = 1) -> float:
+        start = time.monotonic()
+        while True:
+            wait = self._try_acquire(tokens)
+            if wait <= 0:
+                break
+            time.sleep(wait)
+        waited = time.monotonic() - start
+        self._record(waited)
+        return waited
+
+    async def aacquire(self, tokens: int = 1) -> float:
+        start = time.monotonic()
+        while True:
+            wait = self._try_acquire(tokens)
+            if wait <= 0:
+                break
+            await asyncio.sleep(wait)
+        waited = time.monotonic() - start
+        self._record(waited)
+        return waited
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self.pauses += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                "rpm_limit": self.rpm,
+                "tpm_limit": self.tpm,
+                "available_requests": round(self._req_tokens, 2) if self.rpm > 0 else None,
+                "available_tokens": round(self._tok_tokens, 1) if self.tpm > 0 else None,
+                "acquired": self.acquired,
+                "waited": self.waited,
+                "total_wait_seconds": round(self.total_wait_seconds, 3),
+                "avg_wait_seconds": round(self.total_wait_seconds / self.acquired, 3) if self.acquired else 0.0,
+                "max_wait_seconds": round(self.max_wait_seconds, 3),
+                "pauses": self.pauses,
+                "paused_for_seconds": round(max(0.0, self._paused_until - time.monotonic()), 3),
+            }
+
+
+# Status HTTP dari Gemini yang layak dicoba ulang
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def _retry_after_seconds(error: APIError) -> float | None:
+    """Ambil petunjuk retry dari header Retry-After atau RetryInfo.retryDelay ("12s") Gemini."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                pass
+
+    details = getattr(error, "details", None) or {}
+    if isinstance(details, dict):
+        # Body error bisa berupa string (mis. {"error": "quota exceeded"} dari proxy / API kompatibel OpenAI)
+        body = details.get("error", details)
+        details = body.get("details", []) if isinstance(body, dict) else []
+    for detail in details if isinstance(details, list) else []:
+        delay = detail.get("retryDelay") if isinstance(detail, dict) else None
+        if delay:
+            match = re.match(r"([\d.]+)s", str(delay))
+            if match:
+                return float(match.group(1))
+    return None
+
+
+class CircuitOpenError(Exception):
+    """Dilempar saat circuit breaker menolak panggilan ke LLM."""
+
+
+class LLMFailure(str):
+    """
+    Feedback dari panggilan LLM yang gagal (timeout, error API / jaringan, JSON rusak, klien
+    tidak aktif). Skor 0 yang menyertainya bukan nilai sah: _build_result mengubahnya menjadi
+    method "Error" sehingga tidak disimpan sebagai skor AI dan job mencoba ulang.
+    """
+
+
+CIRCUIT_OPEN_FEEDBACK = "⚡ Layanan AI sedang terganggu (circuit breaker terbuka). Coba lagi beberapa saat lagi."
+FALLBACK_METHOD = "Heuristic Fallback (AI circuit open)"
+SIMILARITY_METHOD = "Similarity (TF-IDF Offline)"
+TIERED_METHOD = "Tiered (Lokal, tanpa AI)"
+
+# Metode penilaian yang bisa dipilih di grade_essay / grade_batch
+GRADING_METHODS = ("llm", "similarity")
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker untuk panggilan LLM berdasarkan error rate dan latency.
+
+    - closed   : semua panggilan lewat; hasil dicatat di jendela bergulir (window).
+                 Jika rasio gagal (error provider ATAU lebih lambat dari slow_seconds)
+                 >= failure_rate dengan minimal min_calls sampel -> open.
+    - open     : semua panggilan langsung ditolak (fail fast) selama open_seconds.
+    - half_open: hanya half_open_max_calls panggilan percobaan yang dilewatkan;
+                 sukses -> closed, gagal -> open lagi.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, window: int = 20, min_calls: int = 5, failure_rate: float = 0.5,
+                 slow_seconds: float = 20.0, open_seconds: float = 30.0, half_open_max_calls: int = 1):
+        self.window = max(1, window)
+        self.min_calls = max(1, min_calls)
+        self.failure_rate = failure_rate
+        self.slow_seconds = slow_seconds
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = max(1, half_open_max_calls)
+
+        self._state = self.CLOSED
+        self._outcomes = deque(maxlen=self.window)  # True = gagal/lambat
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._lock = threading.Lock()
+
+        self.rejected = 0
+        self.times_opened = 0
+        self.last_latency_seconds = None
+
+    def _refresh(self, now: float):
+        if self._state == self.OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = self.HALF_OPEN
+            self._probes_in_flight = 0
+            self._probe_successes = 0
+            logging.info("🟡 [AI BREAKER] half-open: mengirim panggilan percobaan.")
+
+    def _open(self, now: float):
+        self._state = self.OPEN
+        self._opened_at = now
+        self.times_opened += 1
+        logging.warning(f"🔴 [AI BREAKER] open selama {self.open_seconds}s (LLM dianggap terganggu).")
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._refresh(time.monotonic())
+            return self._state
+
+    def allow(self) -> bool:
+        with self._lock:
+            self._refresh(time.monotonic())
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and self._probes_in_flight < self.half_open_max_calls:
+                self._probes_in_flight += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, success: bool, latency: float):
+        failed = (not success) or latency > self.slow_seconds
+        with self._lock:
+            now = time.monotonic()
+            self.last_latency_seconds = round(latency, 3)
+
+            if self._state == self.HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if failed:
+                    self._open(now)
+                    return
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_max_calls:
+                    self._state = self.CLOSED
+                    self._outcomes.clear()
+                    logging.info("🟢 [AI BREAKER] closed: LLM kembali normal.")
+                return
+
+            self._outcomes.append(failed)
+            if self._state == self.CLOSED and len(self._outcomes) >= self.min_calls:
+                if sum(self._outcomes) / len(self._outcomes) >= self.failure_rate:
+                    self._open(now)
+
+    def open_remaining_seconds(self) -> float:
+        """Sisa waktu state open sebelum half-open (0 jika breaker tidak open)."""
+        with self._lock:
+            now = time.monotonic()
+            self._refresh(now)
+            if self._state != self.OPEN:
+                return 0.0
+            return max(0.0, self.open_seconds - (now - self._opened_at))
+
+    def cancel(self):
+        """Panggilan dibatalkan (mis. request ditutup) -> lepaskan slot percobaan tanpa mencatat hasil."""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            self._refresh(now)
+            samples = len(self._outcomes)
+            return {
+                "state": self._state,
+                "window_samples": samples,
+                "window_failure_rate": round(sum(self._outcomes) / samples, 3) if samples else 0.0,
+                "failure_rate_threshold": self.failure_rate,
+                "slow_call_seconds": self.slow_seconds,
+                "open_seconds": self.open_seconds,
+                "reopen_in_seconds": round(max(0.0, self.open_seconds - (now - self._opened_at)), 1) if self._state == self.OPEN else 0.0,
+                "times_opened": self.times_opened,
+                "rejected_calls": self.rejected,
+                "last_latency_seconds": self.last_latency_seconds,
+            }
+
+
+def _is_provider_failure(error: Exception) -> bool:
+    """Error yang menandakan provider terganggu (bukan kesalahan request kita)."""
+    if isinstance(error, APIError):
+        return error.code in RETRYABLE_STATUS
+    return True
+
+
+def _call_outcome(error: Exception) -> str:
+    """Kelas hasil panggilan yang gagal untuk metrik: timeout atau api_error."""
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError, httpx.TimeoutException)):
+        return "timeout"
+    if isinstance(error, APIError) and error.code in (408, 504):
+        return "timeout"
+    return "api_error"
+
+
+class LatencyTracker:
+    """Jendela geser latency panggilan sukses backend utama, untuk deadline hedging (p95)."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, latency: float):
+        with self._lock:
+            self._samples.append(latency)
+
+    def quantile(self, q: float) -> float | None:
+        """Kuantil empiris, atau None jika sampel belum cukup."""
+        with self._lock:
+            ordered = sorted(self._samples)
+        if len(ordered) < self.min_samples:
+            return None
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def __len__(self):
+        return len(self._samples)
+
+
+# Nama backend yang menghasilkan skor LLM terakhir pada context (thread / task) ini.
+# Dipakai agar _get_llm_score tetap mengembalikan (skor, feedback) tetapi hasil akhir
+# tetap tahu skor itu berasal dari backend mana (utama atau hedge).
+_llm_producer: contextvars.ContextVar[str | None] = contextvars.ContextVar("llm_producer", default=None)
+
+
+class FeedbackStreamExtractor:
+    """
+    Ambil isi field "feedback" dari JSON respons yang masih datang sepotong-sepotong
+    (streaming), supaya feedback bisa ditampilkan sebelum JSON lengkap dan skor diketahui.
+    """
+
+    _START = re.compile(r'"feedback"\s*:\s*"')
+
+    def __init__(self):
+        self.buffer = ""
+        self.emitted = 0
+
+    def feed(self, chunk: str) -> str:
+        """Tambahkan potongan teks; kembalikan bagian feedback baru (boleh string kosong)."""
+        self.buffer += chunk
+        match = self._START.search(self.buffer)
+        if not match:
+            return ""
+
+        raw, out, i = self.buffer[match.end():], [], 0
+        while i < len(raw):
+            char = raw[i]
+            if char == '"':
+                break
+            if char == "\\":
+                size = 6 if raw[i + 1:i + 2] == "u" else 2
+                if i + size > len(raw):
+                    break  # escape belum lengkap, tunggu potongan berikutnya
+                out.append(json.loads(f'"{raw[i:i + size]}"'))
+                i += size
+                continue
+            out.append(char)
+            i += 1
+
+        text = "".join(out)
+        delta, self.emitted = text[self.emitted:], len(text)
+        return delta
+
+
 class LLMGrader:
     """
     Penilai Esai Murni LLM menggunakan Gemini (gemini-2.5-flash)
@@ -38,69 +432,584 @@ class LLMGrader:
         self.llm_model = "gemini-2.5-flash" 
         self.client = None
 
-        if self.api_key:
+        # Batas jumlah panggilan Gemini yang berjalan bersamaan pada jalur async (fan-out bulk)
+        self.max_concurrency = max(1, int(os.getenv("AI_GRADER_CONCURRENCY", "5")))
+
+        # Mode batch: beberapa jawaban untuk 1 soal dalam 1 prompt.
+        # Token budget memakai estimasi kasar ~4 karakter per token.
+        self.batch_size = max(1, int(os.getenv("AI_BATCH_SIZE", "8")))
+        self.batch_token_budget = max(1, int(os.getenv("AI_BATCH_TOKEN_BUDGET", "6000")))
+
+        # Metode default ("llm", "similarity" atau "tiered") + parameter penilai offline
+        self.default_method = os.getenv("AI_GRADER_METHOD", "llm").lower()
+        self.similarity_vectorizer = os.getenv("SIMILARITY_VECTORIZER", "tfidf").lower()
+        self.similarity_low = float(os.getenv("SIMILARITY_LOW", "0.10"))
+        self.similarity_high = float(os.getenv("SIMILARITY_HIGH", "0.80"))
+
+        # Dedup: jawaban identik/hampir identik untuk 1 soal cukup dinilai sekali
+        self.dedup_enabled = os.getenv("AI_DEDUP_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.dedup_threshold = float(os.getenv("AI_DEDUP_THRESHOLD", "0.9"))
+
+        # Rate limit proses-wide + retry untuk 429/5xx
+        self.rate_limiter = TokenBucketRateLimiter(
+            rpm=float(os.getenv("AI_RPM", "60")),
+            tpm=float(os.getenv("AI_TPM", "250000")),
+        )
+        self.max_retries = max(0, int(os.getenv("AI_RETRY_MAX", "4")))
+        self.retry_base_seconds = float(os.getenv("AI_RETRY_BASE_SECONDS", "1"))
+        self.retry_max_seconds = float(os.getenv("AI_RETRY_MAX_SECONDS", "30"))
+
+        # Circuit breaker: saat Gemini terganggu, gagal cepat atau pakai skor heuristik lokal
+        self.breaker = CircuitBreaker(
+            window=int(os.getenv("AI_BREAKER_WINDOW", "20")),
+            min_calls=int(os.getenv("AI_BREAKER_MIN_CALLS", "5")),
+            failure_rate=float(os.getenv("AI_BREAKER_FAILURE_RATE", "0.5")),
+            slow_seconds=float(os.getenv("AI_BREAKER_SLOW_SECONDS", "20")),
+            open_seconds=float(os.getenv("AI_BREAKER_OPEN_SECONDS", "30")),
+        )
+        # "heuristic" = pakai calculate_essay_score, "fail" = langsung Error
+        self.breaker_fallback = os.getenv("AI_BREAKER_FALLBACK", "heuristic").lower()
+        self.timeout_seconds = float(os.getenv("AI_TIMEOUT_SECONDS", "60"))
+
+        # Cache hasil penilaian (LRU memory + tabel ai_grading_cache)
+        self.cache = GradingResultCache()
+        # Context cache prefix rubrik per soal (explicit caching provider atau stand-in lokal)
+        self.context_cache = RubricContextCache()
+
+        # Backend utama dari registry (gemini | openai | heuristic | fake), opsional kaset record-replay
+        primary = None
+        try:
+            primary = build_backend(os.getenv("AI_GRADER_BACKEND", "gemini").lower(), self.timeout_seconds, cassette=True)
+        except Exception as e:
+            logging.error(f"❌ [AI INIT] Gagal inisialisasi Gemini Client: {e}")
+        if primary is not None:
+            self.backend, self.llm_model, self.client = primary.name, primary.model, primary.client
+            self.method_label = primary.method_label
+        else:
+            self.backend, self.method_label = None, "LLM Only (Gemini 2.5 Flash)"
+        self.backends = {primary.name: primary} if primary is not None else {}
+
+        # Hedging: jika backend utama belum menjawab sampai deadline (kuantil latency, default p95),
+        # kirim request kedua ke backend hedge pertama yang aktif dan pakai jawaban tercepat.
+        self.hedge_backends = []
+        for name in filter(None, (n.strip().lower() for n in os.getenv("AI_HEDGE_BACKENDS", "").split(","))):
             try:
-                # Inisialisasi Gemini client
-                self.client = genai.Client(api_key=self.api_key)
-                logging.info(f"✅ [AI INIT] Gemini Client loaded. Using {self.llm_model}")
+                backend = build_backend(name, self.timeout_seconds)
             except Exception as e:
-                logging.error(f"❌ [AI INIT] Gagal inisialisasi Gemini Client: {e}")
-                self.api_key = None 
+                logging.error(f"❌ [AI INIT] Gagal inisialisasi backend hedge '{name}': {e}")
+                continue
+            if backend is not None and backend.client is not None and name != self.backend:
+                self.hedge_backends.append(backend)
+                self.backends[name] = backend
+        self.hedge_quantile = float(os.getenv("AI_HEDGE_QUANTILE", "0.95"))
+        self.hedge_min_seconds = float(os.getenv("AI_HEDGE_MIN_SECONDS", "1"))
+        self.hedge_default_seconds = float(os.getenv("AI_HEDGE_DEFAULT_SECONDS", "8"))
+        self.latency_tracker = LatencyTracker(
+            window=int(os.getenv("AI_HEDGE_WINDOW", "200")),
+            min_samples=int(os.getenv("AI_HEDGE_MIN_SAMPLES", "20")),
+        )
+        self.hedge_threads = max(1, int(os.getenv("AI_HEDGE_THREADS", "8")))
+        self._hedge_executor = None
+        self._hedge_lock = threading.Lock()
+        self.hedge_counts = {"fired": 0, "won": 0, "rerouted": 0}
+
+        if self.client:
+            logging.info(f"✅ [AI INIT] LLM Client loaded ({primary.description}). Using {self.llm_model}")
         else:
             logging.warning("⚠️ [AI INIT] GEMINI_API_KEY tidak ditemukan di .env. LLM Grader akan bekerja dalam Mode Offline/Dummy.")
+        if self.hedge_backends:
+            logging.info(f"🪁 [AI INIT] Hedging aktif ke: {', '.join(b.name for b in self.hedge_backends)}")
 
-    def _get_llm_score(self, soal: str, kunci: str, jawaban: str) -> tuple[float, str]:
-        """Menghubungi Gemini API untuk mendapatkan skor (0-100) dan feedback."""
-        
-        if not self.api_key or not self.client:
-            return 0.0, "⚠️ Layanan AI tidak aktif. API Key Gemini tidak ditemukan atau Client gagal diinisialisasi."
-
-        prompt = f"""
+    def _build_prompt(self, soal: str, kunci: str, jawaban: str) -> RubricPrompt:
+        """
+        Prompt penilaian yang dipakai bersama oleh jalur sync dan async.
+        Prefix (instruksi + soal + kunci + format) sama untuk semua jawaban 1 soal -> bisa di-cache.
+        """
+        prefix = f"""
         Anda adalah Dosen/Penguji Esai yang ketat. Nilai jawaban esai ini (skala 0-100). Fokus pada kualitas logika, struktur, kedalaman materi, dan relevansi terhadap kunci jawaban.
         SOAL: {soal}
         KUNCI JAWABAN: {kunci}
-        JAWABAN MAHASISWA: {jawaban}
-        
+
         Berikan output HANYA JSON. Pastikan JSON VALID.
         JSON FORMAT: {{"skor": <0-100>, "feedback": "<berikan feedback yang konstruktif, maksimum 3 kalimat>"}}
+"""
+        suffix = f"""        JAWABAN MAHASISWA: {jawaban}
         """
-        
+        return RubricPrompt(prefix, suffix, make_question_key(soal, kunci), kind="single")
+
+    def _generation_config(self, cached_content: str | None = None):
+        return genai.types.GenerateContentConfig(
+            response_mime_type="application/json", # Minta respons dalam format JSON
+            temperature=0.1,
+            cached_content=cached_content
+        )
+
+    def _prompt_request(self, prompt: str) -> tuple[str, object, str | None]:
+        """(contents, config, nama cached content) untuk backend utama."""
+        if isinstance(prompt, RubricPrompt):
+            cached_content = self.context_cache.resolve(self.client, self.llm_model, prompt)
+            if cached_content:
+                return prompt.suffix, self._generation_config(cached_content), cached_content
+        return str(prompt), self._generation_config(), None
+
+    async def _aprompt_request(self, prompt: str) -> tuple[str, object, str | None]:
+        if isinstance(prompt, RubricPrompt):
+            cached_content = await self.context_cache.aresolve(self.client, self.llm_model, prompt)
+            if cached_content:
+                return prompt.suffix, self._generation_config(cached_content), cached_content
+        return str(prompt), self._generation_config(), None
+
+    def _stale_context(self, error: APIError, cached_content: str | None) -> bool:
+        """Cached content ditolak provider (kedaluwarsa/dihapus): lupakan handle, kirim ulang prompt utuh."""
+        if cached_content is None or getattr(error, "code", None) not in (400, 403, 404):
+            return False
+        logging.warning(f"🗂️ Cached content {cached_content} ditolak ({error.code}), kirim ulang tanpa cache")
+        self.context_cache.drop(cached_content)
+        return True
+
+    def _parse_llm_response(self, content: str) -> tuple[float, str]:
+        """Parse JSON dari Gemini dan sanitasi skor ke range 0-100."""
+        # Karena kita meminta response_mime_type="application/json", 
+        # response.text seharusnya sudah merupakan string JSON murni.
+        data = json.loads(content)
+
+        llm_score = float(data.get("skor", 0))
+        llm_score = max(0.0, min(100.0, llm_score)) 
+
+        return llm_score, data.get("feedback", "No feedback from LLM.")
+
+    # ---------- PEMANGGILAN GEMINI (rate limit + retry) ----------
+    def _retry_delay(self, error: APIError, attempt: int) -> float | None:
+        """Lama tunggu sebelum percobaan berikutnya, atau None jika tidak perlu retry."""
+        if getattr(error, "code", None) not in RETRYABLE_STATUS or attempt >= self.max_retries:
+            return None
+        backoff = min(self.retry_max_seconds, self.retry_base_seconds * (2 ** attempt))
+        delay = random.uniform(backoff / 2, backoff)  # jitter agar retry tidak serempak
+        hint = _retry_after_seconds(error)
+        if hint is not None:
+            delay = max(delay, hint)
+        if error.code == 429:
+            # Quota habis: tahan semua pemanggil lain juga
+            self.rate_limiter.pause(delay)
+        return delay
+
+    def _generate_primary(self, prompt: str, parse=None):
+        """Panggil backend utama (breaker + rate limit + retry); jika `parse` diberikan, kembalikan hasil parse."""
+        if not self.breaker.allow():
+            raise CircuitOpenError(CIRCUIT_OPEN_FEEDBACK)
+
+        tokens = self._estimate_tokens(prompt) + 256
+        attempt = 0
+        call_seconds = 0.0  # latency murni panggilan API (tanpa antre rate limiter)
         try:
-            # --- PERUBAHAN 4: Ganti pemanggilan API Groq ke Gemini ---
-            response = self.client.models.generate_content(
-                model=self.llm_model,
-                contents=prompt,
-                config=genai.types.GenerateContentConfig(
-                    response_mime_type="application/json", # Minta respons dalam format JSON
-                    temperature=0.1
-                )
+            contents, config, cached_content = self._prompt_request(prompt)
+            while True:
+                self.rate_limiter.acquire(tokens)
+                start = time.monotonic()
+                try:
+                    response = self.client.models.generate_content(
+                        model=self.llm_model,
+                        contents=contents,
+                        config=config
+                    )
+                    latency = time.monotonic() - start
+                    call_seconds += latency
+                    break
+                except APIError as e:
+                    call_seconds += time.monotonic() - start
+                    llm_metrics.record(self.llm_model, _call_outcome(e), time.monotonic() - start)
+                    if self._stale_context(e, cached_content):
+                        contents, config, cached_content = str(prompt), self._generation_config(), None
+                        continue
+                    delay = self._retry_delay(e, attempt)
+                    if delay is None:
+                        raise
+                    logging.warning(f"⏳ Gemini {e.code}, retry {attempt + 1}/{self.max_retries} dalam {delay:.1f}s")
+                    time.sleep(delay)
+                    attempt += 1
+                except Exception as e:
+                    llm_metrics.record(self.llm_model, _call_outcome(e), time.monotonic() - start)
+                    raise
+        except Exception as e:
+            self.breaker.record(success=not _is_provider_failure(e), latency=call_seconds)
+            raise
+        except BaseException:
+            self.breaker.cancel()
+            raise
+
+        self.breaker.record(success=True, latency=call_seconds)
+        self.latency_tracker.add(latency)
+        return self._observe_response(response, latency, parse)
+
+    async def _agenerate_primary(self, prompt: str, parse=None):
+        if not self.breaker.allow():
+            raise CircuitOpenError(CIRCUIT_OPEN_FEEDBACK)
+
+        tokens = self._estimate_tokens(prompt) + 256
+        attempt = 0
+        call_seconds = 0.0
+        try:
+            contents, config, cached_content = await self._aprompt_request(prompt)
+            while True:
+                await self.rate_limiter.aacquire(tokens)
+                start = time.monotonic()
+                try:
+                    response = await self.client.aio.models.generate_content(
+                        model=self.llm_model,
+                        contents=contents,
+                        config=config
+                    )
+                    latency = time.monotonic() - start
+                    call_seconds += latency
+                    break
+                except APIError as e:
+                    call_seconds += time.monotonic() - start
+                    llm_metrics.record(self.llm_model, _call_outcome(e), time.monotonic() - start)
+                    if self._stale_context(e, cached_content):
+                        contents, config, cached_content = str(prompt), self._generation_config(), None
+                        continue
+                    delay = self._retry_delay(e, attempt)
+                    if delay is None:
+                        raise
+                    logging.warning(f"⏳ Gemini {e.code}, retry {attempt + 1}/{self.max_retries} dalam {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                except Exception as e:
+                    llm_metrics.record(self.llm_model, _call_outcome(e), time.monotonic() - start)
+                    raise
+        except Exception as e:
+            self.breaker.record(success=not _is_provider_failure(e), latency=call_seconds)
+            raise
+        except BaseException:
+            # asyncio.CancelledError: request dibatalkan, bukan kegagalan provider
+            self.breaker.cancel()
+            raise
+
+        self.breaker.record(success=True, latency=call_seconds)
+        self.latency_tracker.add(latency)
+        return self._observe_response(response, latency, parse)
+
+    def _observe_response(self, response, latency: float, parse=None, model: str | None = None):
+        """Catat metrik panggilan sukses (ok / json_error) beserta token dari usage_metadata."""
+        model = model or self.llm_model
+        usage = getattr(response, "usage_metadata", None)
+        if parse is None:
+            llm_metrics.record(model, "ok", latency, usage)
+            return response
+        try:
+            parsed = parse(response.text)
+        except (ValueError, TypeError, KeyError, AttributeError):
+            # json.JSONDecodeError adalah turunan ValueError
+            llm_metrics.record(model, "json_error", latency, usage)
+            logging.warning(f"🧾 Respons LLM tidak valid. Raw response: {str(response.text)[:300]}")
+            raise
+        llm_metrics.record(model, "ok", latency, usage)
+        return parsed
+
+    # ---------- HEDGING (backend kedua saat backend utama lambat) ----------
+    def _hedge_target(self):
+        return self.hedge_backends[0] if self.hedge_backends and self.client else None
+
+    def _hedge_deadline(self) -> float:
+        """Deadline sebelum hedge dikirim: kuantil latency backend utama (default p95)."""
+        q = self.latency_tracker.quantile(self.hedge_quantile)
+        if q is None:
+            return self.hedge_default_seconds
+        return min(self.timeout_seconds, max(self.hedge_min_seconds, q))
+
+    def _count_hedge(self, key: str):
+        with self._hedge_lock:
+            self.hedge_counts[key] += 1
+
+    def _hedge_pool(self) -> ThreadPoolExecutor:
+        with self._hedge_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(max_workers=self.hedge_threads, thread_name_prefix="llm-hedge")
+            return self._hedge_executor
+
+    def hedge_stats(self) -> dict:
+        with self._hedge_lock:
+            counts = dict(self.hedge_counts)
+        q = self.latency_tracker.quantile(self.hedge_quantile)
+        return {
+            "primary": self.backends[self.backend].info() if self.backend in self.backends else None,
+            "hedge_backends": [b.info() for b in self.hedge_backends],
+            "hedge_enabled": self._hedge_target() is not None,
+            "quantile": self.hedge_quantile,
+            "primary_latency_quantile_seconds": round(q, 3) if q is not None else None,
+            "latency_samples": len(self.latency_tracker),
+            "deadline_seconds": round(self._hedge_deadline(), 3),
+            **counts,
+        }
+
+    def _generate_backend(self, backend, prompt: str, parse=None):
+        """1 panggilan ke backend hedge (tanpa retry/breaker backend utama)."""
+        start = time.monotonic()
+        try:
+            response = backend.client.models.generate_content(
+                model=backend.model, contents=str(prompt), config=self._generation_config()
             )
+        except Exception as e:
+            llm_metrics.record(backend.model, _call_outcome(e), time.monotonic() - start)
+            raise
+        return self._observe_response(response, time.monotonic() - start, parse, model=backend.model)
 
-            # Karena kita meminta response_mime_type="application/json", 
-            # response.text seharusnya sudah merupakan string JSON murni.
-            content = response.text
-            data = json.loads(content)
-            
-            # Sanitasi skor dan memastikan berada dalam range 0-100
-            llm_score = float(data.get("skor", 0))
-            llm_score = max(0.0, min(100.0, llm_score)) 
-            
-            return llm_score, data.get("feedback", "No feedback from LLM.")
+    async def _agenerate_backend(self, backend, prompt: str, parse=None):
+        start = time.monotonic()
+        try:
+            response = await backend.client.aio.models.generate_content(
+                model=backend.model, contents=str(prompt), config=self._generation_config()
+            )
+        except Exception as e:
+            llm_metrics.record(backend.model, _call_outcome(e), time.monotonic() - start)
+            raise
+        return self._observe_response(response, time.monotonic() - start, parse, model=backend.model)
+
+    def _generate(self, prompt: str, parse=None):
+        """
+        Panggilan LLM dengan hedging. Tanpa backend hedge = langsung backend utama.
+        Jalur sync memakai thread pool: request yang kalah tidak bisa dibatalkan dan
+        dibiarkan selesai di background (hasilnya dibuang).
+        """
+        hedge = self._hedge_target()
+        if hedge is None:
+            result = self._generate_primary(prompt, parse)
+            _llm_producer.set(self.backend)
+            return result
+
+        pool = self._hedge_pool()
+        primary = pool.submit(contextvars.copy_context().run, self._generate_primary, prompt, parse)
+        done, _ = futures_wait([primary], timeout=self._hedge_deadline())
+        if done:
+            try:
+                result = primary.result()
+                _llm_producer.set(self.backend)
+                return result
+            except CircuitOpenError:
+                # Backend utama sedang diputus breaker: langsung alihkan ke backend hedge
+                self._count_hedge("rerouted")
+                result = self._generate_backend(hedge, prompt, parse)
+                _llm_producer.set(hedge.name)
+                return result
+
+        self._count_hedge("fired")
+        secondary = pool.submit(contextvars.copy_context().run, self._generate_backend, hedge, prompt, parse)
+        owners = {primary: self.backend, secondary: hedge.name}
+        pending, failures = set(owners), {}
+        while pending:
+            done, pending = futures_wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is secondary:
+                        self._count_hedge("won")
+                    _llm_producer.set(owners[future])
+                    return future.result()
+                failures[future] = future.exception()
+        raise failures.get(primary) or failures[secondary]
+
+    async def _agenerate(self, prompt: str, parse=None):
+        """Versi async _generate: request yang kalah dibatalkan."""
+        hedge = self._hedge_target()
+        if hedge is None:
+            result = await self._agenerate_primary(prompt, parse)
+            _llm_producer.set(self.backend)
+            return result
+
+        primary = asyncio.create_task(self._agenerate_primary(prompt, parse))
+        secondary = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=self._hedge_deadline())
+            if done:
+                try:
+                    result = primary.result()
+                    _llm_producer.set(self.backend)
+                    return result
+                except CircuitOpenError:
+                    self._count_hedge("rerouted")
+                    result = await self._agenerate_backend(hedge, prompt, parse)
+                    _llm_producer.set(hedge.name)
+                    return result
+
+            self._count_hedge("fired")
+            secondary = asyncio.create_task(self._agenerate_backend(hedge, prompt, parse))
+            owners = {primary: self.backend, secondary: hedge.name}
+            pending, failures = set(owners), {}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is secondary:
+                            self._count_hedge("won")
+                        _llm_producer.set(owners[task])
+                        return task.result()
+                    failures[task] = task.exception()
+            raise failures.get(primary) or failures[secondary]
+        finally:
+            for task in (primary, secondary):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def _store_cache(self, cache_key: str, soal: str, kunci: str, llm_score: float, feedback: str,
+                     prompt_version: str = PROMPT_VERSION):
+        self.cache.set(
+            cache_key,
+            make_question_key(soal, kunci),
+            llm_score,
+            feedback,
+            model=self.llm_model,
+            prompt_version=prompt_version,
+        )
+
+    def _get_llm_score(self, soal: str, kunci: str, jawaban: str) -> tuple[float, str]:
+        """Menghubungi Gemini API untuk mendapatkan skor (0-100) dan feedback."""
+
+        _llm_producer.set(None)
+        cache_key = make_cache_key(soal, kunci, jawaban, self.llm_model, PROMPT_VERSION)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            _llm_producer.set(self.backend)
+            return cached
+        
+        if not self.client:
+            return 0.0, LLMFailure("⚠️ Layanan AI tidak aktif. API Key Gemini tidak ditemukan atau Client gagal diinisialisasi.")
+
+        prompt = self._build_prompt(soal, kunci, jawaban)
+        
+        try:
+            # --- PERUBAHAN 4: Ganti pemanggilan API Groq ke Gemini ---
+            llm_score, feedback = self._generate(prompt, self._parse_llm_response)
+            # Hasil backend hedge tidak di-cache: kunci cache milik model backend utama
+            if _llm_producer.get() == self.backend:
+                self._store_cache(cache_key, soal, kunci, llm_score, feedback)
+            return llm_score, feedback
             
+        except CircuitOpenError:
+            return 0.0, CIRCUIT_OPEN_FEEDBACK
         except APIError as e:
             logging.error(f"⚠️ Gemini API Error: {e}")
-            return 0.0, f"Gagal terhubung ke AI Logika (Gemini API Error). Detail: {str(e)[:70]}..."
+            return 0.0, LLMFailure(f"Gagal terhubung ke AI Logika (Gemini API Error). Detail: {str(e)[:70]}...")
         except json.JSONDecodeError as e:
-             logging.error(f"⚠️ JSON Parsing Error: {e}. Raw response: {response.text}")
-             return 0.0, f"Gagal parsing JSON dari respons AI. Detail: {str(e)[:70]}..."
+             logging.error(f"⚠️ JSON Parsing Error: {e}.")
+             return 0.0, LLMFailure(f"Gagal parsing JSON dari respons AI. Detail: {str(e)[:70]}...")
         except Exception as e:
             logging.error(f"⚠️ Unknown Error during Gemini call: {e}")
-            return 0.0, f"Error tidak terduga saat pemanggilan AI. Detail: {str(e)[:70]}..."
+            return 0.0, LLMFailure(f"Error tidak terduga saat pemanggilan AI. Detail: {str(e)[:70]}...")
 
-    def grade_essay(self, soal: str, kunci_jawaban: str, jawaban_mahasiswa: str, max_score_dosen: float = 100.0):
-        """Fungsi utama untuk penilaian 100% LLM."""
-        
-        # Validasi Jawaban
+    async def _aget_llm_score(self, soal: str, kunci: str, jawaban: str) -> tuple[float, str]:
+        """Versi async dari _get_llm_score memakai klien async Gemini (client.aio)."""
+
+        _llm_producer.set(None)
+        cache_key = make_cache_key(soal, kunci, jawaban, self.llm_model, PROMPT_VERSION)
+        cached = self.cache.get_memory(cache_key)
+        if cached is None:
+            # Tier DB memakai session sync -> jalankan di thread agar event loop tidak terblokir
+            cached = await asyncio.to_thread(self.cache.get, cache_key)
+        if cached is not None:
+            _llm_producer.set(self.backend)
+            return cached
+
+        if not self.client:
+            return 0.0, LLMFailure("⚠️ Layanan AI tidak aktif. API Key Gemini tidak ditemukan atau Client gagal diinisialisasi.")
+
+        prompt = self._build_prompt(soal, kunci, jawaban)
+
+        try:
+            llm_score, feedback = await self._agenerate(prompt, self._parse_llm_response)
+            if _llm_producer.get() == self.backend:
+                await asyncio.to_thread(self._store_cache, cache_key, soal, kunci, llm_score, feedback)
+            return llm_score, feedback
+
+        except CircuitOpenError:
+            return 0.0, CIRCUIT_OPEN_FEEDBACK
+        except APIError as e:
+            logging.error(f"⚠️ Gemini API Error: {e}")
+            return 0.0, LLMFailure(f"Gagal terhubung ke AI Logika (Gemini API Error). Detail: {str(e)[:70]}...")
+        except json.JSONDecodeError as e:
+             logging.error(f"⚠️ JSON Parsing Error: {e}.")
+             return 0.0, LLMFailure(f"Gagal parsing JSON dari respons AI. Detail: {str(e)[:70]}...")
+        except Exception as e:
+            logging.error(f"⚠️ Unknown Error during Gemini call: {e}")
+            return 0.0, LLMFailure(f"Error tidak terduga saat pemanggilan AI. Detail: {str(e)[:70]}...")
+
+    # ---------- MODE BATCH (N jawaban, 1 soal, 1 panggilan) ----------
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        return len(text or "") // 4 + 1
+
+    def _build_batch_prompt(self, soal: str, kunci: str, jawaban_list: list[str]) -> RubricPrompt:
+        answers = [{"id": i, "jawaban": jawaban} for i, jawaban in enumerate(jawaban_list)]
+        prefix = f"""
+        Anda adalah Dosen/Penguji Esai yang ketat. Nilai SETIAP jawaban esai berikut secara terpisah (skala 0-100). Fokus pada kualitas logika, struktur, kedalaman materi, dan relevansi terhadap kunci jawaban. Jangan membandingkan jawaban satu dengan yang lain.
+        SOAL: {soal}
+        KUNCI JAWABAN: {kunci}
+
+        Berikan output HANYA JSON. Pastikan JSON VALID dan berisi tepat satu hasil untuk setiap id.
+        JSON FORMAT: {{"hasil": [{{"id": <id>, "skor": <0-100>, "feedback": "<feedback konstruktif, maksimum 3 kalimat>"}}]}}
+"""
+        suffix = f"""        DAFTAR JAWABAN MAHASISWA (JSON): {json.dumps(answers, ensure_ascii=False)}
+        """
+        return RubricPrompt(prefix, suffix, make_question_key(soal, kunci), kind="batch")
+
+    def _parse_batch_response(self, content: str, expected: int) -> list[tuple[float, str]]:
+        """Parse & validasi respons batch. ValueError jika tidak lengkap / tidak valid."""
+        data = json.loads(content)
+        rows = data.get("hasil") if isinstance(data, dict) else data
+        if not isinstance(rows, list):
+            raise ValueError("Field 'hasil' bukan list.")
+
+        by_id = {}
+        for row in rows:
+            if not isinstance(row, dict) or "id" not in row or "skor" not in row:
+                raise ValueError("Item hasil tidak lengkap.")
+            by_id[int(row["id"])] = row
+
+        if set(by_id) != set(range(expected)):
+            raise ValueError(f"Jumlah/ID hasil tidak cocok (diharapkan {expected}, didapat {len(by_id)}).")
+
+        out = []
+        for i in range(expected):
+            score = max(0.0, min(100.0, float(by_id[i]["skor"])))
+            out.append((score, by_id[i].get("feedback") or "No feedback from LLM."))
+        return out
+
+    def _chunk_for_batch(self, soal: str, kunci: str, jawaban_list: list[str]) -> list[list[int]]:
+        """Bagi indeks jawaban menjadi batch menurut batch_size dan token budget."""
+        base_tokens = self._estimate_tokens(soal) + self._estimate_tokens(kunci) + 200
+        chunks, current, used = [], [], base_tokens
+        for i, jawaban in enumerate(jawaban_list):
+            cost = self._estimate_tokens(jawaban) + 60  # + perkiraan output per jawaban
+            if current and (len(current) >= self.batch_size or used + cost > self.batch_token_budget):
+                chunks.append(current)
+                current, used = [], base_tokens
+            current.append(i)
+            used += cost
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def _get_llm_scores_batch(self, soal: str, kunci: str, jawaban_list: list[str]) -> list[tuple[float, str]] | None:
+        """1 panggilan Gemini untuk beberapa jawaban. None jika gagal / respons tidak valid."""
+        _llm_producer.set(None)
+        if not self.client:
+            return None
+
+        try:
+            return self._generate(
+                self._build_batch_prompt(soal, kunci, jawaban_list),
+                lambda text: self._parse_batch_response(text, len(jawaban_list)),
+            )
+        except CircuitOpenError:
+            return None
+        except (APIError, ValueError, TypeError, KeyError) as e:
+            # json.JSONDecodeError adalah turunan ValueError
+            logging.warning(f"⚠️ Batch grading gagal validasi ({len(jawaban_list)} jawaban), fallback ke mode tunggal: {e}")
+            return None
+        except Exception as e:
+            logging.error(f"⚠️ Unknown Error during Gemini batch call: {e}")
+            return None
+
+    def _invalid_answer_result(self, jawaban_mahasiswa: str):
+        """Validasi jawaban; kembalikan hasil Error jika kosong/terlalu pendek, selain itu None."""
         if not jawaban_mahasiswa or len(jawaban_mahasiswa.strip()) < 5:
             return {
                 "final_score": 0.0,
@@ -108,16 +1017,50 @@ class LLMGrader:
                 "feedback": "Jawaban kosong atau terlalu pendek.",
                 "method": "Error"
             }
+        return None
 
-        # --- STEP 1: LOGICAL SCORE (LLM) ---
-        llm_score, llm_feedback = self._get_llm_score(soal, kunci_jawaban, jawaban_mahasiswa)
+    def unsaved_result_status(self, result: dict, jawaban_mahasiswa: str) -> int | None:
+        """
+        Status HTTP jika hasil tidak boleh disimpan sebagai Grading.skor_ai: 503 untuk skor
+        fallback saat breaker terbuka, 502 jika LLM gagal. None = skor sah (termasuk nilai 0
+        untuk jawaban kosong / terlalu pendek).
+        """
+        if result.get("fallback"):
+            return 503
+        if result.get("method") == "Error" and self._invalid_answer_result(jawaban_mahasiswa) is None:
+            return 502
+        return None
 
-        # Cek jika LLM gagal berfungsi
-        if "⚠️ Layanan AI tidak aktif" in llm_feedback or "Gagal terhubung ke AI Logika" in llm_feedback or llm_score == 0.0 and "Gagal" in llm_feedback:
+    def _circuit_open_result(self, jawaban_mahasiswa: str, max_score_dosen: float, keywords: list[str] | None = None):
+        """Hasil saat breaker terbuka: skor heuristik lokal (ditandai jelas) atau Error."""
+        if self.breaker_fallback != "heuristic":
+            return {
+                "final_score": 0.0,
+                "llm_score": 0.0,
+                "feedback": CIRCUIT_OPEN_FEEDBACK,
+                "method": "Error",
+                "fallback": True
+            }
+
+        heuristic_score, heuristic_feedback = calculate_essay_score(jawaban_mahasiswa, keywords)
+        return {
+            "final_score": round((heuristic_score / 100.0) * max_score_dosen, 2),
+            "llm_score": 0.0,
+            "heuristic_score": heuristic_score,
+            "feedback": f"[Penilaian sementara tanpa AI] {heuristic_feedback}",
+            "method": FALLBACK_METHOD,
+            "fallback": True
+        }
+
+    def _build_result(self, llm_score: float, llm_feedback: str, max_score_dosen: float, backend: str | None = None):
+        """Ubah skor LLM (0-100) menjadi hasil akhir yang diskalakan ke bobot dosen."""
+
+        # Cek jika LLM gagal berfungsi (penanda eksplisit, bukan isi teks feedback)
+        if isinstance(llm_feedback, LLMFailure):
              return {
                 "final_score": 0.0,
                 "llm_score": 0.0,
-                "feedback": llm_feedback,
+                "feedback": str(llm_feedback),
                 "method": "Error"
             }
 
@@ -127,13 +1070,414 @@ class LLMGrader:
         # Skala ulang ke Max Score Dosen
         final_score = (final_score_normalized / 100.0) * max_score_dosen
 
+        # Backend penghasil skor (utama atau hedge) menentukan label metode
+        backend = backend or self.backend
+        producer = self.backends.get(backend)
+
         return {
             "final_score": round(final_score, 2),
             "llm_score": round(llm_score, 2), # Skor 0-100 dari LLM
             "feedback": llm_feedback,
             # --- PERUBAHAN 5: Ganti nama method ---
-            "method": "LLM Only (Gemini 2.5 Flash)" 
+            "method": producer.method_label if producer else self.method_label,
+            "backend": backend
         }
 
+    def grade_similarity(self, soal: str, kunci_jawaban: str, jawaban_list: list[str], max_score_dosen: float = 100.0) -> list[dict]:
+        """
+        Penilai offline: kemiripan TF-IDF setiap jawaban terhadap kunci jawaban.
+        Seluruh jawaban untuk satu soal dinilai dalam satu operasi matriks (tanpa jaringan).
+        """
+        results: list[dict | None] = [None] * len(jawaban_list)
+        valid_idx = []
+        for i, jawaban in enumerate(jawaban_list):
+            invalid = self._invalid_answer_result(jawaban)
+            if invalid:
+                results[i] = invalid
+            else:
+                valid_idx.append(i)
+
+        if valid_idx and not (kunci_jawaban or "").strip():
+            for i in valid_idx:
+                results[i] = {
+                    "final_score": 0.0,
+                    "llm_score": 0.0,
+                    "feedback": "Kunci jawaban kosong, penilaian kemiripan tidak dapat dilakukan.",
+                    "method": "Error"
+                }
+            return results
+
+        if valid_idx:
+            sims = similarity_to_key(
+                kunci_jawaban,
+                [jawaban_list[i] for i in valid_idx],
+                vectorizer=self.similarity_vectorizer,
+            )
+            scores = similarity_to_score(sims, self.similarity_low, self.similarity_high)
+            for i, sim, score in zip(valid_idx, sims, scores):
+                results[i] = {
+                    "final_score": round(float(score) / 100.0 * max_score_dosen, 2),
+                    "llm_score": 0.0,
+                    "similarity": round(float(sim), 4),
+                    "feedback": similarity_feedback(sim),
+                    "method": SIMILARITY_METHOD,
+                    "backend": "similarity"
+                }
+
+        return results
+
+    def grade_tiered_local(self, kunci_jawaban: str, jawaban_list: list[str], max_score_dosen: float = 100.0,
+                           tier_policy: TierPolicy | None = None, keywords: list[str] | None = None,
+                           token_bags: list[dict | None] | None = None) -> tuple[list[dict | None], list[int]]:
+        """
+        Tahap lokal penilaian bertingkat. Return (hasil, indeks_eskalasi): hasil berisi dict untuk
+        jawaban yang diputuskan lokal dan None untuk jawaban yang harus dinilai LLM.
+        Setiap keputusan dicatat di llm_metrics (tier) sesuai metrics_scope aktif.
+        `keywords` = Question.kata_kunci (skor kualitas memakai keyword match), dicocokkan per stem
+        dengan `token_bags` (Submission.token_bag, sejajar dengan jawaban_list) bila tersedia.
+        """
+        policy = tier_policy or TierPolicy()
+        results: list[dict | None] = [None] * len(jawaban_list)
+        valid_idx = []
+        for i, jawaban in enumerate(jawaban_list):
+            invalid = self._invalid_answer_result(jawaban)
+            if invalid:
+                results[i] = {**invalid, "tier": "invalid"}
+            else:
+                valid_idx.append(i)
+
+        decisions = classify_answers(
+            kunci_jawaban, [jawaban_list[i] for i in valid_idx], policy,
+            vectorizer=self.similarity_vectorizer, score_low=self.similarity_low, score_high=self.similarity_high,
+            keywords=keywords, token_bags=[token_bags[i] for i in valid_idx] if token_bags else None,
+        )
+        escalate = []
+        counts = {"invalid": len(jawaban_list) - len(valid_idx)}
+        for i, decision in zip(valid_idx, decisions):
+            tier = decision["tier"]
+            counts[tier] = counts.get(tier, 0) + 1
+            if tier == "llm":
+                escalate.append(i)
+                continue
+            results[i] = {
+                "final_score": round(decision["score"] / 100.0 * max_score_dosen, 2),
+                "llm_score": 0.0,
+                "similarity": round(decision["similarity"], 4),
+                "heuristic_score": decision["quality"],
+                "feedback": decision["feedback"],
+                "method": TIERED_METHOD,
+                "backend": "local",
+                "tier": tier
+            }
+
+        for tier, count in counts.items():
+            llm_metrics.record_tier(tier, count)
+        return results, escalate
+
+    def grade_essay(self, soal: str, kunci_jawaban: str, jawaban_mahasiswa: str, max_score_dosen: float = 100.0,
+                    method: str | None = None, tier_policy: TierPolicy | None = None,
+                    keywords: list[str] | None = None):
+        """
+        Fungsi utama penilaian. Default 100% LLM; method="similarity" untuk penilai offline,
+        method="tiered" untuk sinyal lokal dulu lalu LLM hanya jika ambigu (ambang dari tier_policy).
+        `keywords` (Question.kata_kunci) dipakai oleh skor heuristik lokal (tiered / fallback breaker).
+        """
+
+        method = method or self.default_method
+        if method == "similarity":
+            return self.grade_similarity(soal, kunci_jawaban, [jawaban_mahasiswa], max_score_dosen)[0]
+        if method == "tiered":
+            local, escalate = self.grade_tiered_local(kunci_jawaban, [jawaban_mahasiswa], max_score_dosen, tier_policy, keywords)
+            if not escalate:
+                return local[0]
+            result = self.grade_essay(soal, kunci_jawaban, jawaban_mahasiswa, max_score_dosen, method="llm",
+                                      keywords=keywords)
+            return {**result, "tier": "llm"}
+        
+        # Validasi Jawaban
+        invalid = self._invalid_answer_result(jawaban_mahasiswa)
+        if invalid:
+            return invalid
+
+        # --- STEP 1: LOGICAL SCORE (LLM) ---
+        _llm_producer.set(None)
+        llm_score, llm_feedback = self._get_llm_score(soal, kunci_jawaban, jawaban_mahasiswa)
+        if llm_feedback == CIRCUIT_OPEN_FEEDBACK:
+            return self._circuit_open_result(jawaban_mahasiswa, max_score_dosen, keywords)
+
+        return self._build_result(llm_score, llm_feedback, max_score_dosen, backend=_llm_producer.get())
+
+    async def agrade_essay(self, soal: str, kunci_jawaban: str, jawaban_mahasiswa: str, max_score_dosen: float = 100.0,
+                           method: str | None = None, tier_policy: TierPolicy | None = None,
+                           keywords: list[str] | None = None):
+        """Versi async dari grade_essay (tidak memblokir event loop selama menunggu Gemini)."""
+
+        method = method or self.default_method
+        if method == "similarity":
+            return self.grade_similarity(soal, kunci_jawaban, [jawaban_mahasiswa], max_score_dosen)[0]
+        if method == "tiered":
+            local, escalate = self.grade_tiered_local(kunci_jawaban, [jawaban_mahasiswa], max_score_dosen, tier_policy, keywords)
+            if not escalate:
+                return local[0]
+            result = await self.agrade_essay(soal, kunci_jawaban, jawaban_mahasiswa, max_score_dosen, method="llm",
+                                             keywords=keywords)
+            return {**result, "tier": "llm"}
+
+        invalid = self._invalid_answer_result(jawaban_mahasiswa)
+        if invalid:
+            return invalid
+
+        _llm_producer.set(None)
+        llm_score, llm_feedback = await self._aget_llm_score(soal, kunci_jawaban, jawaban_mahasiswa)
+        if llm_feedback == CIRCUIT_OPEN_FEEDBACK:
+            return self._circuit_open_result(jawaban_mahasiswa, max_score_dosen, keywords)
+
+        return self._build_result(llm_score, llm_feedback, max_score_dosen, backend=_llm_producer.get())
+
+    # ---------- STREAMING (preview interaktif via SSE) ----------
+    async def _astream_generate(self, prompt: str, parse):
+        """
+        Seperti _agenerate tetapi memakai generate_content_stream.
+        Yield ("delta", teks) untuk setiap potongan lalu ("done", hasil parse) di akhir.
+        Retry 429/5xx hanya dilakukan sebelum potongan pertama diterima.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(CIRCUIT_OPEN_FEEDBACK)
+
+        tokens = self._estimate_tokens(prompt) + 256
+        attempt = 0
+        call_seconds = 0.0
+        try:
+            contents, config, cached_content = await self._aprompt_request(prompt)
+            while True:
+                await self.rate_limiter.aacquire(tokens)
+                start = time.monotonic()
+                try:
+                    stream = await self.client.aio.models.generate_content_stream(
+                        model=self.llm_model,
+                        contents=contents,
+                        config=config
+                    )
+                    # SDK mengirim request saat iterasi pertama, jadi error HTTP muncul di sini
+                    first = await anext(stream, None)
+                    break
+                except APIError as e:
+                    call_seconds += time.monotonic() - start
+                    llm_metrics.record(self.llm_model, _call_outcome(e), time.monotonic() - start)
+                    if self._stale_context(e, cached_content):
+                        contents, config, cached_content = str(prompt), self._generation_config(), None
+                        continue
+                    delay = self._retry_delay(e, attempt)
+                    if delay is None:
+                        raise
+                    logging.warning(f"⏳ Gemini {e.code}, retry {attempt + 1}/{self.max_retries} dalam {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                except Exception as e:
+                    llm_metrics.record(self.llm_model, _call_outcome(e), time.monotonic() - start)
+                    raise
+
+            parts, usage, chunk = [], None, first
+            try:
+                while chunk is not None:
+                    usage = getattr(chunk, "usage_metadata", None) or usage
+                    if chunk.text:
+                        parts.append(chunk.text)
+                        yield "delta", chunk.text
+                    chunk = await anext(stream, None)
+            except Exception as e:
+                llm_metrics.record(self.llm_model, _call_outcome(e), time.monotonic() - start)
+                raise
+            latency = time.monotonic() - start
+            call_seconds += latency
+        except Exception as e:
+            self.breaker.record(success=not _is_provider_failure(e), latency=call_seconds)
+            raise
+        except BaseException:
+            # Klien SSE memutus koneksi (GeneratorExit / CancelledError): bukan kegagalan provider
+            self.breaker.cancel()
+            raise
+
+        self.breaker.record(success=True, latency=call_seconds)
+        response = SimpleNamespace(text="".join(parts), usage_metadata=usage)
+        yield "done", self._observe_response(response, latency, parse)
+
+    async def agrade_essay_stream(self, soal: str, kunci_jawaban: str, jawaban_mahasiswa: str,
+                                  max_score_dosen: float = 100.0, method: str | None = None,
+                                  tier_policy: TierPolicy | None = None, keywords: list[str] | None = None):
+        """
+        Versi streaming agrade_essay. Yield event:
+          ("feedback", potongan feedback)  berulang selama model menulis
+          ("result", hasil akhir)          tepat sekali, format sama dengan grade_essay
+        Prompt, cache, sanitasi skor dan fallback breaker sama dengan jalur non-streaming.
+        """
+        method = method or self.default_method
+        if method == "similarity":
+            yield "result", self.grade_similarity(soal, kunci_jawaban, [jawaban_mahasiswa], max_score_dosen)[0]
+            return
+        if method == "tiered":
+            local, escalate = self.grade_tiered_local(kunci_jawaban, [jawaban_mahasiswa], max_score_dosen, tier_policy, keywords)
+            if not escalate:
+                yield "feedback", local[0]["feedback"]
+                yield "result", local[0]
+                return
+            async with aclosing(self.agrade_essay_stream(soal, kunci_jawaban, jawaban_mahasiswa,
+                                                         max_score_dosen, method="llm", keywords=keywords)) as events:
+                async for kind, value in events:
+                    yield kind, ({**value, "tier": "llm"} if kind == "result" else value)
+            return
+
+        invalid = self._invalid_answer_result(jawaban_mahasiswa)
+        if invalid:
+            yield "result", invalid
+            return
+
+        cache_key = make_cache_key(soal, kunci_jawaban, jawaban_mahasiswa, self.llm_model, PROMPT_VERSION)
+        cached = self.cache.get_memory(cache_key)
+        if cached is None:
+            cached = await asyncio.to_thread(self.cache.get, cache_key)
+        if cached is not None:
+            yield "feedback", cached[1]
+            yield "result", self._build_result(cached[0], cached[1], max_score_dosen)
+            return
+
+        if not self.client:
+            llm_score, llm_feedback = 0.0, LLMFailure("⚠️ Layanan AI tidak aktif. API Key Gemini tidak ditemukan atau Client gagal diinisialisasi.")
+            yield "result", self._build_result(llm_score, llm_feedback, max_score_dosen)
+            return
+
+        if not hasattr(self.client.aio.models, "generate_content_stream"):
+            # Backend tanpa API streaming (openai / heuristic): kirim hasil utuh sekaligus
+            result = await self.agrade_essay(soal, kunci_jawaban, jawaban_mahasiswa, max_score_dosen, method="llm",
+                                             keywords=keywords)
+            yield "feedback", result["feedback"]
+            yield "result", result
+            return
+
+        extractor = FeedbackStreamExtractor()
+        prompt = self._build_prompt(soal, kunci_jawaban, jawaban_mahasiswa)
+        try:
+            # aclosing: jika klien SSE putus, stream Gemini ikut ditutup saat itu juga
+            async with aclosing(self._astream_generate(prompt, self._parse_llm_response)) as events:
+                async for kind, value in events:
+                    if kind == "delta":
+                        delta = extractor.feed(value)
+                        if delta:
+                            yield "feedback", delta
+                    else:
+                        llm_score, llm_feedback = value
+            await asyncio.to_thread(self._store_cache, cache_key, soal, kunci_jawaban, llm_score, llm_feedback)
+
+        except CircuitOpenError:
+            yield "result", self._circuit_open_result(jawaban_mahasiswa, max_score_dosen, keywords)
+            return
+        except APIError as e:
+            logging.error(f"⚠️ Gemini API Error (stream): {e}")
+            llm_score, llm_feedback = 0.0, LLMFailure(f"Gagal terhubung ke AI Logika (Gemini API Error). Detail: {str(e)[:70]}...")
+        except json.JSONDecodeError as e:
+            logging.error(f"⚠️ JSON Parsing Error (stream): {e}.")
+            llm_score, llm_feedback = 0.0, LLMFailure(f"Gagal parsing JSON dari respons AI. Detail: {str(e)[:70]}...")
+        except Exception as e:
+            logging.error(f"⚠️ Unknown Error during Gemini stream: {e}")
+            llm_score, llm_feedback = 0.0, LLMFailure(f"Error tidak terduga saat pemanggilan AI. Detail: {str(e)[:70]}...")
+
+        yield "result", self._build_result(llm_score, llm_feedback, max_score_dosen)
+
+    async def agrade_many(self, items: list[dict], concurrency: int | None = None) -> list[dict]:
+        """
+        Nilai banyak jawaban sekaligus secara konkuren.
+
+        Setiap item berisi argumen untuk agrade_essay (soal, kunci_jawaban, jawaban_mahasiswa,
+        max_score_dosen). Jumlah panggilan yang berjalan bersamaan dibatasi oleh `concurrency`
+        (default AI_GRADER_CONCURRENCY). Urutan hasil sama dengan urutan input.
+        """
+        if not items:
+            return []
+
+        semaphore = asyncio.Semaphore(max(1, concurrency or self.max_concurrency))
+
+        async def _run(item: dict):
+            async with semaphore:
+                return await self.agrade_essay(**item)
+
+        return await asyncio.gather(*(_run(item) for item in items))
+
+    def grade_batch(self, soal: str, kunci_jawaban: str, jawaban_list: list[str], max_score_dosen: float = 100.0,
+                    method: str | None = None, tier_policy: TierPolicy | None = None,
+                    keywords: list[str] | None = None, token_bags: list[dict | None] | None = None) -> list[dict]:
+        """
+        Nilai banyak jawaban untuk SATU soal dengan prompt batch (soal + kunci hanya dikirim sekali).
+
+        Jawaban tidak valid langsung menjadi hasil Error, jawaban yang sudah ada di cache tidak
+        dikirim ulang. Jawaban identik/hampir identik (AI_DEDUP_THRESHOLD) dikelompokkan dan
+        hanya perwakilannya yang dinilai; hasilnya disalin ke semua anggota beserta `cluster_id`.
+        Jika respons batch gagal validasi, jawaban di batch tersebut dinilai satu per satu lewat
+        grade_essay. Urutan hasil sama dengan urutan input.
+        Dengan method="tiered" hanya jawaban yang ambigu (tier "llm") yang masuk ke jalur batch.
+        """
+        method = method or self.default_method
+        if method == "similarity":
+            return self.grade_similarity(soal, kunci_jawaban, jawaban_list, max_score_dosen)
+        if method == "tiered":
+            results, escalate = self.grade_tiered_local(kunci_jawaban, jawaban_list, max_score_dosen,
+                                                        tier_policy, keywords, token_bags)
+            if escalate:
+                graded = self.grade_batch(soal, kunci_jawaban, [jawaban_list[i] for i in escalate],
+                                          max_score_dosen, method="llm", keywords=keywords)
+                for i, result in zip(escalate, graded):
+                    results[i] = {**result, "tier": "llm"}
+            return results
+
+        results: list[dict | None] = [None] * len(jawaban_list)
+        pending: list[int] = []
+
+        for i, jawaban in enumerate(jawaban_list):
+            invalid = self._invalid_answer_result(jawaban)
+            if invalid:
+                results[i] = invalid
+                continue
+            cached = self.cache.get(make_cache_key(soal, kunci_jawaban, jawaban, self.llm_model, BATCH_PROMPT_VERSION))
+            if cached is not None:
+                results[i] = self._build_result(cached[0], cached[1], max_score_dosen)
+                continue
+            pending.append(i)
+
+        # perwakilan -> semua anggota klaster (indeks jawaban_list)
+        clusters: dict[int, list[int]] = {}
+        if self.dedup_enabled and len(pending) > 1:
+            labels = cluster_answers([jawaban_list[i] for i in pending], self.dedup_threshold)
+            for pos, label in enumerate(labels):
+                clusters.setdefault(pending[label], []).append(pending[pos])
+            pending = list(clusters)
+
+        pending_answers = [jawaban_list[i] for i in pending]
+        for chunk in self._chunk_for_batch(soal, kunci_jawaban, pending_answers):
+            indices = [pending[j] for j in chunk]
+            answers = [jawaban_list[i] for i in indices]
+
+            _llm_producer.set(None)
+            scores = self._get_llm_scores_batch(soal, kunci_jawaban, answers) if len(answers) > 1 else None
+            if scores is None:
+                for i in indices:
+                    results[i] = self.grade_essay(soal, kunci_jawaban, jawaban_list[i], max_score_dosen, method="llm",
+                                                  keywords=keywords)
+                continue
+
+            producer = _llm_producer.get() or self.backend
+            for i, (llm_score, feedback) in zip(indices, scores):
+                if producer == self.backend:
+                    cache_key = make_cache_key(soal, kunci_jawaban, jawaban_list[i], self.llm_model, BATCH_PROMPT_VERSION)
+                    self._store_cache(cache_key, soal, kunci_jawaban, llm_score, feedback, prompt_version=BATCH_PROMPT_VERSION)
+                results[i] = self._build_result(llm_score, feedback, max_score_dosen, backend=producer)
+
+        for rep, members in clusters.items():
+            if len(members) < 2:
+                continue
+            cluster_id = cluster_id_for(jawaban_list[rep])
+            for i in members:
+                results[i] = {**results[rep], "cluster_id": cluster_id, "cluster_size": len(members)}
+
+        return results
+
 # Inisiasi global var.
 grader = LLMGrader()
\ No newline at end of file
@@ -0,0 +1,359 @@
+# app/utils/archive_ingest.py
+
+"""
+Impor massal jawaban dari arsip zip.
+
+Dosen yang mengumpulkan esai secara offline mengunggah satu zip berisi file PDF/TXT plus
+mapping nama file -> (nim_nip, id_question). Alurnya:
+  1. create_ingest_job (sinkron, dipanggil di thread): buka central directory zip, cocokkan
+     member dengan mapping, resolve nim_nip -> id_user dan validasi soal milik assignment,
+     lalu buat baris IngestJob. Entri yang tidak valid langsung dicatat sebagai gagal.
+  2. run_ingest_job (background task): member diproses per batch (INGEST_BATCH_SIZE file /
+     INGEST_BATCH_BYTES byte). Isi member dibaca berurutan dari zip, teks diekstrak paralel
+     (PDF lewat pdf_extractor / process pool, TXT di thread), lalu satu batch disimpan dalam
+     satu transaksi: Submission baru / diperbarui (sama seperti submit mahasiswa, termasuk
+     token_bag, indeks kemiripan dan antrean pre-grading AI) sekaligus counter progres job.
+Memory dibatasi satu batch; ukuran per member (setelah dekompresi) dibatasi UPLOAD_MAX_BYTES.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import posixpath
+import zipfile
+import zlib
+
+from sqlalchemy import func, tuple_
+
+from app.database import SessionLocal
+from app.models.assignments import Assignment
+from app.models.ingest_job import IngestJob
+from app.models.questions import Question
+from app.models.submissions import Submission
+from app.models.user import User
+from app.utils import file_extract
+from app.utils.file_extract import ExtractionError, ExtractionTimeout, decode_text, pdf_extractor
+from app.utils.grading_worker import EAGER_GRADING_ENABLED, enqueue_debounced, grading_workers
+from app.utils.plagiarism import index_submissions
+from app.utils.stemmer import token_bag
+
+INGEST_MAX_ARCHIVE_BYTES = int(os.getenv("INGEST_MAX_ARCHIVE_BYTES", str(200 * 1024 * 1024)))
+INGEST_BATCH_SIZE = max(1, int(os.getenv("INGEST_BATCH_SIZE", "50")))
+# Batas total ukuran (setelah dekompresi) isi member yang dibaca ke memory dalam satu batch
+INGEST_BATCH_BYTES = int(os.getenv("INGEST_BATCH_BYTES", str(64 * 1024 * 1024)))
+INGEST_MAX_FILES = int(os.getenv("INGEST_MAX_FILES", "2000"))
+INGEST_MAX_ERRORS = 100
+SUPPORTED_EXTENSIONS = (".pdf", ".txt")
+
+
+class IngestError(Exception):
+    """Arsip / mapping tidak valid (ditolak sebelum job dibuat)."""
+
+
+def parse_mapping(raw: str) -> dict[str, tuple[str, int]]:
+    """
+    Mapping JSON nama file -> target. Nilai boleh {"nim_nip": "...", "id_question": 1}
+    atau ["nim_nip", id_question].
+    """
+    try:
+        data = json.loads(raw)
+    except ValueError as e:
+        raise IngestError(f"Mapping bukan JSON yang valid: {e}") from None
+    if not isinstance(data, dict) or not data:
+        raise IngestError("Mapping harus objek JSON {nama_file: {nim_nip, id_question}}.")
+    if len(data) > INGEST_MAX_FILES:
+        raise IngestError(f"Maksimal {INGEST_MAX_FILES} file per arsip.")
+
+    mapping = {}
+    for name, target in data.items():
+        if isinstance(target, dict):
+            nim_nip, id_question = target.get("nim_nip"), target.get("id_question")
+        elif isinstance(target, (list, tuple)) and len(target) == 2:
+            nim_nip, id_question = target
+        else:
+            nim_nip = id_question = None
+        try:
+            id_question = int(id_question)
+        except (TypeError, ValueError):
+            id_question = None
+        if not nim_nip or id_question is None:
+            raise IngestError(f"Target untuk '{name}' harus berisi nim_nip dan id_question.")
+        mapping[str(name)] = (str(nim_nip), id_question)
+    return mapping
+
+
+def match_members(infos: list[zipfile.ZipInfo], mapping: dict[str, tuple[str, int]]):
+    """
+    Cocokkan member zip dengan kunci mapping: path lengkap dulu, lalu nama file tanpa folder
+    (jika unik di arsip). Return ([(ZipInfo, nim_nip, id_question)], [(nama, error)]).
+    """
+    files = [info for info in infos
+             if not info.is_dir() and not info.filename.startswith("__MACOSX/")
+             and not posixpath.basename(info.filename).startswith(".")]
+    by_path = {info.filename: info for info in files}
+    by_base: dict[str, list[zipfile.ZipInfo]] = {}
+    for info in files:
+        by_base.setdefault(posixpath.basename(info.filename), []).append(info)
+
+    matched, errors = [], []
+    for name, (nim_nip, id_question) in mapping.items():
+        info = by_path.get(name)
+        if info is None:
+            candidates = by_base.get(posixpath.basename(name), [])
+            if len(candidates) > 1:
+                errors.append((name, "Nama file ambigu di arsip, gunakan path lengkap."))
+                continue
+            info = candidates[0] if candidates else None
+        if info is None:
+            errors.append((name, "File tidak ditemukan di arsip."))
+        elif not info.filename.lower().endswith(SUPPORTED_EXTENSIONS):
+            errors.append((name, "Hanya file .pdf dan .txt yang didukung."))
+        elif info.file_size > file_extract.UPLOAD_MAX_BYTES:
+            errors.append((name, f"Ukuran file melebihi batas {file_extract.UPLOAD_MAX_BYTES} byte."))
+        else:
+            matched.append((info, nim_nip, id_question))
+    return matched, errors
+
+
+def _error_rows(errors: list[tuple[str, str]]) -> list[dict]:
+    return [{"file": name, "error": error} for name, error in errors]
+
+
+def create_ingest_job(archive, id_assignment: int, created_by: int | None, filename: str | None,
+                      mapping: dict[str, tuple[str, int]]) -> tuple[IngestJob, list[tuple[zipfile.ZipInfo, int, int]]]:
+    """
+    Validasi arsip + mapping dan buat IngestJob. Return (job, rencana [(ZipInfo, id_mahasiswa, id_question)]).
+    LookupError jika assignment tidak ada, IngestError jika arsip tidak valid.
+    """
+    try:
+        with zipfile.ZipFile(archive) as zf:
+            infos = zf.infolist()
+    except (zipfile.BadZipFile, zipfile.LargeZipFile) as e:
+        raise IngestError(f"Arsip zip tidak valid: {e}") from None
+    archive.seek(0)
+
+    matched, errors = match_members(infos, mapping)
+
+    db = SessionLocal()
+    try:
+        assignment = db.query(Assignment).filter(Assignment.id_assignment == id_assignment).first()
+        if not assignment:
+            raise LookupError("Assignment tidak ditemukan.")
+
+        nims = {nim_nip for _, nim_nip, _ in matched}
+        students = dict(
+            db.query(User.nim_nip, User.id_user)
+            .filter(User.nim_nip.in_(nims), User.role == "mahasiswa")
+            .all()
+        ) if nims else {}
+        questions = {
+            qid for (qid,) in db.query(Question.id_question).filter(Question.id_assignment == id_assignment).all()
+        }
+
+        plan = []
+        for info, nim_nip, id_question in matched:
+            if nim_nip not in students:
+                errors.append((info.filename, f"Mahasiswa dengan nim_nip {nim_nip} tidak ditemukan."))
+            elif id_question not in questions:
+                errors.append((info.filename, f"Soal {id_question} bukan bagian dari assignment ini."))
+            else:
+                plan.append((info, students[nim_nip], id_question))
+
+        job = IngestJob(
+            id_assignment=id_assignment,
+            created_by=created_by,
+            filename=(filename or "")[:255] or None,
+            status="queued" if plan else "completed_with_errors",
+            total_files=len(mapping),
+            processed_files=len(errors),
+            failed_count=len(errors),
+            errors=_error_rows(errors[:INGEST_MAX_ERRORS]) or None,
+        )
+        if not plan:
+            job.finished_at = func.localtimestamp()
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        db.expunge(job)
+        return job, plan
+    finally:
+        db.close()
+
+
+# ==========================================
+# PROSES BACKGROUND
+# ==========================================
+async def _member_text(name: str, data: bytes) -> str:
+    if name.lower().endswith(".pdf"):
+        extraction = await pdf_extractor.extract(data)
+        return extraction["text"]
+    return await asyncio.to_thread(decode_text, data)
+
+
+def _batches(plan: list[tuple[zipfile.ZipInfo, int, int]]):
+    """Potong rencana per INGEST_BATCH_SIZE file atau INGEST_BATCH_BYTES byte (mana yang lebih dulu)."""
+    batch, size = [], 0
+    for entry in plan:
+        if batch and (len(batch) >= INGEST_BATCH_SIZE or size + entry[0].file_size > INGEST_BATCH_BYTES):
+            yield batch
+            batch, size = [], 0
+        batch.append(entry)
+        size += entry[0].file_size
+    if batch:
+        yield batch
+
+
+# CRC salah / data terpotong (BadZipFile, zlib.error, EOFError), kompresi atau enkripsi yang tidak
+# didukung (NotImplementedError, RuntimeError), dan error I/O saat membaca arsip
+MEMBER_READ_ERRORS = (zipfile.BadZipFile, zlib.error, EOFError, NotImplementedError, RuntimeError, OSError)
+
+
+def _read_members(zf: zipfile.ZipFile, infos: list[zipfile.ZipInfo]) -> list[bytes | Exception]:
+    """Baca isi setiap file; file yang rusak menghasilkan exception-nya sendiri, bukan menggagalkan batch."""
+    contents = []
+    for info in infos:
+        try:
+            contents.append(zf.read(info))
+        except MEMBER_READ_ERRORS as e:
+            contents.append(e)
+    return contents
+
+
+def _store_batch(id_job: int, id_assignment: int, rows: list[tuple[int, int, str]], errors: list[tuple[str, str]]):
+    """Simpan satu batch (id_mahasiswa, id_question, jawaban) + progres job dalam satu transaksi."""
+    db = SessionLocal()
+    try:
+        job = db.query(IngestJob).filter(IngestJob.id_job == id_job).with_for_update().first()
+        created = updated = 0
+        eager_queued = False
+        # Duplikat target dalam batch: file terakhir yang dipakai
+        answers = {(id_mahasiswa, id_question): jawaban for id_mahasiswa, id_question, jawaban in rows}
+        saved = []
+        if answers:
+            existing = {
+                (sub.id_mahasiswa, sub.id_question): sub
+                for sub in db.query(Submission).filter(
+                    tuple_(Submission.id_mahasiswa, Submission.id_question).in_(list(answers))
+                ).all()
+            }
+            for (id_mahasiswa, id_question), jawaban in answers.items():
+                sub = existing.get((id_mahasiswa, id_question))
+                if sub:
+                    sub.jawaban = jawaban
+                    sub.token_bag = token_bag(jawaban)
+                    updated += 1
+                else:
+                    sub = Submission(
+                        id_assignment=id_assignment,
+                        id_mahasiswa=id_mahasiswa,
+                        id_question=id_question,
+                        jawaban=jawaban,
+                        token_bag=token_bag(jawaban),
+                    )
+                    db.add(sub)
+                    created += 1
+                saved.append(sub)
+            db.flush()
+
+            # Indeks kemiripan; gagal index tidak boleh membatalkan impor
+            try:
+                with db.begin_nested():
+                    index_submissions(db, saved)
+            except Exception as e:
+                logging.warning(f"⚠️ [INGEST] Gagal update indeks kemiripan jawaban: {e}")
+
+            # Pre-grading AI: item antrean ikut commit bersama jawaban (jawaban yang diperbarui
+            # dinilai ulang sehingga skor_ai lama tertimpa)
+            if EAGER_GRADING_ENABLED:
+                try:
+                    with db.begin_nested():
+                        enqueue_debounced(db, id_assignment, [sub.id_submission for sub in saved],
+                                          created_by=job.created_by if job else None)
+                    eager_queued = True
+                except Exception as e:
+                    logging.warning(f"⚠️ [INGEST] Gagal mengantrekan pre-grading AI: {e}")
+
+        job.processed_files += len(rows) + len(errors)
+        job.created_count += created
+        job.updated_count += updated
+        job.failed_count += len(errors)
+        if errors and len(job.errors or []) < INGEST_MAX_ERRORS:
+            job.errors = ((job.errors or []) + _error_rows(errors))[:INGEST_MAX_ERRORS]
+        db.commit()
+        if eager_queued:
+            grading_workers.start()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _set_status(id_job: int, status: str, started: bool = False, finished: bool = False,
+                errors: list[tuple[str, str]] | None = None):
+    db = SessionLocal()
+    try:
+        job = db.query(IngestJob).filter(IngestJob.id_job == id_job).first()
+        if not job:
+            return
+        if status == "done":
+            status = "completed_with_errors" if job.failed_count else "completed"
+        job.status = status
+        if started:
+            job.started_at = func.localtimestamp()
+        if finished:
+            job.finished_at = func.localtimestamp()
+        if errors:
+            job.processed_files += len(errors)
+            job.failed_count += len(errors)
+            job.errors = ((job.errors or []) + _error_rows(errors))[:INGEST_MAX_ERRORS]
+        db.commit()
+    finally:
+        db.close()
+
+
+async def run_ingest_job(id_job: int, archive, id_assignment: int, plan: list[tuple[zipfile.ZipInfo, int, int]]):
+    """Proses rencana impor per batch; `archive` (file-like, seekable) ditutup di akhir."""
+    try:
+        await asyncio.to_thread(_set_status, id_job, "running", started=True)
+        with zipfile.ZipFile(archive) as zf:
+            for batch in _batches(plan):
+                contents = await asyncio.to_thread(_read_members, zf, [info for info, _, _ in batch])
+                texts = iter(await asyncio.gather(
+                    *(_member_text(info.filename, data) for (info, _, _), data in zip(batch, contents)
+                      if not isinstance(data, Exception)),
+                    return_exceptions=True,
+                ))
+
+                rows, errors = [], []
+                for (info, id_mahasiswa, id_question), data in zip(batch, contents):
+                    if isinstance(data, Exception):
+                        errors.append((info.filename, f"File rusak di arsip: {data}"))
+                        continue
+                    text = next(texts)
+                    if isinstance(text, (ExtractionError, ExtractionTimeout)):
+                        errors.append((info.filename, str(text)))
+                    elif isinstance(text, BaseException):
+                        errors.append((info.filename, f"Gagal membaca file: {text}"))
+                    elif not text.strip():
+                        errors.append((info.filename, "Tidak ada teks yang bisa diekstrak."))
+                    else:
+                        rows.append((id_mahasiswa, id_question, text))
+
+                try:
+                    await asyncio.to_thread(_store_batch, id_job, id_assignment, rows, errors)
+                except Exception as e:
+                    logging.error(f"❌ [INGEST] Job {id_job}: batch gagal disimpan: {e}")
+                    await asyncio.to_thread(
+                        _set_status, id_job, "running",
+                        errors=[(info.filename, f"Gagal menyimpan: {e}") for info, _, _ in batch],
+                    )
+
+        await asyncio.to_thread(_set_status, id_job, "done", finished=True)
+        logging.info(f"📦 [INGEST] Job {id_job} selesai ({len(plan)} file).")
+    except Exception as e:
+        logging.error(f"❌ [INGEST] Job {id_job} gagal: {e}")
+        await asyncio.to_thread(_set_status, id_job, "failed", finished=True)
+    finally:
+        archive.close()
@@ -0,0 +1,210 @@
+# app/utils/context_cache.py
+
+"""
+Context caching rubrik per soal.
+
+Untuk satu Question, setiap prompt penilaian diawali bagian yang sama persis (instruksi +
+soal + kunci jawaban + format output); hanya jawaban mahasiswa yang berubah. Prompt dipecah
+menjadi prefix stabil dan suffix jawaban (RubricPrompt).
+
+- Jika klien mendukung explicit context caching (genai: client.caches) dan prefix cukup
+  panjang (minimum token dari provider), prefix diunggah sekali sebagai cached content lalu
+  setiap panggilan hanya mengirim suffix + nama cache. Token prefix ditagih dengan tarif cache.
+- Jika tidak (backend openai/fake/kaset, prefix terlalu pendek, pembuatan cache gagal),
+  handle lokal (stand-in) dipakai: prefix identik byte-per-byte dikirim di depan setiap prompt
+  sehingga implicit prefix caching provider tetap bisa bekerja.
+
+Handle dilacak per (soal, kunci, jenis prompt, model) dengan TTL dan dihapus saat soal diedit
+(update_assignment), termasuk cached content di sisi provider agar tidak terus ditagih storage.
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+
+from google import genai
+
+from app.utils.grading_cache import make_question_key
+
+
+class RubricPrompt(str):
+    """
+    Prompt penilaian lengkap (prefix + suffix) sebagai str biasa, dengan metadata pemecahannya.
+    Jalur yang tidak memakai context caching (hedge, kaset, streaming) cukup memakai teks utuhnya.
+    """
+
+    def __new__(cls, prefix: str, suffix: str, question_key: str, kind: str = "single"):
+        prompt = super().__new__(cls, prefix + suffix)
+        prompt.prefix = prefix
+        prompt.suffix = suffix
+        prompt.question_key = question_key
+        prompt.kind = kind
+        return prompt
+
+
+class ContextHandle:
+    __slots__ = ("name", "question_key", "kind", "model", "prefix_tokens", "created_at", "expires_at", "hits")
+
+    def __init__(self, name: str | None, question_key: str, kind: str, model: str, prefix_tokens: int, ttl: float):
+        self.name = name  # nama cached content di provider; None = stand-in lokal
+        self.question_key = question_key
+        self.kind = kind
+        self.model = model
+        self.prefix_tokens = prefix_tokens
+        self.created_at = time.time()
+        self.expires_at = self.created_at + ttl
+        self.hits = 0
+
+
+class RubricContextCache:
+    """Registry handle context cache per soal (thread-safe)."""
+
+    def __init__(self, enabled: bool | None = None, ttl_seconds: float | None = None, min_tokens: int | None = None,
+                 refresh_margin_seconds: float = 30.0):
+        self.enabled = enabled if enabled is not None \
+            else os.getenv("AI_CONTEXT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None \
+            else float(os.getenv("AI_CONTEXT_CACHE_TTL_SECONDS", "3600"))
+        # Gemini menolak cached content di bawah batas minimum token (2.5 Flash: 1024)
+        self.min_tokens = min_tokens if min_tokens is not None \
+            else int(os.getenv("AI_CONTEXT_CACHE_MIN_TOKENS", "1024"))
+        # Handle yang hampir kedaluwarsa dibuat ulang agar tidak habis di tengah panggilan
+        self.refresh_margin = min(refresh_margin_seconds, self.ttl_seconds / 2)
+
+        self._handles: dict[tuple, ContextHandle] = {}
+        self._lock = threading.Lock()
+        self._key_locks: dict[tuple, threading.Lock] = {}
+        self.counters = {"created": 0, "hits": 0, "stand_in": 0, "create_failed": 0, "invalidated": 0, "expired": 0}
+
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        return len(text or "") // 4 + 1
+
+    def supports(self, client) -> bool:
+        return self.enabled and client is not None and hasattr(client, "caches")
+
+    def _fresh(self, key: tuple) -> ContextHandle | None:
+        """Handle yang masih berlaku (hit dihitung), atau None. Harus dipanggil dengan _lock."""
+        handle = self._handles.get(key)
+        if handle is None:
+            return None
+        if handle.expires_at - time.time() <= self.refresh_margin:
+            del self._handles[key]
+            self.counters["expired"] += 1
+            return None
+        handle.hits += 1
+        self.counters["hits"] += 1
+        return handle
+
+    def peek(self, model: str, prompt: RubricPrompt) -> tuple[bool, str | None]:
+        """Jalur cepat tanpa I/O: (handle ditemukan?, nama cached content)."""
+        with self._lock:
+            handle = self._fresh((prompt.question_key, prompt.kind, model))
+        return (handle is not None, handle.name if handle else None)
+
+    def resolve(self, client, model: str, prompt: RubricPrompt) -> str | None:
+        """
+        Nama cached content untuk prefix prompt ini (dibuat jika belum ada), atau None jika
+        memakai stand-in lokal (kirim prompt utuh).
+        """
+        key = (prompt.question_key, prompt.kind, model)
+        with self._lock:
+            handle = self._fresh(key)
+            if handle is not None:
+                return handle.name
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Satu pembuat per soal: panggilan paralel pada bulk run menunggu handle yang sama
+        with key_lock:
+            with self._lock:
+                handle = self._fresh(key)
+                if handle is not None:
+                    return handle.name
+
+            prefix_tokens = self._estimate_tokens(prompt.prefix)
+            name = None
+            if self.supports(client) and prefix_tokens >= self.min_tokens:
+                try:
+                    cached = client.caches.create(
+                        model=model,
+                        config=genai.types.CreateCachedContentConfig(
+                            contents=[prompt.prefix],
+                            ttl=f"{int(self.ttl_seconds)}s",
+                            display_name=f"eags-{prompt.kind}-{prompt.question_key[:16]}",
+                        ),
+                    )
+                    name = cached.name
+                    logging.info(f"🗂️ [CONTEXT CACHE] Cached content dibuat: {name} (~{prefix_tokens} token)")
+                except Exception as e:
+                    logging.warning(f"⚠️ [CONTEXT CACHE] Gagal membuat cached content, pakai prompt utuh: {e}")
+                    with self._lock:
+                        self.counters["create_failed"] += 1
+
+            handle = ContextHandle(name, prompt.question_key, prompt.kind, model, prefix_tokens, self.ttl_seconds)
+            with self._lock:
+                self._handles[key] = handle
+                self.counters["created" if name else "stand_in"] += 1
+            return name
+
+    async def aresolve(self, client, model: str, prompt: RubricPrompt) -> str | None:
+        found, name = self.peek(model, prompt)
+        if found:
+            return name
+        return await asyncio.to_thread(self.resolve, client, model, prompt)
+
+    def drop(self, name: str):
+        """Lupakan handle provider yang ditolak (kedaluwarsa / dihapus di sisi provider)."""
+        with self._lock:
+            for key, handle in list(self._handles.items()):
+                if handle.name == name:
+                    del self._handles[key]
+                    self.counters["expired"] += 1
+
+    def invalidate_question(self, soal: str, kunci: str, client=None) -> int:
+        """Hapus semua handle milik soal (soal, kunci_jawaban) LAMA, termasuk cached content di provider."""
+        question_key = make_question_key(soal, kunci)
+        with self._lock:
+            stale = [key for key, handle in self._handles.items() if handle.question_key == question_key]
+            handles = [self._handles.pop(key) for key in stale]
+            self.counters["invalidated"] += len(handles)
+
+        for handle in handles:
+            if handle.name and self.supports(client):
+                try:
+                    client.caches.delete(name=handle.name)
+                except Exception as e:
+                    logging.warning(f"⚠️ [CONTEXT CACHE] Gagal menghapus {handle.name}: {e}")
+        return len(handles)
+
+    def clear(self):
+        with self._lock:
+            self._handles.clear()
+
+    def stats(self) -> dict:
+        now = time.time()
+        with self._lock:
+            handles = list(self._handles.values())
+            counters = dict(self.counters)
+        return {
+            "enabled": self.enabled,
+            "ttl_seconds": self.ttl_seconds,
+            "min_tokens": self.min_tokens,
+            "handles": len(handles),
+            "provider_handles": sum(1 for h in handles if h.name),
+            "cached_prefix_tokens": sum(h.prefix_tokens for h in handles if h.name),
+            "questions": [
+                {
+                    "question_key": h.question_key[:16],
+                    "kind": h.kind,
+                    "model": h.model,
+                    "cached_content": h.name,
+                    "prefix_tokens": h.prefix_tokens,
+                    "hits": h.hits,
+                    "expires_in_seconds": round(h.expires_at - now, 1),
+                }
+                for h in sorted(handles, key=lambda h: -h.hits)[:50]
+            ],
+            **counters,
+        }
@@ -0,0 +1,67 @@
+# app/utils/dedup.py
+
+"""
+Pengelompokan jawaban identik / hampir identik sebelum dinilai LLM.
+
+1. Normalisasi teks (case, spasi, tanda baca).
+2. Duplikat persis dikelompokkan lewat hash teks ternormalisasi.
+3. Hampir-duplikat dikelompokkan lewat MinHash + LSH di atas ambang kemiripan (Jaccard).
+
+Hanya satu perwakilan per klaster yang dinilai; hasilnya disalin ke semua anggota.
+"""
+
+import hashlib
+
+from app.utils.minhash import MinHasher, MinHashLSH, normalize_text, shingles
+
+_hasher = MinHasher(num_perm=64)
+
+
+def cluster_id_for(text: str) -> str:
+    """ID klaster stabil dari teks ternormalisasi perwakilan."""
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()[:16]
+
+
+def cluster_answers(texts: list[str], threshold: float = 0.9) -> list[int]:
+    """
+    Return label per teks = indeks perwakilan klasternya (anggota pertama klaster).
+    Teks yang tidak punya pasangan mendapat label = indeksnya sendiri.
+    """
+    n = len(texts)
+    parent = list(range(n))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i: int, j: int):
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            # Perwakilan = indeks terkecil agar hasil deterministik
+            parent[max(ri, rj)] = min(ri, rj)
+
+    # Tahap 1: duplikat persis (setelah normalisasi)
+    normalized = [normalize_text(t) for t in texts]
+    first_by_text: dict[str, int] = {}
+    unique_idx = []
+    for i, norm in enumerate(normalized):
+        if norm in first_by_text:
+            union(first_by_text[norm], i)
+        else:
+            first_by_text[norm] = i
+            unique_idx.append(i)
+
+    # Tahap 2: hampir-duplikat di antara teks unik (MinHash LSH)
+    if threshold < 1.0 and len(unique_idx) > 1:
+        lsh = MinHashLSH(num_perm=_hasher.num_perm, threshold=threshold)
+        for i in unique_idx:
+            if not normalized[i]:
+                continue
+            sig = _hasher.signature(shingles(normalized[i], normalized=True))
+            for j, _ in lsh.query(sig):
+                union(j, i)
+            lsh.insert(i, sig)
+
+    return [find(i) for i in range(n)]
@@ -0,0 +1,97 @@
+import json
+import asyncio
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.utils.llm_backends import FakeLLM
+
+# Server tiruan yang meniru REST API Gemini (generateContent) untuk load test end-to-end
+# lewat klien genai asli. Jalankan:
+#   uvicorn app.utils.fake_llm_server:app --port 8089
+# lalu set di .env aplikasi utama:
+#   GEMINI_API_KEY=apa-saja  AI_GRADER_BASE_URL=http://127.0.0.1:8089
+# Perilaku (latency, error rate, seed) diatur lewat env FAKE_LLM_* yang sama dengan backend "fake".
+# Endpoint /v1/chat/completions meniru API kompatibel OpenAI untuk backend "openai":
+#   OPENAI_BASE_URL=http://127.0.0.1:8089/v1
+
+llm = FakeLLM.from_env()
+app = FastAPI(title="Fake Gemini (EAGS load test)")
+
+
+def _prompt_from_body(body: dict) -> str:
+    parts = []
+    for content in body.get("contents") or []:
+        for part in content.get("parts") or []:
+            parts.append(part.get("text") or "")
+    return "\n".join(parts)
+
+
+@app.post("/{api_version}/models/{model_action}")
+async def generate_content(api_version: str, model_action: str, request: Request):
+    model, _, action = model_action.partition(":")
+    if action not in ("generateContent", "streamGenerateContent"):
+        raise HTTPException(status_code=404, detail=f"Aksi '{action}' tidak didukung server tiruan.")
+
+    prompt = _prompt_from_body(await request.json())
+    latency, error_code, text = llm.plan(prompt)
+
+    if error_code is not None:
+        await asyncio.sleep(latency)
+        return JSONResponse(
+            status_code=error_code,
+            content={"error": {"code": error_code, "message": "Fake LLM injected error", "status": "UNAVAILABLE"}},
+        )
+
+    if action == "streamGenerateContent":
+        # Klien genai meminta ?alt=sse: setiap potongan dikirim sebagai "data: {json}"
+        async def _events():
+            for gap, chunk in llm.stream_plan(prompt, text, latency):
+                await asyncio.sleep(gap)
+                yield f"data: {json.dumps(_payload(model, chunk), ensure_ascii=False)}\r\n\r\n"
+
+        return StreamingResponse(_events(), media_type="text/event-stream")
+
+    await asyncio.sleep(latency)
+    return _payload(model, llm.build_response(prompt, text))
+
+
+def _payload(model: str, response) -> dict:
+    usage = response.usage_metadata
+    return {
+        "candidates": [{"content": {"role": "model", "parts": [{"text": response.text}]}, "finishReason": "STOP", "index": 0}],
+        "usageMetadata": {
+            "promptTokenCount": usage.prompt_token_count,
+            "candidatesTokenCount": usage.candidates_token_count,
+            "totalTokenCount": usage.total_token_count,
+        },
+        "modelVersion": model,
+    }
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    prompt = "\n".join(str(m.get("content") or "") for m in body.get("messages") or [])
+    latency, error_code, text = llm.plan(prompt)
+    await asyncio.sleep(latency)
+
+    if error_code is not None:
+        return JSONResponse(
+            status_code=error_code,
+            content={"error": {"message": "Fake LLM injected error", "type": "server_error", "code": error_code}},
+        )
+
+    usage = llm.build_response(prompt, text).usage_metadata
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion",
+        "created": 0,
+        "model": body.get("model"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": {
+            "prompt_tokens": usage.prompt_token_count,
+            "completion_tokens": usage.candidates_token_count,
+            "total_tokens": usage.total_token_count,
+        },
+    }
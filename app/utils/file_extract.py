@@ -0,0 +1,423 @@
+# app/utils/file_extract.py
+
+"""
+Pipeline upload file esai tanpa memblokir event loop.
+
+Sebelumnya /upload/file membaca seluruh file ke memory (`await file.read()`) lalu menjalankan
+PdfReader + extract_text langsung di event loop: satu PDF besar menahan semua request lain
+di worker yang sama. Di sini:
+  - spool_upload menyalin upload per chunk ke SpooledTemporaryFile (di memory sampai
+    UPLOAD_SPOOL_BYTES, setelah itu di disk) dan berhenti begitu melewati UPLOAD_MAX_BYTES;
+  - ekstraksi teks PDF (CPU-bound, memegang GIL) dijalankan di process pool dengan batas
+    waktu per file (PDF_EXTRACT_TIMEOUT_SECONDS). Batas waktu ditegakkan di proses anak lewat
+    SIGALRM dan cek deadline antar halaman sehingga worker tetap bisa dipakai; di sisi induk
+    ada batas cadangan yang mendaur ulang pool jika proses anak macet di luar kendali Python;
+  - halaman PDF besar dibagi ke beberapa worker, teks digabung sekali jalan, dan waktu
+    ekstraksi per halaman ikut dikembalikan (halaman lambat dicatat di log);
+  - hasil ekstraksi di-cache di disk dengan key SHA-256 isi file (ExtractionCache), sehingga
+    unggah ulang file yang sama tidak mengekstrak ulang;
+  - file teks didecode per chunk dengan encoding yang dideteksi dari potongan awal (BOM /
+    UTF-8 / charset-normalizer), sambil menghitung kata & karakter, tanpa pernah gagal
+    karena encoding.
+Modul ini sengaja tidak mengimpor app.database / model: proses anak (spawn) hanya
+mengimpor modul ini dan PyPDF2.
+"""
+
+import asyncio
+import codecs
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import UploadFile
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(20 * 1024 * 1024)))
+UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_BYTES", str(1024 * 1024)))
+UPLOAD_CHUNK_BYTES = 256 * 1024
+# Potongan awal file teks untuk deteksi encoding; encoding fallback untuk teks non-UTF-8
+TEXT_SAMPLE_BYTES = int(os.getenv("TEXT_SAMPLE_BYTES", str(64 * 1024)))
+TEXT_LEGACY_ENCODING = os.getenv("TEXT_LEGACY_ENCODING", "cp1252")
+PDF_EXTRACT_TIMEOUT_SECONDS = float(os.getenv("PDF_EXTRACT_TIMEOUT_SECONDS", "30"))
+# Tambahan waktu tunggu di sisi induk (start proses spawn, kirim data) sebelum pool didaur ulang
+PDF_EXTRACT_GRACE_SECONDS = 5.0
+
+
+class UploadTooLarge(Exception):
+    """Ukuran upload melebihi UPLOAD_MAX_BYTES."""
+
+
+class ExtractionTimeout(Exception):
+    """Ekstraksi teks melebihi PDF_EXTRACT_TIMEOUT_SECONDS."""
+
+
+class ExtractionError(Exception):
+    """File tidak bisa dibaca sebagai PDF."""
+
+
+async def spool_upload(file: UploadFile, max_bytes: int | None = None) -> tuple[tempfile.SpooledTemporaryFile, str]:
+    """
+    Salin upload per chunk ke spooled temp file (posisi di awal) sambil menghitung SHA-256 isinya.
+    Return (spool, sha256 hex). UploadTooLarge jika melebihi max_bytes.
+    """
+    max_bytes = UPLOAD_MAX_BYTES if max_bytes is None else max_bytes
+    spool = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(f"Ukuran file melebihi batas {max_bytes} byte.")
+            digest.update(chunk)
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool, digest.hexdigest()
+
+
+# ==========================================
+# EKSTRAKSI PDF (dijalankan di proses anak)
+# ==========================================
+def _raise_timeout(signum, frame):
+    raise ExtractionTimeout("Ekstraksi PDF melebihi batas waktu.")
+
+
+def extract_pdf_pages(data: bytes, shard: int = 0, shards: int = 1,
+                      timeout: float | None = None) -> list[tuple[int, str, float]]:
+    """
+    Ekstrak halaman shard, shard + shards, ... (dibagi berselang agar beban rata antar worker).
+    Return [(nomor halaman 0-based, teks, detik)]. Dengan timeout, ExtractionTimeout setelah batas waktu.
+    """
+    from PyPDF2 import PdfReader
+    from PyPDF2.errors import PyPdfError
+
+    deadline = time.monotonic() + timeout if timeout else None
+    use_alarm = bool(timeout) and hasattr(signal, "setitimer") \
+        and threading.current_thread() is threading.main_thread()
+    if use_alarm:
+        previous = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        reader = PdfReader(io.BytesIO(data))
+        pages = []
+        for number in range(shard, len(reader.pages), shards):
+            start = time.perf_counter()
+            page_text = reader.pages[number].extract_text() or ""
+            pages.append((number, page_text, time.perf_counter() - start))
+            # PyPDF2 menelan sebagian exception di dalam extract_text (termasuk dari SIGALRM),
+            # jadi batas waktu juga dicek di antara halaman
+            if deadline is not None and time.monotonic() > deadline:
+                raise ExtractionTimeout("Ekstraksi PDF melebihi batas waktu.")
+        return pages
+    except (PyPdfError, ValueError, KeyError, TypeError) as e:
+        # SIGALRM yang ditelan PyPDF2 bisa meninggalkan objek setengah terbaca -> error turunan
+        if deadline is not None and time.monotonic() > deadline:
+            raise ExtractionTimeout("Ekstraksi PDF melebihi batas waktu.") from None
+        raise ExtractionError(f"PDF tidak dapat dibaca: {e}") from None
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+
+def join_pages(pages: list[str]) -> str:
+    """Gabung teks halaman (halaman kosong dilewati) sekali jalan, tanpa `text +=` berulang."""
+    return "".join(text + "\n" for text in pages if text)
+
+
+def extract_pdf_text(data: bytes, timeout: float | None = None) -> str:
+    """Teks semua halaman PDF (dipisah newline), diekstrak serial di proses pemanggil."""
+    return join_pages([text for _, text, _ in extract_pdf_pages(data, timeout=timeout)])
+
+
+# ==========================================
+# CACHE HASIL EKSTRAKSI (disk, key SHA-256 isi file)
+# ==========================================
+class ExtractionCache:
+    """
+    Hasil ekstraksi per file disimpan sebagai JSON di `<dir>/<2 hex awal>/<sha256>.json`.
+    File yang sama (byte identik) cukup dibaca dari disk saat diunggah ulang. Penulisan atomik
+    (tmp + os.replace) sehingga proses lain tidak pernah membaca file setengah jadi.
+    Direktori kosong = cache nonaktif.
+
+    Ukuran dibatasi: entri lebih tua dari `ttl_seconds` (mtime, disentuh ulang saat hit) dianggap
+    miss, dan begitu total ukuran melewati `max_bytes` entri terlama dihapus sampai tersisa
+    ~80% batas. Total dihitung dari scan direktori saat put pertama lalu ditambah per put.
+    """
+
+    PRUNE_TARGET = 0.8
+
+    def __init__(self, directory: str | None = None, max_bytes: int | None = None,
+                 ttl_seconds: float | None = None):
+        self.directory = directory if directory is not None else os.getenv("PDF_TEXT_CACHE_DIR", "cache/pdf_text")
+        self.max_bytes = max_bytes if max_bytes is not None \
+            else int(os.getenv("PDF_TEXT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None \
+            else float(os.getenv("PDF_TEXT_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+        self._size: int | None = None  # perkiraan total byte di direktori (None = belum di-scan)
+        self._lock = threading.Lock()
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], f"{digest}.json")
+
+    def _expired(self, mtime: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - mtime > self.ttl_seconds
+
+    def get(self, digest: str) -> dict | None:
+        if not self.directory:
+            return None
+        path = self._path(digest)
+        try:
+            if self._expired(os.path.getmtime(path), time.time()):
+                os.remove(path)
+                return None
+            with open(path, encoding="utf-8") as f:
+                result = json.load(f)
+            os.utime(path)  # mtime = terakhir dipakai, jadi pruning menghapus yang paling lama tidak dipakai
+            return result
+        except (OSError, ValueError):
+            return None
+
+    def put(self, digest: str, result: dict):
+        if not self.directory:
+            return
+        path = self._path(digest)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False)
+            written = os.path.getsize(tmp)
+            os.replace(tmp, path)
+        except OSError as e:
+            logging.warning(f"⚠️ [UPLOAD] Gagal menyimpan cache ekstraksi PDF: {e}")
+            return
+
+        with self._lock:
+            if self._size is None or self._size + written > self.max_bytes > 0:
+                self.prune()
+            else:
+                self._size += written
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        entries = []
+        for sub in os.scandir(self.directory):
+            if not sub.is_dir():
+                continue
+            for entry in os.scandir(sub.path):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def prune(self) -> int:
+        """Hapus entri kedaluwarsa lalu entri terlama sampai di bawah batas ukuran; return jumlah file dihapus."""
+        if not self.directory:
+            return 0
+        try:
+            entries = sorted(self._entries())
+        except OSError:
+            return 0
+
+        now = time.time()
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * self.PRUNE_TARGET
+        removed = 0
+        for mtime, size, path in entries:
+            if not self._expired(mtime, now) and (self.max_bytes <= 0 or total <= target):
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        self._size = total
+        if removed:
+            logging.info(f"🧹 [UPLOAD] Cache ekstraksi PDF: {removed} file dihapus, sisa {total} byte.")
+        return removed
+
+
+class PdfExtractionPool:
+    """
+    Process pool (spawn) untuk ekstraksi PDF, dibuat saat pertama dipakai. PDF dibagi menjadi
+    beberapa shard halaman (maks `workers`, minimal PDF_SHARD_MIN_BYTES per shard) yang
+    diekstrak paralel, lalu hasilnya disimpan di ExtractionCache.
+    """
+
+    def __init__(self, workers: int | None = None, timeout: float | None = None,
+                 cache: ExtractionCache | None = None, shard_min_bytes: int | None = None):
+        self.workers = workers if workers is not None else \
+            max(1, int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1)))))
+        self.timeout = timeout if timeout is not None else PDF_EXTRACT_TIMEOUT_SECONDS
+        self.cache = cache if cache is not None else ExtractionCache()
+        # File kecil tidak dibagi: biaya parse ulang PdfReader + kirim data per shard lebih mahal
+        self.shard_min_bytes = shard_min_bytes if shard_min_bytes is not None \
+            else int(os.getenv("PDF_SHARD_MIN_BYTES", str(256 * 1024)))
+        self.slow_page_seconds = float(os.getenv("PDF_SLOW_PAGE_SECONDS", "1"))
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: fork dari proses yang punya thread (grading worker, koneksi DB) tidak aman
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _recycle(self, executor: ProcessPoolExecutor):
+        """Hentikan pool yang prosesnya macet; pemanggilan berikutnya membuat pool baru."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def shard_count(self, size: int) -> int:
+        return max(1, min(self.workers, size // max(1, self.shard_min_bytes)))
+
+    async def _extract_pages(self, data: bytes) -> list[tuple[int, str, float]]:
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+        shards = self.shard_count(len(data))
+        futures = [loop.run_in_executor(executor, extract_pdf_pages, data, shard, shards, self.timeout)
+                   for shard in range(shards)]
+        try:
+            results = await asyncio.wait_for(asyncio.gather(*futures), self.timeout + PDF_EXTRACT_GRACE_SECONDS)
+        except asyncio.TimeoutError:
+            logging.error("⏱️ [UPLOAD] Proses ekstraksi PDF tidak merespons, pool didaur ulang.")
+            self._recycle(executor)
+            raise ExtractionTimeout("Ekstraksi PDF melebihi batas waktu.") from None
+        except BrokenProcessPool:
+            self._recycle(executor)
+            raise ExtractionError("Proses ekstraksi PDF berhenti tidak normal.") from None
+        return sorted((page for shard in results for page in shard), key=lambda page: page[0])
+
+    async def extract(self, data: bytes, digest: str | None = None) -> dict:
+        """
+        {"text", "pages", "page_seconds", "extract_seconds", "cached"}. `digest` = SHA-256 hex
+        isi file (dari spool_upload); tanpa digest dihitung di sini.
+        """
+        if digest is None:
+            digest = await asyncio.to_thread(lambda: hashlib.sha256(data).hexdigest())
+        cached = await asyncio.to_thread(self.cache.get, digest)
+        if cached is not None:
+            return {**cached, "cached": True}
+
+        start = time.perf_counter()
+        pages = await self._extract_pages(data)
+        page_seconds = [round(seconds, 4) for _, _, seconds in pages]
+        result = {
+            "text": join_pages([text for _, text, _ in pages]),
+            "pages": len(pages),
+            "page_seconds": page_seconds,
+            "extract_seconds": round(time.perf_counter() - start, 4),
+        }
+
+        slow = [(number + 1, seconds) for number, seconds in enumerate(page_seconds) if seconds >= self.slow_page_seconds]
+        if slow:
+            worst = ", ".join(f"hal. {n} ({s:.2f}s)" for n, s in sorted(slow, key=lambda p: -p[1])[:5])
+            logging.warning(f"🐢 [UPLOAD] PDF {digest[:12]}: {len(slow)} halaman lambat diekstrak: {worst}")
+
+        await asyncio.to_thread(self.cache.put, digest, result)
+        return {**result, "cached": False}
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+pdf_extractor = PdfExtractionPool()
+
+
+def count_words(text: str) -> int:
+    return len(text.split())
+
+
+# ==========================================
+# TEKS (TXT): deteksi encoding + decode per chunk
+# ==========================================
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"), (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+def detect_encoding(sample: bytes) -> str:
+    """
+    Encoding dari potongan awal file: BOM, lalu UTF-8 (potongan boleh terpotong di tengah
+    karakter multi-byte), lalu tebakan charset-normalizer. Tebakan single-byte keluarga Latin
+    (cp1250/cp1257/mac_roman/... sering tertukar pada sampel pendek) diganti
+    TEXT_LEGACY_ENCODING (default cp1252, encoding esai dari Windows) jika sampel valid di sana.
+    """
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+
+    from charset_normalizer import from_bytes
+    from charset_normalizer.utils import is_multi_byte_encoding
+
+    best = from_bytes(sample).best()
+    if best is not None and is_multi_byte_encoding(best.encoding):
+        return best.encoding
+    try:
+        sample.decode(TEXT_LEGACY_ENCODING)
+        return TEXT_LEGACY_ENCODING
+    except UnicodeDecodeError:
+        return best.encoding if best is not None else TEXT_LEGACY_ENCODING
+
+
+def decode_text(data: bytes) -> str:
+    """Decode seluruh isi file teks; byte yang tidak valid diganti U+FFFD (tidak pernah gagal)."""
+    return data.decode(detect_encoding(data[:TEXT_SAMPLE_BYTES]), errors="replace")
+
+
+def text_stats(fileobj, chunk_size: int = UPLOAD_CHUNK_BYTES) -> dict:
+    """
+    Hitung kata & karakter file teks per chunk (memory konstan). Encoding dideteksi dari
+    TEXT_SAMPLE_BYTES pertama; kata yang terpotong di batas chunk dihitung sekali.
+    """
+    sample = fileobj.read(TEXT_SAMPLE_BYTES)
+    encoding = detect_encoding(sample)
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+
+    words = chars = 0
+    in_word = False
+    chunk = sample
+    while True:
+        final = not chunk
+        text = decoder.decode(chunk, final=final)
+        if text:
+            chars += len(text)
+            words += len(text.split())
+            if in_word and not text[0].isspace():
+                words -= 1
+            in_word = not text[-1].isspace()
+        if final:
+            break
+        chunk = fileobj.read(chunk_size)
+    return {"encoding": encoding, "word_count": words, "char_count": chars}
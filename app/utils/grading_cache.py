@@ -0,0 +1,186 @@
+# app/utils/grading_cache.py
+
+"""
+Cache hasil penilaian LLM berbasis isi (content-addressed).
+
+Kunci cache = SHA-256 dari (soal, kunci_jawaban, jawaban, model, versi prompt), sehingga
+jawaban yang sama persis (mis. "preview" lalu "save", atau resubmit tanpa perubahan)
+tidak perlu memanggil Gemini lagi.
+
+Dua tingkat:
+  - Memory: LRU terbatas (cachetools) di dalam proses.
+  - DB: tabel `ai_grading_cache` agar hasil tetap ada setelah restart / antar worker.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from decimal import Decimal
+
+from cachetools import LRUCache
+
+from app.models.ai_grading_cache import AIGradingCache
+
+
+def make_question_key(soal: str, kunci: str) -> str:
+    payload = json.dumps([soal or "", kunci or ""], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def make_cache_key(soal: str, kunci: str, jawaban: str, model: str, prompt_version: str) -> str:
+    payload = json.dumps([soal or "", kunci or "", jawaban or "", model, prompt_version], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class GradingResultCache:
+    """LRU memory tier + tabel DB persisten untuk hasil (skor, feedback) LLM."""
+
+    def __init__(self, maxsize: int | None = None, persist: bool | None = None):
+        if maxsize is None:
+            maxsize = int(os.getenv("AI_CACHE_MAXSIZE", "2048"))
+        if persist is None:
+            persist = os.getenv("AI_CACHE_PERSIST", "true").lower() in ("1", "true", "yes")
+
+        # value: (question_key, llm_score, feedback)
+        self._memory = LRUCache(maxsize=max(1, maxsize))
+        self._lock = threading.Lock()
+        self.persist = persist
+
+        self.counters = {
+            "memory_hits": 0,
+            "db_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "invalidated": 0,
+        }
+
+    def _session(self):
+        # Import lokal agar modul ini tetap bisa di-load tanpa koneksi DB aktif
+        from app.database import SessionLocal
+        return SessionLocal()
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] += n
+
+    # ---------- READ ----------
+    def get_memory(self, cache_key: str) -> tuple[float, str] | None:
+        with self._lock:
+            entry = self._memory.get(cache_key)
+        if entry is None:
+            return None
+        self._count("memory_hits")
+        return entry[1], entry[2]
+
+    def get(self, cache_key: str) -> tuple[float, str] | None:
+        """Cari di memory dulu, lalu di DB. Hit dari DB dinaikkan ke memory."""
+        hit = self.get_memory(cache_key)
+        if hit is not None:
+            return hit
+
+        if self.persist:
+            db = self._session()
+            try:
+                row = db.query(AIGradingCache).filter(AIGradingCache.cache_key == cache_key).first()
+                if row:
+                    score, feedback = float(row.llm_score), row.feedback or ""
+                    with self._lock:
+                        self._memory[cache_key] = (row.question_key, score, feedback)
+                    self._count("db_hits")
+                    return score, feedback
+            except Exception as e:
+                logging.warning(f"⚠️ [AI CACHE] Gagal membaca cache DB: {e}")
+            finally:
+                db.close()
+
+        self._count("misses")
+        return None
+
+    # ---------- WRITE ----------
+    def set(self, cache_key: str, question_key: str, llm_score: float, feedback: str,
+            model: str, prompt_version: str):
+        with self._lock:
+            self._memory[cache_key] = (question_key, llm_score, feedback)
+        self._count("stores")
+
+        if not self.persist:
+            return
+
+        db = self._session()
+        try:
+            row = db.query(AIGradingCache).filter(AIGradingCache.cache_key == cache_key).first()
+            if row:
+                row.llm_score = Decimal(str(llm_score))
+                row.feedback = feedback
+            else:
+                db.add(AIGradingCache(
+                    cache_key=cache_key,
+                    question_key=question_key,
+                    llm_model=model,
+                    prompt_version=prompt_version,
+                    llm_score=Decimal(str(llm_score)),
+                    feedback=feedback,
+                ))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logging.warning(f"⚠️ [AI CACHE] Gagal menyimpan cache DB: {e}")
+        finally:
+            db.close()
+
+    # ---------- INVALIDATION ----------
+    def invalidate_question(self, soal: str, kunci: str, db=None) -> int:
+        """
+        Hapus semua entri milik soal (soal, kunci_jawaban) LAMA.
+        Jika `db` diberikan, penghapusan ikut transaksi pemanggil (tidak di-commit di sini).
+        """
+        question_key = make_question_key(soal, kunci)
+
+        with self._lock:
+            stale = [k for k, v in self._memory.items() if v[0] == question_key]
+            for k in stale:
+                del self._memory[k]
+        removed = len(stale)
+
+        if self.persist:
+            own_session = db is None
+            session = self._session() if own_session else db
+            try:
+                deleted = (
+                    session.query(AIGradingCache)
+                    .filter(AIGradingCache.question_key == question_key)
+                    .delete(synchronize_session=False)
+                )
+                if own_session:
+                    session.commit()
+                removed = max(removed, deleted)
+            except Exception as e:
+                if own_session:
+                    session.rollback()
+                logging.warning(f"⚠️ [AI CACHE] Gagal invalidasi cache DB: {e}")
+            finally:
+                if own_session:
+                    session.close()
+
+        self._count("invalidated", removed)
+        return removed
+
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+            size = len(self._memory)
+        lookups = counters["memory_hits"] + counters["db_hits"] + counters["misses"]
+        hits = counters["memory_hits"] + counters["db_hits"]
+        return {
+            **counters,
+            "memory_size": size,
+            "memory_maxsize": self._memory.maxsize,
+            "persist": self.persist,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
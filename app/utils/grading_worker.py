@@ -0,0 +1,368 @@
+# app/utils/grading_worker.py
+
+"""
+Worker pool in-process untuk job AI grading satu assignment penuh.
+
+Alur:
+  1. Endpoint enqueue membuat 1 baris `grading_jobs` + N baris `grading_job_items` (status pending).
+  2. Thread worker mengklaim item dengan `SELECT ... FOR UPDATE SKIP LOCKED` sehingga beberapa
+     thread/proses uvicorn bisa bekerja bersamaan tanpa mengambil item yang sama. Item dari soal
+     yang sama diklaim sekaligus (hingga AI_JOB_CLAIM_SIZE) lalu dinilai lewat grade_batch
+     (dedup jawaban identik + prompt batch per AI_BATCH_SIZE).
+  3. Hasil ditulis ke `Grading.skor_ai` / `feedback_ai`; job ditutup saat semua item selesai.
+
+Item yang statusnya `running` tapi sudah melewati AI_JOB_LEASE_SECONDS (mis. proses mati di
+tengah jalan) dianggap terlantar dan boleh diklaim ulang. Item yang gagal (AI error / fallback
+breaker) kembali pending dengan `available_at` digeser backoff eksponensial, minimal selama sisa
+waktu breaker open, agar gangguan singkat tidak menghabiskan AI_JOB_MAX_ATTEMPTS sekaligus.
+
+Pre-grading eager: submit_answers mengantrekan item lewat enqueue_debounced di transaksi yang
+sama dengan jawaban. Item baru diklaim setelah `available_at` (AI_EAGER_DEBOUNCE_SECONDS);
+submit ulang sebelum itu hanya menggeser `available_at` item pending yang sama, sehingga
+jawaban yang dinilai adalah versi terakhir dan hanya sekali.
+"""
+
+import logging
+import os
+import threading
+from datetime import timedelta
+from decimal import Decimal
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app.models.assignments import Assignment
+from app.models.grading import Grading
+from app.models.grading_job import GradingJob, GradingJobItem
+from app.models.questions import Question
+from app.models.submissions import Submission
+from app.utils.llm_metrics import metrics_scope
+from app.utils.stemmer import token_bag
+from app.utils.tiering import TierPolicy
+
+
+ACTIVE_ITEM_STATUSES = ("pending", "running")
+
+EAGER_GRADING_ENABLED = os.getenv("AI_EAGER_GRADING", "true").lower() in ("1", "true", "yes")
+EAGER_DEBOUNCE_SECONDS = float(os.getenv("AI_EAGER_DEBOUNCE_SECONDS", "15"))
+
+
+def enqueue_submissions(db: Session, id_assignment: int, submission_ids: list[int],
+                        created_by: int | None = None, source: str = "manual", available_at=None) -> GradingJob:
+    """Buat job baru berisi item untuk setiap submission (belum di-commit)."""
+    job = GradingJob(
+        id_assignment=id_assignment,
+        created_by=created_by,
+        status="queued",
+        source=source,
+        total_items=len(submission_ids),
+    )
+    db.add(job)
+    db.flush()
+
+    db.add_all([
+        GradingJobItem(id_job=job.id_job, id_submission=sid, status="pending", available_at=available_at)
+        for sid in submission_ids
+    ])
+    return job
+
+
+def enqueue_debounced(db: Session, id_assignment: int, submission_ids: list[int], created_by: int | None = None,
+                      delay_seconds: float = EAGER_DEBOUNCE_SECONDS) -> GradingJob | None:
+    """
+    Antrekan penilaian AI eager dengan debounce (belum di-commit).
+    Submission yang sudah punya item pending cukup digeser available_at-nya; sisanya masuk job
+    baru (source="eager"). Return job baru, atau None jika semua tergabung ke item yang ada.
+    """
+    if not submission_ids:
+        return None
+    available_at = func.localtimestamp() + timedelta(seconds=delay_seconds)
+
+    # FOR UPDATE: item yang sedang diklaim worker ditunggu, lalu terlewati karena sudah running
+    # (menilai jawaban lama) -> submission tersebut mendapat item baru
+    pending = (
+        db.query(GradingJobItem)
+        .filter(GradingJobItem.id_submission.in_(submission_ids), GradingJobItem.status == "pending")
+        .with_for_update()
+        .all()
+    )
+    for item in pending:
+        item.available_at = available_at
+
+    covered = {item.id_submission for item in pending}
+    fresh = [sid for sid in dict.fromkeys(submission_ids) if sid not in covered]
+    if not fresh:
+        return None
+    return enqueue_submissions(db, id_assignment, fresh, created_by=created_by, source="eager",
+                               available_at=available_at)
+
+
+class GradingWorkerPool:
+    """Kumpulan thread daemon yang memproses grading_job_items."""
+
+    def __init__(self, workers: int | None = None, poll_interval: float | None = None,
+                 lease_seconds: int | None = None, max_attempts: int | None = None):
+        self.workers = workers if workers is not None else int(os.getenv("AI_JOB_WORKERS", "2"))
+        self.poll_interval = poll_interval if poll_interval is not None else float(os.getenv("AI_JOB_POLL_SECONDS", "2"))
+        self.lease_seconds = lease_seconds if lease_seconds is not None else int(os.getenv("AI_JOB_LEASE_SECONDS", "300"))
+        self.max_attempts = max_attempts if max_attempts is not None else int(os.getenv("AI_JOB_MAX_ATTEMPTS", "3"))
+        self.retry_base_seconds = float(os.getenv("AI_JOB_RETRY_BASE_SECONDS", "5"))
+        self.retry_max_seconds = float(os.getenv("AI_JOB_RETRY_MAX_SECONDS", "300"))
+        # Jumlah item 1 soal yang diklaim sekaligus; grade_batch yang memecahnya per AI_BATCH_SIZE
+        # (klaim yang lebih besar membuat dedup jawaban identik lebih efektif)
+        self.claim_size = max(1, int(os.getenv("AI_JOB_CLAIM_SIZE", "32")))
+
+        self._threads: list[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+
+    def _session(self):
+        from app.database import SessionLocal
+        return SessionLocal()
+
+    # ---------- LIFECYCLE ----------
+    def start(self):
+        with self._lock:
+            if self._threads or self.workers <= 0:
+                return
+            self._stop.clear()
+            for i in range(self.workers):
+                t = threading.Thread(target=self._run, name=f"grading-worker-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+        logging.info(f"🧵 [AI JOB] {self.workers} grading worker berjalan.")
+
+    def stop(self, timeout: float = 5.0):
+        with self._lock:
+            threads, self._threads = self._threads, []
+        self._stop.set()
+        self._wakeup.set()
+        for t in threads:
+            t.join(timeout=timeout)
+
+    def notify(self):
+        """Bangunkan worker yang sedang idle (dipanggil setelah enqueue)."""
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                worked = self.process_next()
+            except Exception as e:
+                logging.error(f"⚠️ [AI JOB] Worker error: {e}")
+                worked = False
+
+            if not worked:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    # ---------- CLAIM + PROCESS ----------
+    def _claim(self, db: Session, batch_size: int = 1) -> list[GradingJobItem]:
+        """
+        Klaim 1 item, lalu (jika batch_size > 1) item pending lain dari job yang sama untuk
+        soal yang sama, agar bisa dinilai dengan 1 prompt batch.
+        """
+        lease_cutoff = func.localtimestamp() - timedelta(seconds=self.lease_seconds)
+        available = or_(GradingJobItem.available_at.is_(None), GradingJobItem.available_at <= func.localtimestamp())
+        first = (
+            db.query(GradingJobItem)
+            .filter(or_(
+                (GradingJobItem.status == "pending") & available,
+                (GradingJobItem.status == "running") & (GradingJobItem.started_at < lease_cutoff),
+            ))
+            .order_by(GradingJobItem.id_item)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if not first:
+            db.rollback()
+            return []
+
+        items = [first]
+        if batch_size > 1:
+            id_question = (
+                db.query(Submission.id_question)
+                .filter(Submission.id_submission == first.id_submission)
+                .scalar()
+            )
+            items += (
+                db.query(GradingJobItem)
+                .join(Submission, Submission.id_submission == GradingJobItem.id_submission)
+                .filter(
+                    GradingJobItem.id_job == first.id_job,
+                    GradingJobItem.status == "pending",
+                    available,
+                    GradingJobItem.id_item != first.id_item,
+                    Submission.id_question == id_question,
+                )
+                .order_by(GradingJobItem.id_item)
+                .limit(batch_size - 1)
+                .with_for_update(of=GradingJobItem, skip_locked=True)
+                .all()
+            )
+
+        for item in items:
+            item.status = "running"
+            item.attempts = (item.attempts or 0) + 1
+            item.started_at = func.localtimestamp()
+
+        job = db.query(GradingJob).filter(GradingJob.id_job == first.id_job).first()
+        if job and job.status == "queued":
+            job.status = "running"
+            job.started_at = func.localtimestamp()
+
+        db.commit()
+        return items
+
+    def process_next(self) -> bool:
+        """Klaim dan proses satu batch item. Return False jika antrean kosong."""
+        # Import lokal: grader singleton ikut meng-import modul ini secara tidak langsung
+        from app.utils.ai_grader import grader
+
+        # Breaker terbuka: jangan klaim item dulu, tunggu sampai half-open
+        if grader.breaker.state == grader.breaker.OPEN:
+            return False
+
+        db = self._session()
+        try:
+            items = self._claim(db, batch_size=self.claim_size)
+            if not items:
+                return False
+            self._process(db, items)
+            return True
+        finally:
+            db.close()
+
+    def _process(self, db: Session, items: list[GradingJobItem]):
+        from app.utils.ai_grader import grader
+
+        item_ids = [item.id_item for item in items]
+        id_job = items[0].id_job
+        try:
+            subs = {
+                sub.id_submission: sub
+                for sub in db.query(Submission).filter(
+                    Submission.id_submission.in_([item.id_submission for item in items])
+                ).all()
+            }
+            valid = [item for item in items if item.id_submission in subs]
+            for item in items:
+                if item.id_submission not in subs:
+                    self._mark_item(item, error="Submission tidak ditemukan.")
+
+            q = None
+            if valid:
+                q = db.query(Question).filter(Question.id_question == subs[valid[0].id_submission].id_question).first()
+            if valid and not q:
+                for item in valid:
+                    self._mark_item(item, error="Question tidak ditemukan.")
+                valid = []
+
+            if valid:
+                answers = [subs[item.id_submission].jawaban or "" for item in valid]
+                # Jawaban lama (sebelum ada token_bag) dinormalisasi sekali lalu ikut tersimpan
+                for item in valid:
+                    sub = subs[item.id_submission]
+                    if sub.token_bag is None:
+                        sub.token_bag = token_bag(sub.jawaban or "")
+                assignment = db.query(Assignment).filter(Assignment.id_assignment == q.id_assignment).first()
+                id_course = assignment.id_course if assignment else None
+                with metrics_scope(id_course, q.id_assignment):
+                    results = grader.grade_batch(
+                        soal=q.teks_soal,
+                        kunci_jawaban=q.kunci_jawaban or "",
+                        jawaban_list=answers,
+                        max_score_dosen=float(q.bobot or 0),
+                        tier_policy=TierPolicy.for_assignment(assignment),
+                        keywords=q.kata_kunci,
+                        token_bags=[subs[item.id_submission].token_bag for item in valid]
+                    )
+
+                existing_by_sub = {
+                    g.id_submission: g
+                    for g in db.query(Grading).filter(
+                        Grading.id_submission.in_([item.id_submission for item in valid])
+                    ).all()
+                }
+
+                for item, jawaban, result in zip(valid, answers, results):
+                    # AI gagal / skor heuristik saat breaker terbuka tidak disimpan sebagai skor AI
+                    if grader.unsaved_result_status(result, jawaban) is not None:
+                        self._mark_item(item, error=result["feedback"], retry=True)
+                        continue
+
+                    existing = existing_by_sub.get(item.id_submission)
+                    if existing:
+                        existing.skor_ai = Decimal(str(result["final_score"]))
+                        existing.feedback_ai = result["feedback"]
+                        existing.dedup_cluster = result.get("cluster_id")
+                        existing.ai_backend = result.get("backend")
+                    else:
+                        db.add(Grading(
+                            id_submission=item.id_submission,
+                            skor_ai=Decimal(str(result["final_score"])),
+                            feedback_ai=result["feedback"],
+                            dedup_cluster=result.get("cluster_id"),
+                            ai_backend=result.get("backend")
+                        ))
+
+                    item.skor_ai = Decimal(str(result["final_score"]))
+                    self._mark_item(item)
+
+            self._finalize_job(db, id_job)
+
+        except Exception as e:
+            db.rollback()
+            logging.error(f"⚠️ [AI JOB] Gagal memproses item {item_ids}: {e}")
+            for item in db.query(GradingJobItem).filter(GradingJobItem.id_item.in_(item_ids)).all():
+                self._mark_item(item, error=str(e)[:500], retry=True)
+            self._finalize_job(db, id_job)
+
+    def _retry_delay(self, attempts: int) -> float:
+        """Backoff eksponensial per percobaan, minimal sampai breaker keluar dari state open."""
+        from app.utils.ai_grader import grader
+
+        backoff = min(self.retry_max_seconds, self.retry_base_seconds * 2 ** max(0, attempts - 1))
+        return max(backoff, grader.breaker.open_remaining_seconds())
+
+    def _mark_item(self, item: GradingJobItem, error: str | None = None, retry: bool = False):
+        if error is None:
+            item.status = "done"
+            item.error = None
+        elif retry and (item.attempts or 0) < self.max_attempts:
+            item.status = "pending"
+            item.error = error
+            item.available_at = func.localtimestamp() + timedelta(seconds=self._retry_delay(item.attempts or 0))
+        else:
+            item.status = "failed"
+            item.error = error
+        item.finished_at = func.localtimestamp() if item.status in ("done", "failed") else None
+
+    def _finalize_job(self, db: Session, id_job: int):
+        db.flush()
+
+        # Kunci baris job dulu: worker yang menyelesaikan item terakhir secara bersamaan
+        # diserialisasi, sehingga yang terakhir pasti melihat sisa item = 0
+        job = db.query(GradingJob).filter(GradingJob.id_job == id_job).with_for_update().first()
+
+        remaining = (
+            db.query(GradingJobItem)
+            .filter(GradingJobItem.id_job == id_job, GradingJobItem.status.in_(ACTIVE_ITEM_STATUSES))
+            .count()
+        )
+        if remaining == 0:
+            failed = (
+                db.query(GradingJobItem)
+                .filter(GradingJobItem.id_job == id_job, GradingJobItem.status == "failed")
+                .count()
+            )
+            if job:
+                job.status = "completed_with_errors" if failed else "completed"
+                job.finished_at = func.localtimestamp()
+
+        db.commit()
+
+
+# Pool global, di-start/stop oleh lifespan aplikasi (app/main.py)
+grading_workers = GradingWorkerPool()
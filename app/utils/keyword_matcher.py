@@ -0,0 +1,155 @@
+# app/utils/keyword_matcher.py
+
+"""
+Pencocok banyak keyword sekaligus (automaton Aho-Corasick).
+
+Cek `keyword in teks` dalam loop berbiaya O(jumlah keyword x panjang teks) dan mencocokkan
+potongan di dalam kata ("dan" cocok di "dandelion"). KeywordMatcher membangun automaton
+sekali untuk satu set keyword lalu memindai teks satu kali, sehingga biaya pencocokan linear
+terhadap panjang essay berapapun jumlah keyword rubrik.
+
+Dua mode:
+  - substring (default)  : unit automaton = karakter, sama dengan `keyword in teks`.
+  - word_boundary=True   : unit automaton = token kata (\\w+), keyword hanya cocok utuh
+                           per kata; frasa ("oleh karena itu") dicocokkan sebagai urutan kata.
+Pencocokan tidak peka huruf besar/kecil. Matcher di-cache (LRU) per (tuple keyword, mode)
+lewat get_matcher, karena rubrik satu soal dipakai berulang untuk semua jawaban.
+"""
+
+import os
+import re
+import threading
+from collections import deque
+from typing import Iterable
+
+from cachetools import LRUCache, cached
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class KeywordMatcher:
+    """Automaton Aho-Corasick atas karakter (substring) atau token kata (word_boundary)."""
+
+    # Mode substring dengan keyword sedikit: `in` (C) per keyword masih lebih cepat daripada
+    # memindai automaton per karakter di Python (titik impas terukur ~100 keyword)
+    DIRECT_SCAN_MAX_KEYWORDS = 64
+
+    def __init__(self, keywords: Iterable[str], word_boundary: bool = False):
+        self.keywords = tuple(keywords)
+        self.word_boundary = word_boundary
+        self._lowered = tuple(kw.lower() for kw in self.keywords)
+        self._direct = not word_boundary and len(self.keywords) <= self.DIRECT_SCAN_MAX_KEYWORDS
+
+        self._goto: list[dict] = [{}]
+        self._out: list[tuple[int, ...]] = [()]
+        # `"" in teks` selalu True; pada mode kata keyword tanpa token tidak pernah cocok
+        self._always = tuple(i for i, kw in enumerate(self.keywords) if not kw and not word_boundary)
+
+        # Mode kata: keyword satu kata cukup dicek lewat himpunan token (tanpa loop per token);
+        # hanya frasa multi-kata yang masuk automaton
+        self._single_words: dict[str, tuple[int, ...]] = {}
+        self._phrase_words: list[tuple[int, frozenset[str]]] = []
+
+        for idx, keyword in enumerate(self.keywords):
+            units = self._units(self._lowered[idx])
+            if not units:
+                continue
+            if word_boundary and len(units) == 1:
+                self._single_words[units[0]] = self._single_words.get(units[0], ()) + (idx,)
+                continue
+            if word_boundary:
+                self._phrase_words.append((idx, frozenset(units)))
+            state = 0
+            for unit in units:
+                nxt = self._goto[state].get(unit)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto.append({})
+                    self._out.append(())
+                    self._goto[state][unit] = nxt
+                state = nxt
+            self._out[state] += (idx,)
+
+        # Fail link (BFS): state terpanjang yang merupakan sufiks, output ikut digabung.
+        # Transisi lalu dimaterialisasi (goto + fail) sehingga pemindaian cukup satu lookup
+        # dict per unit; unit di luar alfabet keyword selalu kembali ke root.
+        fail = [0] * len(self._goto)
+        self._delta: list[dict] = [dict(self._goto[0])] + [{} for _ in self._goto[1:]]
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            if state:
+                self._delta[state] = {**self._delta[fail[state]], **self._goto[state]}
+            for unit, nxt in self._goto[state].items():
+                queue.append(nxt)
+                if state:
+                    fail[nxt] = self._delta[fail[state]].get(unit, 0)
+                self._out[nxt] += self._out[fail[nxt]]
+
+    def _units(self, text: str):
+        return _WORD_RE.findall(text) if self.word_boundary else text
+
+    @staticmethod
+    def _iter_words(text: str):
+        return (match.group() for match in _WORD_RE.finditer(text))
+
+    @staticmethod
+    def _word_set(text: str) -> set[str]:
+        """Himpunan token \\w+ (sama dengan set(_WORD_RE.findall)) lewat str.split yang jauh lebih cepat."""
+        words = set()
+        for token in set(text.split()):
+            if token.isalnum():  # \w = isalnum() + "_", jadi token ini satu kata utuh
+                words.add(token)
+            else:
+                words.update(_WORD_RE.findall(token))
+        return words
+
+    def find(self, text: str, lowered: bool = False) -> set[int]:
+        """Indeks keyword (posisi di self.keywords) yang muncul di teks."""
+        if not lowered:
+            text = (text or "").lower()
+        if self._direct:
+            return {i for i, kw in enumerate(self._lowered) if kw in text}
+
+        found = set(self._always)
+        if not text or (len(self._goto) == 1 and not self._single_words):
+            return found
+
+        if self.word_boundary:
+            present = self._word_set(text)
+            for unit in self._single_words.keys() & present:
+                found.update(self._single_words[unit])
+            # Automaton hanya dijalankan jika ada frasa yang semua katanya muncul di teks,
+            # dan berhenti begitu semua frasa kandidat itu ditemukan
+            wanted = {idx for idx, words in self._phrase_words if words <= present}
+            if not wanted:
+                return found
+            units = self._iter_words(text)
+        else:
+            wanted = set(range(len(self.keywords)))
+            units = text
+
+        delta, out = self._delta, self._out
+        state = 0
+        for unit in units:
+            state = delta[state].get(unit, 0)
+            if out[state]:
+                found.update(out[state])
+                if wanted <= found:
+                    break
+        return found
+
+    def matches(self, text: str, lowered: bool = False) -> list[str]:
+        """Keyword yang ditemukan, urut sesuai daftar keyword aslinya."""
+        found = self.find(text, lowered=lowered)
+        return [kw for i, kw in enumerate(self.keywords) if i in found]
+
+    def count(self, text: str, lowered: bool = False) -> int:
+        return len(self.find(text, lowered=lowered))
+
+
+@cached(LRUCache(maxsize=max(1, int(os.getenv("KEYWORD_MATCHER_CACHE_SIZE", "256")))),
+        lock=threading.Lock(), info=True)
+def get_matcher(keywords: tuple[str, ...], word_boundary: bool = False) -> KeywordMatcher:
+    """Matcher untuk satu set keyword (dibangun sekali, di-cache LRU per tuple keyword + mode)."""
+    return KeywordMatcher(keywords, word_boundary=word_boundary)
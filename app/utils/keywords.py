@@ -0,0 +1,90 @@
+# app/utils/keywords.py
+
+"""
+Ekstraksi kata kunci otomatis dari kunci jawaban.
+
+calculate_essay_score menerima `keywords`, tetapi tanpa daftar keyword skor keyword_match
+selalu jatuh ke nilai default 70. Modul ini memilih istilah penting dari kunci jawaban:
+  - token kata lowercase dikelompokkan per stem (app.utils.stemmer); stopword Bahasa
+    Indonesia (termasuk kata perintah soal seperti "jelaskan"), beberapa stopword Inggris
+    umum, angka, dan kata < 3 huruf dibuang;
+  - bobot TF-IDF: tf dari kunci jawaban (sublinear), idf dari korpus soal satu course
+    (teks soal + kunci jawaban setiap soal), sehingga istilah yang muncul di semua soal
+    course tersebut (mis. nama mata kuliah) turun peringkatnya.
+Hanya unigram: keyword dicocokkan sebagai substring, jadi istilah majemuk tetap terwakili
+kata-katanya, sedangkan bigram dari kata bersebelahan di kunci cenderung frasa kebetulan.
+
+Hasilnya disimpan di Question.kata_kunci saat soal dibuat / diedit (refresh_question_keywords),
+sehingga penilaian cukup membaca kolom tersebut tanpa biaya ekstraksi per request.
+"""
+
+import math
+import os
+import re
+
+from sqlalchemy.orm import Session
+
+from app.models.assignments import Assignment
+from app.models.questions import Question
+from app.utils.stemmer import INDONESIAN_STOPWORDS, stem
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def content_terms(text: str) -> list[str]:
+    """Kata lowercase yang bukan stopword/angka dan minimal 3 huruf, urut sesuai teks."""
+    return [w for w in _WORD_RE.findall((text or "").lower())
+            if len(w) >= 3 and not w.isdigit() and w not in INDONESIAN_STOPWORDS]
+
+
+def extract_keywords(kunci: str, corpus: list[str], top_k: int | None = None) -> list[str]:
+    """
+    Istilah paling khas dari `kunci` (maks top_k, urut bobot TF-IDF menurun).
+    `corpus` = dokumen soal se-course (boleh termasuk soal ini sendiri) untuk menghitung idf.
+    """
+    if top_k is None:
+        top_k = int(os.getenv("AI_KEYWORD_TOP_K", "8"))
+    terms = content_terms(kunci)
+    if not terms or top_k <= 0:
+        return []
+
+    # Dihitung per stem ("tumbuhan" & "tumbuh" satu istilah); keyword = bentuk pertama di kunci
+    tf: dict[str, int] = {}
+    first_pos: dict[str, int] = {}
+    surface: dict[str, str] = {}
+    for pos, term in enumerate(terms):
+        key = stem(term)
+        tf[key] = tf.get(key, 0) + 1
+        first_pos.setdefault(key, pos)
+        surface.setdefault(key, term)
+
+    docs = [{stem(t) for t in content_terms(doc)} for doc in corpus if doc]
+    n_docs = len(docs)
+    df = {key: sum(1 for doc in docs if key in doc) for key in tf}
+
+    def weight(key: str) -> float:
+        idf = math.log((1.0 + n_docs) / (1.0 + df[key])) + 1.0  # smooth idf (sama dengan similarity.py)
+        return (1.0 + math.log(tf[key])) * idf
+
+    return [surface[key] for key in sorted(tf, key=lambda k: (-weight(k), first_pos[k]))[:top_k]]
+
+
+def course_corpus(db: Session, id_course: int) -> list[str]:
+    """Teks soal + kunci jawaban semua soal di course (termasuk soal yang baru di-flush)."""
+    rows = (
+        db.query(Question.teks_soal, Question.kunci_jawaban)
+        .join(Assignment, Assignment.id_assignment == Question.id_assignment)
+        .filter(Assignment.id_course == id_course)
+        .all()
+    )
+    return [f"{teks or ''} {kunci or ''}" for teks, kunci in rows]
+
+
+def refresh_question_keywords(db: Session, questions: list[Question], id_course: int) -> None:
+    """Hitung ulang Question.kata_kunci untuk soal yang baru dibuat / kunci jawabannya berubah."""
+    if not questions:
+        return
+    db.flush()
+    corpus = course_corpus(db, id_course)
+    for question in questions:
+        question.kata_kunci = extract_keywords(question.kunci_jawaban or "", corpus) or None
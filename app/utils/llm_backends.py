@@ -0,0 +1,627 @@
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import hashlib
+import logging
+import threading
+from types import SimpleNamespace
+
+import openai
+from google import genai
+from google.genai import errors
+
+from app.utils.scoring import calculate_essay_score
+from app.utils.similarity import tokenize
+
+# Backend LLM untuk LLMGrader. Semua backend mengekspos permukaan yang sama dengan
+# genai.Client yang dipakai grader: client.models.generate_content(...) dan
+# client.aio.models.generate_content(...), sehingga _generate/_agenerate tidak berubah.
+#   - "gemini"   : Gemini asli (opsional AI_GRADER_BASE_URL untuk server tiruan lokal)
+#   - "openai"   : API chat.completions yang kompatibel OpenAI (OpenAI, vLLM, Ollama, dll)
+#   - "heuristic": calculate_essay_score lokal, tanpa jaringan
+#   - "fake"     : tiruan in-process yang deterministik (tanpa jaringan / API key)
+# Di atas backend utama bisa dipasang kaset record/replay (AI_CASSETTE_MODE).
+
+CASSETTE_MODES = ("off", "record", "replay")
+
+
+class LLMResponse:
+    """Respons minimal yang meniru GenerateContentResponse (text + usage_metadata)."""
+
+    def __init__(self, text: str, prompt_tokens: int = 0, output_tokens: int = 0, cached_tokens: int = 0):
+        self.text = text
+        self.usage_metadata = SimpleNamespace(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=output_tokens,
+            cached_content_token_count=cached_tokens,
+            total_token_count=prompt_tokens + output_tokens,
+        )
+
+
+def _api_error(code: int, message: str) -> errors.APIError:
+    """Error dengan tipe yang sama seperti yang dilempar SDK Gemini (ClientError / ServerError)."""
+    status = {400: "INVALID_ARGUMENT", 403: "PERMISSION_DENIED", 404: "NOT_FOUND", 429: "RESOURCE_EXHAUSTED",
+              500: "INTERNAL", 503: "UNAVAILABLE", 504: "DEADLINE_EXCEEDED"}.get(code, "UNKNOWN")
+    body = {"error": {"code": code, "message": message, "status": status}}
+    return errors.ServerError(code, body) if code >= 500 else errors.ClientError(code, body)
+
+
+def _prompt_text(contents) -> str:
+    """Ambil teks prompt dari argumen `contents` (string, list string, atau list Content)."""
+    if isinstance(contents, str):
+        return contents
+    parts = []
+    for item in contents or []:
+        if isinstance(item, str):
+            parts.append(item)
+        else:
+            for part in getattr(item, "parts", None) or []:
+                parts.append(getattr(part, "text", None) or "")
+    return "\n".join(parts)
+
+
+# ==========================================
+# 1. LLM TIRUAN (deterministik, latency & error bisa diatur)
+# ==========================================
+_KUNCI_RE = re.compile(r"KUNCI JAWABAN: (.*?)\n\s*(?:Berikan output|JAWABAN MAHASISWA|DAFTAR JAWABAN)", re.S)
+_JAWABAN_RE = re.compile(r"JAWABAN MAHASISWA: (.*?)\s*\Z", re.S)
+_BATCH_RE = re.compile(r"DAFTAR JAWABAN MAHASISWA \(JSON\): (\[.*\])\s*\n")
+
+
+def _answer_prompt(prompt: str, scorer) -> str:
+    """
+    Jawab prompt penilaian (tunggal atau batch) dengan JSON berformat sama seperti Gemini.
+    `scorer(kunci, jawaban)` mengembalikan (skor 0-100, feedback).
+    """
+    kunci_match = _KUNCI_RE.search(prompt)
+    kunci = kunci_match.group(1).strip() if kunci_match else ""
+
+    batch_match = _BATCH_RE.search(prompt)
+    if batch_match:
+        hasil = []
+        for item in json.loads(batch_match.group(1)):
+            score, feedback = scorer(kunci, item.get("jawaban", ""))
+            hasil.append({"id": item["id"], "skor": score, "feedback": feedback})
+        return json.dumps({"hasil": hasil}, ensure_ascii=False)
+
+    jawaban_match = _JAWABAN_RE.search(prompt)
+    score, feedback = scorer(kunci, jawaban_match.group(1).strip() if jawaban_match else prompt)
+    return json.dumps({"skor": score, "feedback": feedback}, ensure_ascii=False)
+
+
+class FakeLLM:
+    """
+    Pengganti Gemini untuk load test / benchmark.
+
+    Skor deterministik: dihitung dari overlap token jawaban terhadap kunci + jitter
+    kecil dari hash jawaban, jadi jawaban yang sama selalu mendapat skor yang sama.
+    Latency diambil dari distribusi (fixed | uniform | lognormal | exponential) dan
+    error disuntikkan dengan peluang tertentu. Keduanya memakai RNG yang di-seed dari
+    (seed, prompt, percobaan ke-n) sehingga urutan kejadian bisa direproduksi
+    walaupun pemanggilan berjalan paralel.
+    """
+
+    def __init__(self, latency_ms: float = 800.0, latency_dist: str = "lognormal", latency_sigma: float = 0.5,
+                 error_rate: float = 0.0, error_code: int = 503, malformed_rate: float = 0.0, seed: int = 0):
+        self.latency_ms = max(0.0, latency_ms)
+        self.latency_dist = latency_dist
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.error_code = error_code
+        self.malformed_rate = malformed_rate
+        self.seed = seed
+        self._attempts: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "FakeLLM":
+        return cls(
+            latency_ms=float(os.getenv("FAKE_LLM_LATENCY_MS", "800")),
+            latency_dist=os.getenv("FAKE_LLM_LATENCY_DIST", "lognormal").lower(),
+            latency_sigma=float(os.getenv("FAKE_LLM_LATENCY_SIGMA", "0.5")),
+            error_rate=float(os.getenv("FAKE_LLM_ERROR_RATE", "0")),
+            error_code=int(os.getenv("FAKE_LLM_ERROR_CODE", "503")),
+            malformed_rate=float(os.getenv("FAKE_LLM_MALFORMED_RATE", "0")),
+            seed=int(os.getenv("FAKE_LLM_SEED", "0")),
+        )
+
+    def _rng(self, prompt: str) -> random.Random:
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        with self._lock:
+            attempt = self._attempts.get(digest, 0)
+            self._attempts[digest] = attempt + 1
+        return random.Random(f"{self.seed}:{digest}:{attempt}")
+
+    def _sample_latency(self, rng: random.Random) -> float:
+        """Latency dalam detik; latency_ms adalah median (lognormal) / rata-rata (lainnya)."""
+        mean = self.latency_ms / 1000
+        if mean <= 0:
+            return 0.0
+        if self.latency_dist == "fixed":
+            return mean
+        if self.latency_dist == "uniform":
+            return rng.uniform(0, 2 * mean)
+        if self.latency_dist == "exponential":
+            return rng.expovariate(1 / mean)
+        return rng.lognormvariate(0, self.latency_sigma) * mean
+
+    def score(self, kunci: str, jawaban: str) -> float:
+        key_tokens = set(tokenize(kunci))
+        answer_tokens = set(tokenize(jawaban))
+        overlap = len(key_tokens & answer_tokens) / len(key_tokens) if key_tokens else 0.0
+        jitter = int(hashlib.sha1(jawaban.encode("utf-8")).hexdigest()[:4], 16) % 11 - 5
+        return float(max(0, min(100, round(20 + 80 * overlap) + jitter)))
+
+    def _feedback(self, score: float) -> str:
+        return f"[FAKE LLM] Skor {score:.0f} dihitung dari kecocokan kata kunci terhadap kunci jawaban."
+
+    def respond(self, prompt: str) -> str:
+        """Teks JSON yang akan dikembalikan model untuk prompt ini."""
+        def scorer(kunci: str, jawaban: str):
+            score = self.score(kunci, jawaban)
+            return score, self._feedback(score)
+
+        return _answer_prompt(prompt, scorer)
+
+    def plan(self, prompt: str) -> tuple[float, int | None, str]:
+        """(latency detik, kode error atau None, teks respons) untuk satu panggilan."""
+        rng = self._rng(prompt)
+        latency = self._sample_latency(rng)
+        if rng.random() < self.error_rate:
+            return latency, self.error_code, ""
+        text = self.respond(prompt)
+        if rng.random() < self.malformed_rate:
+            text = text[: max(1, len(text) // 2)]  # JSON terpotong, memicu jalur parsing error
+        return latency, None, text
+
+    def build_response(self, prompt: str, text: str, cached_tokens: int = 0) -> LLMResponse:
+        return LLMResponse(text, prompt_tokens=len(prompt) // 4 + 1, output_tokens=len(text) // 4 + 1,
+                           cached_tokens=cached_tokens)
+
+    def stream_plan(self, prompt: str, text: str, latency: float, chunks: int = 4) -> list[tuple[float, LLMResponse]]:
+        """Pecah respons menjadi beberapa potongan streaming: (jeda sebelum potongan, potongan).
+        Potongan pertama datang setelah ~40% latency, sisanya tersebar merata."""
+        size = max(1, -(-len(text) // chunks))
+        pieces = [text[i:i + size] for i in range(0, len(text), size)] or [""]
+        gaps = [latency * 0.4] + [latency * 0.6 / max(1, len(pieces) - 1)] * (len(pieces) - 1)
+        out = [(gap, LLMResponse(piece)) for gap, piece in zip(gaps, pieces)]
+        # usage_metadata lengkap hanya ada di potongan terakhir, seperti Gemini
+        out[-1] = (out[-1][0], LLMResponse(pieces[-1], len(prompt) // 4 + 1, len(text) // 4 + 1))
+        return out
+
+
+class _FakeCaches:
+    """Explicit context caching tiruan (client.caches): prefix disimpan in-memory dengan TTL."""
+
+    def __init__(self):
+        self._entries: dict[str, tuple[str, float]] = {}
+        self._lock = threading.Lock()
+        self._counter = 0
+
+    def create(self, model: str, config=None):
+        ttl = float(str(getattr(config, "ttl", None) or "3600s").rstrip("s"))
+        with self._lock:
+            self._counter += 1
+            name = f"cachedContents/fake-{self._counter}"
+            self._entries[name] = (_prompt_text(getattr(config, "contents", None)), time.time() + ttl)
+        return SimpleNamespace(name=name, model=model)
+
+    def delete(self, name: str, config=None):
+        with self._lock:
+            if self._entries.pop(name, None) is None:
+                raise _api_error(404, f"Cached content {name} tidak ditemukan")
+
+    def resolve(self, contents, config) -> tuple[str, int]:
+        """(prompt utuh, token dari cache) untuk sebuah panggilan generate_content."""
+        name = getattr(config, "cached_content", None)
+        if not name:
+            return _prompt_text(contents), 0
+        with self._lock:
+            entry = self._entries.get(name)
+        if entry is None or entry[1] <= time.time():
+            raise _api_error(404, f"Cached content {name} tidak ditemukan atau kedaluwarsa")
+        return entry[0] + _prompt_text(contents), len(entry[0]) // 4 + 1
+
+
+class _FakeModels:
+    def __init__(self, llm: FakeLLM, caches: _FakeCaches):
+        self._llm = llm
+        self._caches = caches
+
+    def generate_content(self, model: str, contents, config=None):
+        prompt, cached_tokens = self._caches.resolve(contents, config)
+        latency, error_code, text = self._llm.plan(prompt)
+        time.sleep(latency)
+        if error_code is not None:
+            raise _api_error(error_code, "Fake LLM injected error")
+        return self._llm.build_response(prompt, text, cached_tokens)
+
+    def generate_content_stream(self, model: str, contents, config=None):
+        prompt, _ = self._caches.resolve(contents, config)
+        latency, error_code, text = self._llm.plan(prompt)
+
+        def _iterate():
+            if error_code is not None:
+                time.sleep(latency)
+                raise _api_error(error_code, "Fake LLM injected error")
+            for gap, chunk in self._llm.stream_plan(prompt, text, latency):
+                time.sleep(gap)
+                yield chunk
+
+        return _iterate()
+
+
+class _FakeAsyncModels:
+    def __init__(self, llm: FakeLLM, caches: _FakeCaches):
+        self._llm = llm
+        self._caches = caches
+
+    async def generate_content(self, model: str, contents, config=None):
+        prompt, cached_tokens = self._caches.resolve(contents, config)
+        latency, error_code, text = self._llm.plan(prompt)
+        await asyncio.sleep(latency)
+        if error_code is not None:
+            raise _api_error(error_code, "Fake LLM injected error")
+        return self._llm.build_response(prompt, text, cached_tokens)
+
+    async def generate_content_stream(self, model: str, contents, config=None):
+        prompt, _ = self._caches.resolve(contents, config)
+        latency, error_code, text = self._llm.plan(prompt)
+
+        # Seperti SDK: request baru "terkirim" saat iterasi pertama
+        async def _iterate():
+            if error_code is not None:
+                await asyncio.sleep(latency)
+                raise _api_error(error_code, "Fake LLM injected error")
+            for gap, chunk in self._llm.stream_plan(prompt, text, latency):
+                await asyncio.sleep(gap)
+                yield chunk
+
+        return _iterate()
+
+
+class FakeGeminiClient:
+    """Klien in-process dengan permukaan yang sama seperti genai.Client."""
+
+    def __init__(self, llm: FakeLLM | None = None):
+        self.llm = llm or FakeLLM.from_env()
+        self.caches = _FakeCaches()
+        self.models = _FakeModels(self.llm, self.caches)
+        self.aio = SimpleNamespace(models=_FakeAsyncModels(self.llm, self.caches), caches=self.caches)
+
+
+# ==========================================
+# 2. KASET RECORD / REPLAY
+# ==========================================
+class CassetteMissError(Exception):
+    """Mode replay: prompt tidak ada di kaset."""
+
+
+def _config_fingerprint(config) -> dict | None:
+    if config is None:
+        return None
+    if hasattr(config, "model_dump"):
+        return config.model_dump(mode="json", exclude_none=True)
+    return config
+
+
+class CassetteClient:
+    """
+    Pembungkus klien LLM yang merekam respons ke file JSONL (mode "record") atau
+    memutarnya kembali tanpa jaringan (mode "replay").
+
+    Kunci rekaman = sha256(model, prompt, config). Satu kunci bisa punya beberapa
+    rekaman (mis. 429 lalu sukses saat retry); replay memutarnya berurutan lalu
+    mengulang dari awal. Error API juga direkam sehingga jalur retry/breaker ikut
+    tereproduksi. Jika replay_latency aktif, latency rekaman ikut ditiru.
+    """
+
+    def __init__(self, inner, path: str, mode: str = "replay", replay_latency: bool = True):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Mode kaset tidak dikenal: {mode}")
+        if mode == "record" and inner is None:
+            raise ValueError("Mode record membutuhkan backend LLM yang aktif.")
+        self.inner = inner
+        self.path = path
+        self.mode = mode
+        self.replay_latency = replay_latency
+        self._lock = threading.Lock()
+        self._entries: dict[str, list[dict]] = {}
+        self._cursor: dict[str, int] = {}
+        self._load()
+
+        self.models = SimpleNamespace(generate_content=self._generate_content)
+        self.aio = SimpleNamespace(models=SimpleNamespace(
+            generate_content=self._agenerate_content,
+            generate_content_stream=self._agenerate_content_stream,
+        ))
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries.setdefault(entry["key"], []).append(entry)
+
+    @staticmethod
+    def make_key(model: str, prompt: str, config) -> str:
+        raw = json.dumps([model, prompt, _config_fingerprint(config)], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _append(self, entry: dict):
+        with self._lock:
+            self._entries.setdefault(entry["key"], []).append(entry)
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _next_entry(self, key: str) -> dict:
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise CassetteMissError(f"Prompt tidak ditemukan di kaset {self.path} (key {key[:12]}).")
+            i = self._cursor.get(key, 0)
+            self._cursor[key] = i + 1
+            return entries[i % len(entries)]
+
+    @staticmethod
+    def _record_entry(key: str, model: str, latency: float, response=None, error: errors.APIError | None = None) -> dict:
+        entry = {"key": key, "model": model, "latency_ms": round(latency * 1000, 2)}
+        if error is not None:
+            entry["error"] = {"code": error.code, "response_json": error.details}
+            return entry
+        usage = getattr(response, "usage_metadata", None)
+        entry["text"] = response.text
+        entry["usage"] = {
+            "prompt_tokens": getattr(usage, "prompt_token_count", None) or 0,
+            "output_tokens": getattr(usage, "candidates_token_count", None) or 0,
+        }
+        return entry
+
+    @staticmethod
+    def _replay(entry: dict) -> LLMResponse:
+        if "error" in entry:
+            error = entry["error"]
+            body = error.get("response_json") or {"error": {"code": error["code"], "message": "recorded error"}}
+            raise errors.ServerError(error["code"], body) if error["code"] >= 500 else errors.ClientError(error["code"], body)
+        usage = entry.get("usage") or {}
+        return LLMResponse(entry["text"], usage.get("prompt_tokens", 0), usage.get("output_tokens", 0))
+
+    def _generate_content(self, model: str, contents, config=None):
+        key = self.make_key(model, _prompt_text(contents), config)
+        if self.mode == "replay":
+            entry = self._next_entry(key)
+            if self.replay_latency:
+                time.sleep(entry.get("latency_ms", 0) / 1000)
+            return self._replay(entry)
+
+        start = time.monotonic()
+        try:
+            response = self.inner.models.generate_content(model=model, contents=contents, config=config)
+        except errors.APIError as e:
+            self._append(self._record_entry(key, model, time.monotonic() - start, error=e))
+            raise
+        self._append(self._record_entry(key, model, time.monotonic() - start, response=response))
+        return response
+
+    async def _agenerate_content(self, model: str, contents, config=None):
+        key = self.make_key(model, _prompt_text(contents), config)
+        if self.mode == "replay":
+            entry = self._next_entry(key)
+            if self.replay_latency:
+                await asyncio.sleep(entry.get("latency_ms", 0) / 1000)
+            return self._replay(entry)
+
+        start = time.monotonic()
+        try:
+            response = await self.inner.aio.models.generate_content(model=model, contents=contents, config=config)
+        except errors.APIError as e:
+            await asyncio.to_thread(self._append, self._record_entry(key, model, time.monotonic() - start, error=e))
+            raise
+        await asyncio.to_thread(self._append, self._record_entry(key, model, time.monotonic() - start, response=response))
+        return response
+
+    async def _agenerate_content_stream(self, model: str, contents, config=None):
+        """Streaming memakai kunci yang sama dengan non-streaming; replay mengirim 1 potongan utuh."""
+        key = self.make_key(model, _prompt_text(contents), config)
+
+        async def _replay_stream():
+            entry = self._next_entry(key)
+            if self.replay_latency:
+                await asyncio.sleep(entry.get("latency_ms", 0) / 1000)
+            yield self._replay(entry)
+
+        async def _record_stream():
+            start = time.monotonic()
+            texts, usage = [], None
+            try:
+                stream = await self.inner.aio.models.generate_content_stream(model=model, contents=contents, config=config)
+                async for chunk in stream:
+                    texts.append(chunk.text or "")
+                    usage = getattr(chunk, "usage_metadata", None) or usage
+                    yield chunk
+            except errors.APIError as e:
+                await asyncio.to_thread(self._append, self._record_entry(key, model, time.monotonic() - start, error=e))
+                raise
+            response = SimpleNamespace(text="".join(texts), usage_metadata=usage)
+            await asyncio.to_thread(self._append, self._record_entry(key, model, time.monotonic() - start, response=response))
+
+        return _replay_stream() if self.mode == "replay" else _record_stream()
+
+
+# ==========================================
+# 3. BACKEND OPENAI-COMPATIBLE & HEURISTIK LOKAL
+# ==========================================
+class OpenAICompatClient:
+    """
+    Adapter chat.completions (OpenAI atau server kompatibel: vLLM, Ollama, LiteLLM, ...)
+    ke permukaan genai.Client. Error openai diterjemahkan ke error genai sehingga retry,
+    breaker dan metrik memperlakukannya sama seperti Gemini.
+    """
+
+    def __init__(self, api_key: str, base_url: str | None = None, timeout_seconds: float = 60.0):
+        self._sync = openai.OpenAI(api_key=api_key, base_url=base_url, timeout=timeout_seconds, max_retries=0)
+        self._async = openai.AsyncOpenAI(api_key=api_key, base_url=base_url, timeout=timeout_seconds, max_retries=0)
+        self.models = SimpleNamespace(generate_content=self._generate_content)
+        self.aio = SimpleNamespace(models=SimpleNamespace(generate_content=self._agenerate_content))
+
+    @staticmethod
+    def _request(model: str, contents, config) -> dict:
+        kwargs = {"model": model, "messages": [{"role": "user", "content": _prompt_text(contents)}]}
+        if getattr(config, "temperature", None) is not None:
+            kwargs["temperature"] = config.temperature
+        if getattr(config, "response_mime_type", None) == "application/json":
+            kwargs["response_format"] = {"type": "json_object"}
+        return kwargs
+
+    @staticmethod
+    def _to_response(completion) -> LLMResponse:
+        usage = completion.usage
+        return LLMResponse(
+            completion.choices[0].message.content or "",
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            output_tokens=getattr(usage, "completion_tokens", 0) or 0,
+        )
+
+    @staticmethod
+    def _translate(error: openai.OpenAIError) -> Exception:
+        if isinstance(error, openai.APITimeoutError):
+            return TimeoutError(str(error))
+        if isinstance(error, openai.APIStatusError):
+            return _api_error(error.status_code, str(error))
+        return error
+
+    def _generate_content(self, model: str, contents, config=None):
+        try:
+            return self._to_response(self._sync.chat.completions.create(**self._request(model, contents, config)))
+        except openai.OpenAIError as e:
+            raise self._translate(e) from e
+
+    async def _agenerate_content(self, model: str, contents, config=None):
+        try:
+            return self._to_response(await self._async.chat.completions.create(**self._request(model, contents, config)))
+        except openai.OpenAIError as e:
+            raise self._translate(e) from e
+
+
+class HeuristicClient:
+    """Backend lokal: calculate_essay_score dibungkus sebagai respons JSON (selalu instan)."""
+
+    def __init__(self):
+        self.models = SimpleNamespace(generate_content=self._generate_content)
+        self.aio = SimpleNamespace(models=SimpleNamespace(generate_content=self._agenerate_content))
+
+    @staticmethod
+    def _scorer(kunci: str, jawaban: str):
+        score, feedback = calculate_essay_score(jawaban)
+        return round(score, 2), f"[Penilaian heuristik lokal] {feedback}"
+
+    def _generate_content(self, model: str, contents, config=None):
+        prompt = _prompt_text(contents)
+        text = _answer_prompt(prompt, self._scorer)
+        return LLMResponse(text, prompt_tokens=len(prompt) // 4 + 1, output_tokens=len(text) // 4 + 1)
+
+    async def _agenerate_content(self, model: str, contents, config=None):
+        return self._generate_content(model, contents, config)
+
+
+# ==========================================
+# 4. REGISTRY BACKEND
+# ==========================================
+class LLMBackend:
+    """Satu backend penilai: nama registry, model, klien (permukaan genai.Client) dan label metode."""
+
+    def __init__(self, name: str, model: str, client, method_label: str, description: str | None = None):
+        self.name = name
+        self.model = model
+        self.client = client
+        self.method_label = method_label
+        self.description = description or name
+
+    def info(self) -> dict:
+        return {"name": self.name, "model": self.model, "active": self.client is not None, "description": self.description}
+
+
+BACKEND_FACTORIES: dict = {}
+
+
+def register_backend(name: str):
+    """Dekorator: daftarkan factory `fn(timeout_seconds) -> LLMBackend` dengan nama tertentu."""
+    def decorator(factory):
+        BACKEND_FACTORIES[name] = factory
+        return factory
+    return decorator
+
+
+def _gemini_label(model: str) -> str:
+    return "LLM Only (Gemini 2.5 Flash)" if model == "gemini-2.5-flash" else f"LLM Only ({model})"
+
+
+@register_backend("gemini")
+def _gemini_backend(timeout_seconds: float) -> LLMBackend:
+    model = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+    api_key = os.getenv("GEMINI_API_KEY")
+    base_url = os.getenv("AI_GRADER_BASE_URL") or None
+    client = None
+    if api_key:
+        client = genai.Client(
+            api_key=api_key,
+            http_options=genai.types.HttpOptions(timeout=int(timeout_seconds * 1000), base_url=base_url)
+        )
+    return LLMBackend("gemini", model, client, _gemini_label(model), f"gemini@{base_url}" if base_url else "gemini")
+
+
+@register_backend("fake")
+def _fake_backend(timeout_seconds: float) -> LLMBackend:
+    # Meniru Gemini (nama model sama) agar cache & label tetap konsisten saat load test
+    model = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+    return LLMBackend("fake", model, FakeGeminiClient(FakeLLM.from_env()), _gemini_label(model), "fake (in-process)")
+
+
+@register_backend("openai")
+def _openai_backend(timeout_seconds: float) -> LLMBackend:
+    model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+    base_url = os.getenv("OPENAI_BASE_URL") or None
+    # Server lokal kompatibel OpenAI sering tidak butuh key; cukup base URL
+    api_key = os.getenv("OPENAI_API_KEY") or ("not-needed" if base_url else None)
+    client = OpenAICompatClient(api_key, base_url, timeout_seconds) if api_key else None
+    return LLMBackend("openai", model, client, f"LLM Only (OpenAI-compatible {model})",
+                      f"openai@{base_url}" if base_url else "openai")
+
+
+@register_backend("heuristic")
+def _heuristic_backend(timeout_seconds: float) -> LLMBackend:
+    return LLMBackend("heuristic", "heuristic-local", HeuristicClient(), "Heuristic (Lokal)", "heuristic (calculate_essay_score)")
+
+
+def build_backend(name: str, timeout_seconds: float, cassette: bool = False) -> LLMBackend | None:
+    """
+    Bangun backend dari registry. `cassette=True` memasang kaset record/replay sesuai env:
+      AI_CASSETTE_MODE  off | record | replay (+ AI_CASSETTE_PATH, AI_CASSETTE_REPLAY_LATENCY)
+    Mengembalikan None jika nama tidak terdaftar.
+    """
+    factory = BACKEND_FACTORIES.get(name)
+    if factory is None:
+        logging.warning(f"⚠️ [AI INIT] Backend '{name}' tidak dikenal. Tersedia: {', '.join(BACKEND_FACTORIES)}")
+        return None
+    backend = factory(timeout_seconds)
+
+    cassette_mode = os.getenv("AI_CASSETTE_MODE", "off").lower() if cassette else "off"
+    if cassette_mode not in CASSETTE_MODES:
+        logging.warning(f"⚠️ [AI INIT] AI_CASSETTE_MODE '{cassette_mode}' tidak dikenal, kaset dimatikan.")
+        cassette_mode = "off"
+
+    if cassette_mode != "off" and (backend.client is not None or cassette_mode == "replay"):
+        path = os.getenv("AI_CASSETTE_PATH", "cassettes/llm_grading.jsonl")
+        replay_latency = os.getenv("AI_CASSETTE_REPLAY_LATENCY", "true").lower() in ("1", "true", "yes")
+        backend.client = CassetteClient(backend.client, path, mode=cassette_mode, replay_latency=replay_latency)
+        backend.description = f"{backend.description}+cassette:{cassette_mode}"
+
+    return backend
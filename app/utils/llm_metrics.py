@@ -0,0 +1,250 @@
+import os
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Instrumentasi panggilan LLM: latency (histogram), token prompt/output dari usage_metadata,
+# kelas hasil, model, dan estimasi biaya. Diagregasi per (model, hasil, course, assignment).
+# Course/assignment diambil dari context (metrics_scope) yang dipasang oleh router / worker,
+# sehingga signature grade_* tidak perlu berubah. contextvars ikut terbawa ke task asyncio
+# (gather) dan asyncio.to_thread.
+
+OUTCOMES = ("ok", "api_error", "json_error", "timeout")
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0)
+GROUP_BY = ("model", "outcome", "course", "assignment")
+
+_scope: contextvars.ContextVar[tuple[int | None, int | None]] = contextvars.ContextVar(
+    "llm_metrics_scope", default=(None, None)
+)
+
+
+@contextmanager
+def metrics_scope(id_course: int | None = None, id_assignment: int | None = None):
+    """Tandai panggilan LLM di dalam blok ini sebagai milik course/assignment tertentu."""
+    token = _scope.set((id_course, id_assignment))
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+class _Series:
+    __slots__ = ("calls", "latency_sum", "buckets", "prompt_tokens", "output_tokens", "cached_tokens")
+
+    def __init__(self, n_buckets: int):
+        self.calls = 0
+        self.latency_sum = 0.0
+        self.buckets = [0] * n_buckets  # non-kumulatif; dikumulatifkan saat export
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.cached_tokens = 0  # bagian dari prompt_tokens yang dilayani context cache
+
+
+class LLMMetrics:
+    """Registry metrik in-memory (per proses), thread-safe."""
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS,
+                 price_input_per_mtok: float | None = None, price_output_per_mtok: float | None = None,
+                 price_cached_per_mtok: float | None = None):
+        self.buckets = tuple(sorted(buckets))
+        # Harga per 1 juta token (USD) untuk estimasi biaya; default tarif Gemini 2.5 Flash
+        self.price_input = price_input_per_mtok if price_input_per_mtok is not None \
+            else float(os.getenv("AI_PRICE_INPUT_PER_MTOK", "0.30"))
+        self.price_output = price_output_per_mtok if price_output_per_mtok is not None \
+            else float(os.getenv("AI_PRICE_OUTPUT_PER_MTOK", "2.50"))
+        self.price_cached = price_cached_per_mtok if price_cached_per_mtok is not None \
+            else float(os.getenv("AI_PRICE_CACHED_INPUT_PER_MTOK", "0.03"))
+        self._series: dict[tuple, _Series] = {}
+        # Keputusan penilaian bertingkat: (tier, course, assignment) -> jumlah jawaban
+        self._tiers: dict[tuple, int] = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def record(self, model: str, outcome: str, latency: float, usage=None):
+        """Catat 1 panggilan. `usage` = response.usage_metadata (boleh None)."""
+        id_course, id_assignment = _scope.get()
+        prompt_tokens = int(getattr(usage, "prompt_token_count", None) or 0)
+        output_tokens = int(getattr(usage, "candidates_token_count", None) or 0)
+        cached_tokens = int(getattr(usage, "cached_content_token_count", None) or 0)
+
+        slot = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if latency <= bound:
+                slot = i
+                break
+
+        key = (model, outcome, id_course, id_assignment)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(len(self.buckets) + 1)
+            series.calls += 1
+            series.latency_sum += latency
+            series.buckets[slot] += 1
+            series.prompt_tokens += prompt_tokens
+            series.output_tokens += output_tokens
+            series.cached_tokens += cached_tokens
+
+    def record_tier(self, tier: str, count: int = 1):
+        """Catat keputusan tier penilaian bertingkat (lokal vs eskalasi ke LLM)."""
+        if count <= 0:
+            return
+        id_course, id_assignment = _scope.get()
+        key = (tier, id_course, id_assignment)
+        with self._lock:
+            self._tiers[key] = self._tiers.get(key, 0) + count
+
+    def tier_snapshot(self) -> dict:
+        """Jumlah jawaban per tier, total dan per assignment, beserta panggilan LLM yang terhindarkan."""
+        with self._lock:
+            items = list(self._tiers.items())
+
+        def summarize(counts: dict) -> dict:
+            total = sum(counts.values())
+            avoided = total - counts.get("llm", 0)
+            return {
+                "tiers": counts,
+                "answers": total,
+                "llm_calls_avoided": avoided,
+                "avoided_ratio": round(avoided / total, 4) if total else 0.0,
+            }
+
+        overall: dict[str, int] = {}
+        per_assignment: dict[tuple, dict[str, int]] = {}
+        for (tier, id_course, id_assignment), count in items:
+            overall[tier] = overall.get(tier, 0) + count
+            group = per_assignment.setdefault((id_course, id_assignment), {})
+            group[tier] = group.get(tier, 0) + count
+
+        rows = [{"course": c, "assignment": a, **summarize(counts)} for (c, a), counts in per_assignment.items()]
+        rows.sort(key=lambda r: -r["answers"])
+        return {"since": self.started_at, **summarize(overall), "groups": rows}
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+            self._tiers.clear()
+            self.started_at = time.time()
+
+    def cost(self, prompt_tokens: int, output_tokens: int, cached_tokens: int = 0) -> float:
+        """Token prompt yang dilayani context cache ditagih dengan tarif cache."""
+        cached_tokens = min(cached_tokens, prompt_tokens)
+        return ((prompt_tokens - cached_tokens) * self.price_input + cached_tokens * self.price_cached
+                + output_tokens * self.price_output) / 1_000_000
+
+    def _quantile(self, buckets: list[int], q: float) -> float | None:
+        """Perkiraan kuantil dari histogram (batas atas bucket, seperti histogram_quantile)."""
+        total = sum(buckets)
+        if not total:
+            return None
+        target, running = q * total, 0
+        for i, count in enumerate(buckets):
+            running += count
+            if running >= target:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def snapshot(self, group_by: tuple[str, ...] = ("course", "assignment")) -> dict:
+        """Agregat per kombinasi label `group_by` (subset dari GROUP_BY)."""
+        positions = [GROUP_BY.index(g) for g in group_by]
+        with self._lock:
+            items = [(key, s.calls, s.latency_sum, list(s.buckets), s.prompt_tokens, s.output_tokens, s.cached_tokens)
+                     for key, s in self._series.items()]
+
+        groups: dict[tuple, dict] = {}
+        for key, calls, latency_sum, buckets, prompt_tokens, output_tokens, cached_tokens in items:
+            group_key = tuple(key[p] for p in positions)
+            g = groups.setdefault(group_key, {
+                "calls": 0, "latency_sum": 0.0, "buckets": [0] * (len(self.buckets) + 1),
+                "prompt_tokens": 0, "output_tokens": 0, "cached_tokens": 0, "outcomes": {o: 0 for o in OUTCOMES},
+            })
+            g["calls"] += calls
+            g["latency_sum"] += latency_sum
+            g["buckets"] = [a + b for a, b in zip(g["buckets"], buckets)]
+            g["prompt_tokens"] += prompt_tokens
+            g["output_tokens"] += output_tokens
+            g["cached_tokens"] += cached_tokens
+            g["outcomes"][key[1]] = g["outcomes"].get(key[1], 0) + calls
+
+        rows = []
+        for group_key, g in groups.items():
+            calls = g["calls"]
+            rows.append({
+                **dict(zip(group_by, group_key)),
+                "calls": calls,
+                "outcomes": g["outcomes"],
+                "error_rate": round(1 - g["outcomes"]["ok"] / calls, 4) if calls else 0.0,
+                "latency_avg_seconds": round(g["latency_sum"] / calls, 4) if calls else None,
+                "latency_p50_seconds": self._quantile(g["buckets"], 0.50),
+                "latency_p95_seconds": self._quantile(g["buckets"], 0.95),
+                "prompt_tokens": g["prompt_tokens"],
+                "output_tokens": g["output_tokens"],
+                "cached_tokens": g["cached_tokens"],
+                "estimated_cost_usd": round(self.cost(g["prompt_tokens"], g["output_tokens"], g["cached_tokens"]), 6),
+            })
+        rows.sort(key=lambda r: -r["calls"])
+
+        return {
+            "since": self.started_at,
+            "group_by": list(group_by),
+            "price_per_mtok": {"input": self.price_input, "cached_input": self.price_cached, "output": self.price_output},
+            "groups": rows,
+        }
+
+    def render_prometheus(self, namespace: str = "eags_llm") -> str:
+        """Format teks exposition Prometheus (histogram + counter token & biaya)."""
+        with self._lock:
+            items = [(key, s.calls, s.latency_sum, list(s.buckets), s.prompt_tokens, s.output_tokens, s.cached_tokens)
+                     for key, s in sorted(self._series.items(), key=lambda kv: tuple(str(k) for k in kv[0]))]
+
+        def labels(key, extra: str = "") -> str:
+            model, outcome, id_course, id_assignment = key
+            parts = [f'model="{model}"', f'outcome="{outcome}"',
+                     f'course="{id_course if id_course is not None else ""}"',
+                     f'assignment="{id_assignment if id_assignment is not None else ""}"']
+            if extra:
+                parts.append(extra)
+            return "{" + ",".join(parts) + "}"
+
+        lines = [
+            f"# HELP {namespace}_request_duration_seconds Latency panggilan LLM per percobaan.",
+            f"# TYPE {namespace}_request_duration_seconds histogram",
+        ]
+        for key, calls, latency_sum, buckets, *_ in items:
+            running = 0
+            for bound, count in zip(self.buckets, buckets):
+                running += count
+                le = 'le="%s"' % bound
+                lines.append(f"{namespace}_request_duration_seconds_bucket{labels(key, le)} {running}")
+            le = 'le="+Inf"'
+            lines.append(f"{namespace}_request_duration_seconds_bucket{labels(key, le)} {calls}")
+            lines.append(f"{namespace}_request_duration_seconds_sum{labels(key)} {latency_sum:.6f}")
+            lines.append(f"{namespace}_request_duration_seconds_count{labels(key)} {calls}")
+
+        counters = (
+            ("prompt_tokens_total", "Token prompt (usage_metadata).", lambda r: r[4]),
+            ("output_tokens_total", "Token output (usage_metadata).", lambda r: r[5]),
+            ("cached_tokens_total", "Token prompt yang dilayani context cache.", lambda r: r[6]),
+            ("cost_usd_total", "Estimasi biaya dari token dan harga per 1 juta token.",
+             lambda r: round(self.cost(r[4], r[5], r[6]), 6)),
+        )
+        for name, help_text, value in counters:
+            lines.append(f"# HELP {namespace}_{name} {help_text}")
+            lines.append(f"# TYPE {namespace}_{name} counter")
+            for row in items:
+                lines.append(f"{namespace}_{name}{labels(row[0])} {value(row)}")
+
+        with self._lock:
+            tiers = sorted(self._tiers.items(), key=lambda kv: tuple(str(k) for k in kv[0]))
+        lines.append(f"# HELP {namespace}_tier_decisions_total Jawaban per tier penilaian bertingkat.")
+        lines.append(f"# TYPE {namespace}_tier_decisions_total counter")
+        for (tier, id_course, id_assignment), count in tiers:
+            course = id_course if id_course is not None else ""
+            assignment = id_assignment if id_assignment is not None else ""
+            lines.append(f'{namespace}_tier_decisions_total{{tier="{tier}",course="{course}",assignment="{assignment}"}} {count}')
+
+        return "\n".join(lines) + "\n"
+
+
+llm_metrics = LLMMetrics()
@@ -0,0 +1,146 @@
+# app/utils/minhash.py
+
+"""
+MinHash + LSH (locality sensitive hashing) untuk mencari jawaban yang mirip/hampir sama.
+
+- normalize_text : lowercase, buang tanda baca, rapikan spasi.
+- shingles       : n-gram karakter dari teks ternormalisasi (tahan untuk jawaban pendek).
+- MinHasher      : signature MinHash (NumPy, num_perm permutasi hash universal).
+- MinHashLSH     : indeks banding; query hanya membandingkan kandidat di bucket yang sama,
+                   bukan semua pasangan (O(n^2)).
+"""
+
+import re
+import zlib
+
+import numpy as np
+
+_PUNCT = re.compile(r"[^\w\s]", re.UNICODE)
+_SPACES = re.compile(r"\s+")
+
+# Bilangan prima Mersenne 2^61 - 1 untuk hashing universal (a*x + b) mod p
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 61) - 2)
+
+
+def normalize_text(text: str) -> str:
+    text = _PUNCT.sub(" ", (text or "").lower())
+    return _SPACES.sub(" ", text).strip()
+
+
+def shingles(text: str, k: int = 5, normalized: bool = False) -> set[str]:
+    """Himpunan n-gram karakter (k) dari teks ternormalisasi."""
+    norm = text if normalized else normalize_text(text)
+    if not norm:
+        return set()
+    if len(norm) <= k:
+        return {norm}
+    return {norm[i:i + k] for i in range(len(norm) - k + 1)}
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        self.num_perm = num_perm
+        rng = np.random.RandomState(seed)
+        # a, b < 2^31 dan hash shingle < 2^32 -> a*x + b < 2^64, aman dari overflow uint64
+        self.a = rng.randint(1, 2 ** 31 - 1, size=num_perm).astype(np.uint64)
+        self.b = rng.randint(0, 2 ** 31 - 1, size=num_perm).astype(np.uint64)
+
+    def signature(self, shingle_set: set[str]) -> np.ndarray:
+        if not shingle_set:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in shingle_set),
+            dtype=np.uint64,
+            count=len(shingle_set),
+        )
+        # (n_shingles, num_perm) -> minimum per permutasi
+        return ((np.outer(hashes, self.a) + self.b) % _PRIME).min(axis=0)
+
+    def signature_of(self, text: str, k: int = 5) -> np.ndarray:
+        return self.signature(shingles(text, k))
+
+
+def estimate_jaccard(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+    return float(np.mean(sig_a == sig_b))
+
+
+def choose_bands(num_perm: int, threshold: float) -> tuple[int, int]:
+    """
+    Pilih (bands, rows) dengan bands*rows = num_perm sehingga ambang LSH (1/b)^(1/r)
+    paling dekat di BAWAH threshold (mengutamakan recall; kandidat tetap diverifikasi).
+    """
+    best, best_gap = None, None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        approx = (1.0 / bands) ** (1.0 / rows)
+        if approx > threshold:
+            continue
+        gap = threshold - approx
+        if best_gap is None or gap < best_gap:
+            best, best_gap = (bands, rows), gap
+    return best or (num_perm, 1)
+
+
+def band_keys(signature: np.ndarray, bands: int, rows: int) -> list[str]:
+    """Kunci bucket per band (hex dari potongan signature)."""
+    return [
+        f"{band}:{signature[band * rows:(band + 1) * rows].tobytes().hex()}"
+        for band in range(bands)
+    ]
+
+
+class MinHashLSH:
+    """Indeks LSH in-memory: key -> signature, bucket band -> set(key)."""
+
+    def __init__(self, num_perm: int = 64, threshold: float = 0.8):
+        self.num_perm = num_perm
+        self.threshold = threshold
+        self.bands, self.rows = choose_bands(num_perm, threshold)
+        self._buckets: dict[str, set] = {}
+        self._signatures: dict = {}
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def __contains__(self, key):
+        return key in self._signatures
+
+    def insert(self, key, signature: np.ndarray):
+        if key in self._signatures:
+            self.remove(key)
+        self._signatures[key] = signature
+        for bucket in band_keys(signature, self.bands, self.rows):
+            self._buckets.setdefault(bucket, set()).add(key)
+
+    def remove(self, key):
+        signature = self._signatures.pop(key, None)
+        if signature is None:
+            return
+        for bucket in band_keys(signature, self.bands, self.rows):
+            members = self._buckets.get(bucket)
+            if members:
+                members.discard(key)
+                if not members:
+                    del self._buckets[bucket]
+
+    def candidates(self, signature: np.ndarray) -> set:
+        found = set()
+        for bucket in band_keys(signature, self.bands, self.rows):
+            found |= self._buckets.get(bucket, set())
+        return found
+
+    def query(self, signature: np.ndarray, threshold: float | None = None) -> list[tuple]:
+        """Kandidat yang estimasi Jaccard-nya >= threshold, urut dari paling mirip."""
+        threshold = self.threshold if threshold is None else threshold
+        out = []
+        for key in self.candidates(signature):
+            sim = estimate_jaccard(signature, self._signatures[key])
+            if sim >= threshold:
+                out.append((key, sim))
+        return sorted(out, key=lambda x: -x[1])
+
+    def signature(self, key) -> np.ndarray | None:
+        return self._signatures.get(key)
@@ -0,0 +1,165 @@
+# app/utils/plagiarism.py
+
+"""
+Deteksi kemiripan jawaban antar mahasiswa (indikasi plagiarisme) per soal.
+
+Indeks MinHash LSH disimpan di DB (tabel answer_signatures + answer_lsh_buckets) dan
+diperbarui secara inkremental setiap kali mahasiswa submit. Query hanya memverifikasi
+pasangan yang berbagi bucket LSH, bukan semua pasangan O(n^2).
+
+Parameter indeks (NUM_PERM, INDEX_THRESHOLD) menentukan kunci bucket yang tersimpan;
+jika diubah, jawaban lama perlu di-index ulang (reindex_assignment).
+"""
+
+import numpy as np
+from sqlalchemy import and_
+from sqlalchemy.orm import Session, aliased
+
+from app.models.answer_signature import AnswerSignature, AnswerLSHBucket
+from app.models.submissions import Submission
+from app.utils.minhash import MinHasher, band_keys, choose_bands, estimate_jaccard, shingles
+
+NUM_PERM = 64
+SHINGLE_K = 5
+# Ambang terendah yang bisa ditemukan indeks; ambang query boleh lebih tinggi
+INDEX_THRESHOLD = 0.5
+
+_hasher = MinHasher(num_perm=NUM_PERM)
+BANDS, ROWS = choose_bands(NUM_PERM, INDEX_THRESHOLD)
+
+
+def index_submissions(db: Session, submissions: list[Submission]):
+    """Hitung signature + bucket untuk submission (sudah punya id). Tidak di-commit di sini."""
+    if not submissions:
+        return
+
+    ids = [sub.id_submission for sub in submissions]
+    db.query(AnswerLSHBucket).filter(AnswerLSHBucket.id_submission.in_(ids)).delete(synchronize_session=False)
+    existing = {
+        row.id_submission: row
+        for row in db.query(AnswerSignature).filter(AnswerSignature.id_submission.in_(ids)).all()
+    }
+
+    for sub in submissions:
+        signature = _hasher.signature(shingles(sub.jawaban or "", SHINGLE_K))
+        row = existing.get(sub.id_submission)
+        if row:
+            row.signature = signature.tobytes()
+            row.id_question = sub.id_question
+            row.id_assignment = sub.id_assignment
+        else:
+            db.add(AnswerSignature(
+                id_submission=sub.id_submission,
+                id_assignment=sub.id_assignment,
+                id_question=sub.id_question,
+                signature=signature.tobytes(),
+            ))
+
+        # Jawaban kosong tidak dimasukkan ke bucket (semua jawaban kosong akan "identik")
+        if not (sub.jawaban or "").strip():
+            continue
+        db.add_all([
+            AnswerLSHBucket(
+                id_submission=sub.id_submission,
+                id_assignment=sub.id_assignment,
+                id_question=sub.id_question,
+                bucket_key=key,
+            )
+            for key in band_keys(signature, BANDS, ROWS)
+        ])
+
+
+def ensure_indexed(db: Session, assignment_id: int) -> int:
+    """Index submission lama yang belum punya signature (mis. data sebelum fitur ini ada)."""
+    missing = (
+        db.query(Submission)
+        .outerjoin(AnswerSignature, AnswerSignature.id_submission == Submission.id_submission)
+        .filter(Submission.id_assignment == assignment_id, AnswerSignature.id_submission.is_(None))
+        .all()
+    )
+    if missing:
+        index_submissions(db, missing)
+        db.commit()
+    return len(missing)
+
+
+def reindex_assignment(db: Session, assignment_id: int) -> int:
+    subs = db.query(Submission).filter(Submission.id_assignment == assignment_id).all()
+    index_submissions(db, subs)
+    db.commit()
+    return len(subs)
+
+
+def similar_pairs(db: Session, assignment_id: int, threshold: float = INDEX_THRESHOLD) -> list[tuple[int, int, int, float]]:
+    """
+    Pasangan (id_submission_a, id_submission_b, id_question, similarity) untuk soal yang sama
+    dengan estimasi Jaccard >= threshold. Kandidat diambil dari bucket LSH yang sama.
+    """
+    a = aliased(AnswerLSHBucket)
+    b = aliased(AnswerLSHBucket)
+    candidates = (
+        db.query(a.id_submission, b.id_submission, a.id_question)
+        .join(b, and_(
+            a.id_question == b.id_question,
+            a.bucket_key == b.bucket_key,
+            a.id_submission < b.id_submission,
+        ))
+        .filter(a.id_assignment == assignment_id)
+        .distinct()
+        .all()
+    )
+    if not candidates:
+        return []
+
+    involved = {sid for x, y, _ in candidates for sid in (x, y)}
+    signatures = {
+        row.id_submission: np.frombuffer(row.signature, dtype=np.uint64)
+        for row in db.query(AnswerSignature).filter(AnswerSignature.id_submission.in_(involved)).all()
+    }
+
+    pairs = []
+    for x, y, id_question in candidates:
+        if x not in signatures or y not in signatures:
+            continue
+        sim = estimate_jaccard(signatures[x], signatures[y])
+        if sim >= threshold:
+            pairs.append((x, y, id_question, round(sim, 4)))
+    return sorted(pairs, key=lambda p: -p[3])
+
+
+def clusters_from_pairs(pairs: list[tuple[int, int, int, float]]) -> list[dict]:
+    """Gabungkan pasangan menjadi klaster (komponen terhubung) per soal."""
+    parent: dict[int, int] = {}
+
+    def find(i: int) -> int:
+        parent.setdefault(i, i)
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    question_of: dict[int, int] = {}
+    for x, y, id_question, _ in pairs:
+        question_of[x] = question_of[y] = id_question
+        rx, ry = find(x), find(y)
+        if rx != ry:
+            parent[max(rx, ry)] = min(rx, ry)
+
+    groups: dict[int, list[int]] = {}
+    for sid in question_of:
+        groups.setdefault(find(sid), []).append(sid)
+
+    max_sim: dict[int, float] = {}
+    for x, _, _, sim in pairs:
+        root = find(x)
+        max_sim[root] = max(max_sim.get(root, 0.0), sim)
+
+    clusters = [
+        {
+            "id_question": question_of[root],
+            "members": sorted(members),
+            "max_similarity": max_sim.get(root, 0.0),
+        }
+        for root, members in groups.items()
+    ]
+    return sorted(clusters, key=lambda c: (-len(c["members"]), -c["max_similarity"]))
@@ -12,12 +12,43 @@ Algorithm: Kombinasi sederhana dari:
 import re
 from typing import Tuple
 
+import numpy as np
+
+from app.utils.keyword_matcher import KeywordMatcher, get_matcher
+from app.utils.stemmer import is_stopword_keyword, keyword_stems
+
+# Pola & daftar yang dipakai bersama oleh versi skalar dan batch (dikompilasi sekali)
+SENTENCE_SPLIT_RE = re.compile(r'[.!?]+')
+PUNCTUATION_RE = re.compile(r'[.,;:\-]')
+CONNECTORS = ('dan', 'atau', 'namun', 'tetapi', 'karena', 'oleh karena itu', 'sebagai hasil', 'lebih lanjut', 'however', 'moreover', 'therefore')
+# Konektor dicocokkan per kata utuh: "dan" tidak lagi terhitung di "dandelion" / "badan"
+CONNECTOR_MATCHER = KeywordMatcher(CONNECTORS, word_boundary=True)
+
+
+def match_keywords(keywords: list[str], essay_lower: str, token_bag: dict | None = None,
+                   whole_words: bool = False) -> list[str]:
+    """
+    Keyword yang ada di essay. Dengan token_bag (bag stem hasil normalisasi, lihat
+    app.utils.stemmer) pencocokan berupa operasi himpunan atas stem, sehingga bentuk
+    berimbuhan ikut cocok ("mempelajari" ~ "belajar"); tanpa itu dipakai matcher teks.
+    Keyword yang seluruhnya stopword tetap dicocokkan dengan matcher teks karena stopword
+    tidak disimpan di token_bag.
+    """
+    if token_bag is not None:
+        by_text = [kw for kw in keywords if is_stopword_keyword(kw)]
+        found_text = set(get_matcher(tuple(by_text), whole_words).matches(essay_lower, lowered=True)) if by_text else set()
+        return [kw for kw in keywords
+                if kw in found_text or (kw not in by_text and keyword_stems(kw) <= token_bag.keys())]
+    return get_matcher(tuple(keywords), whole_words).matches(essay_lower, lowered=True)
+
 
 def calculate_essay_score(
     essay_text: str,
     keywords: list[str] | None = None,
     min_words: int = 100,
-    max_words: int = 5000
+    max_words: int = 5000,
+    whole_words: bool = False,
+    token_bag: dict | None = None
 ) -> Tuple[float, str]:
     """
     Hitung skor essay (0-100) berdasarkan berbagai metrik.
@@ -27,6 +58,10 @@ def calculate_essay_score(
         keywords: List keyword yang harus ada (optional)
         min_words: Minimal word count untuk full score
         max_words: Maksimal word count (penality jika lebih)
+        whole_words: Keyword hanya cocok sebagai kata utuh (default: substring, agar
+            kata berimbuhan seperti "berfotosintesis" tetap cocok dengan "fotosintesis")
+        token_bag: Bag stem jawaban yang sudah dinormalisasi (Submission.token_bag); jika ada,
+            keyword dicocokkan per stem
     
     Returns:
         Tuple[score (0-100), feedback (string)]
@@ -59,7 +94,7 @@ def calculate_essay_score(
     
     # 2. Sentence Structure Score (20%)
     # Hitung jumlah kalimat dan rata-rata panjang per kalimat
-    sentences = re.split(r'[.!?]+', essay_text)
+    sentences = SENTENCE_SPLIT_RE.split(essay_text)
     sentences = [s.strip() for s in sentences if s.strip()]
     
     if len(sentences) == 0:
@@ -84,15 +119,10 @@ def calculate_essay_score(
     scores['sentence_structure'] = sentence_score
     
     # 3. Keyword Matching Score (30%)
+    essay_lower = essay_text.lower()
     if keywords:
-        keyword_score = 0
-        found_keywords = []
-        
-        essay_lower = essay_text.lower()
-        for keyword in keywords:
-            if keyword.lower() in essay_lower:
-                keyword_score += 1
-                found_keywords.append(keyword)
+        found_keywords = match_keywords(keywords, essay_lower, token_bag, whole_words)
+        keyword_score = len(found_keywords)
         
         # Convert to 0-100 scale
         keyword_score = (keyword_score / len(keywords)) * 100 if keywords else 50
@@ -120,13 +150,12 @@ def calculate_essay_score(
         grammar_score += 15
     
     # Cek kehadiran tanda baca
-    punctuation_count = len(re.findall(r'[.,;:\-]', essay_text))
+    punctuation_count = len(PUNCTUATION_RE.findall(essay_text))
     if punctuation_count > word_count * 0.05:  # Minimal 5% dari word count
         grammar_score += 10
     
     # Cek kehadiran common connecting words
-    connectors = ['dan', 'atau', 'namun', 'tetapi', 'karena', 'oleh karena itu', 'sebagai hasil', 'lebih lanjut', 'however', 'moreover', 'therefore']
-    connector_count = sum(1 for conn in connectors if conn.lower() in essay_lower)
+    connector_count = CONNECTOR_MATCHER.count(essay_lower, lowered=True)
     
     if connector_count > 0:
         grammar_score = min(100, grammar_score + (connector_count * 5))
@@ -151,6 +180,144 @@ def calculate_essay_score(
     return final_score, feedback
 
 
+def score_essays_batch(
+    texts: list[str],
+    keywords: list[str] | None = None,
+    min_words: int = 100,
+    max_words: int = 5000,
+    whole_words: bool = False,
+    token_bags: list[dict | None] | None = None
+) -> list[Tuple[float, str]]:
+    """
+    Versi batch calculate_essay_score untuk banyak essay sekaligus (mis. semua jawaban 1 soal).
+
+    Setiap teks hanya di-split sekali dengan pola yang sudah dikompilasi; fitur mentah
+    (jumlah kata, kalimat, kapitalisasi, tanda baca, konektor, keyword) dikumpulkan ke array
+    NumPy lalu seluruh skor dihitung per kolom untuk semua essay. Operasi & urutannya sama
+    dengan versi skalar sehingga hasilnya identik (skor dan feedback).
+    `token_bags` (opsional, sejajar dengan `texts`) = bag stem tiap jawaban untuk pencocokan keyword.
+
+    Returns:
+        List[Tuple[score (0-100), feedback (string)]] dengan urutan sama seperti `texts`
+    """
+    n = len(texts)
+    if n == 0:
+        return []
+
+    keywords = list(keywords or [])
+    token_bags = token_bags or [None] * n
+
+    stripped = [(t or "").strip() for t in texts]
+    empty = np.array([not t for t in stripped], dtype=bool)
+
+    word_count = np.zeros(n, dtype=np.int64)
+    sentence_count = np.zeros(n, dtype=np.int64)
+    capital_count = np.zeros(n, dtype=np.int64)
+    punctuation_count = np.zeros(n, dtype=np.int64)
+    connector_count = np.zeros(n, dtype=np.int64)
+    keyword_found = np.zeros(n, dtype=np.int64)
+    found_lists: list[list[str]] = [[] for _ in range(n)]
+
+    for i, text in enumerate(stripped):
+        if not text:
+            continue
+        word_count[i] = len(text.split())
+        sentences = [s for s in (part.strip() for part in SENTENCE_SPLIT_RE.split(text)) if s]
+        sentence_count[i] = len(sentences)
+        capital_count[i] = sum(1 for s in sentences if s[0].isupper())
+        punctuation_count[i] = len(PUNCTUATION_RE.findall(text))
+
+        lower = text.lower()
+        connector_count[i] = CONNECTOR_MATCHER.count(lower, lowered=True)
+        if keywords:
+            found = match_keywords(keywords, lower, token_bags[i], whole_words)
+            found_lists[i] = found
+            keyword_found[i] = len(found)
+
+    wc = word_count.astype(np.float64)
+    sc = sentence_count.astype(np.float64)
+    has_sentences = sentence_count > 0
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # 1. Word Count Score (20%)
+        word_score = np.select(
+            [word_count < 50, word_count < min_words, word_count > max_words],
+            [np.maximum(0, (wc / 50) * 50),
+             ((wc - 50) / (min_words - 50)) * 100,
+             np.maximum(50, 100 - ((wc - max_words) / 1000))],
+            default=100.0,
+        )
+
+        # 2. Sentence Structure Score (20%)
+        avg_len = np.where(has_sentences, wc / np.where(has_sentences, sc, 1), 0.0)
+        sentence_score = np.select(
+            [~has_sentences, avg_len < 5, avg_len < 10, avg_len <= 20],
+            [0.0, (avg_len / 5) * 50, 60.0, 100.0],
+            default=np.maximum(50, 100 - ((avg_len - 20) / 30) * 50),
+        )
+
+        # 4. Grammar/Readability Proxy Score (30%)
+        cap_ratio = np.where(has_sentences, capital_count / np.where(has_sentences, sc, 1), 0.0)
+
+    # 3. Keyword Matching Score (30%)
+    if keywords:
+        keyword_score = (keyword_found / len(keywords)) * 100
+    else:
+        keyword_score = np.full(n, 70.0)
+
+    grammar_score = np.full(n, 50.0)
+    grammar_score += np.select([cap_ratio > 0.8, cap_ratio > 0.5], [30.0, 15.0], default=0.0)
+    grammar_score += np.where(punctuation_count > wc * 0.05, 10.0, 0.0)
+    grammar_score = np.where(connector_count > 0, np.minimum(100, grammar_score + (connector_count * 5)), grammar_score)
+    grammar_score = np.minimum(100, grammar_score)
+
+    # 5. Final Score (weighted average, urutan penjumlahan sama dengan versi skalar)
+    final = (
+        word_score * 0.20 +
+        sentence_score * 0.20 +
+        keyword_score * 0.30 +
+        grammar_score * 0.30
+    )
+
+    results: list[Tuple[float, str]] = []
+    for i in range(n):
+        if empty[i]:
+            results.append((0.0, "Essay kosong, tidak bisa dinilai."))
+            continue
+
+        count = int(word_count[i])
+        feedback_parts = []
+        if count < 50:
+            feedback_parts.append(f"Jumlah kata terlalu sedikit ({count} kata, target minimal 100).")
+        elif count < min_words:
+            feedback_parts.append(f"Jumlah kata masih kurang ({count} kata, target {min_words}).")
+        elif count > max_words:
+            feedback_parts.append(f"Jumlah kata terlalu banyak ({count} kata, batas maksimal {max_words}).")
+
+        if not has_sentences[i]:
+            feedback_parts.append("Tidak ada kalimat yang lengkap ditemukan.")
+        elif avg_len[i] < 5:
+            feedback_parts.append("Kalimat terlalu pendek, struktur kurang kompleks.")
+        elif avg_len[i] < 10:
+            feedback_parts.append("Struktur kalimat bisa lebih variatif.")
+        elif avg_len[i] > 20:
+            feedback_parts.append("Beberapa kalimat terlalu panjang, pertimbangkan untuk dipecah.")
+
+        if keywords:
+            if found_lists[i]:
+                feedback_parts.append(f"Kata kunci ditemukan: {', '.join(found_lists[i])}")
+            else:
+                feedback_parts.append("Tidak ada kata kunci yang ditemukan. Pastikan menggunakan term spesifik.")
+
+        feedback = "\n".join(feedback_parts) if feedback_parts else "Essay memenuhi standar dasar."
+        feedback += f"\n\nSkor Detail:\n- Word Count: {word_score[i]:.1f}/100\n- Sentence Structure: {sentence_score[i]:.1f}/100\n- Keyword Match: {keyword_score[i]:.1f}/100\n- Grammar/Readability: {grammar_score[i]:.1f}/100"
+
+        # round() Python (bukan np.round) agar pembulatan sama persis dengan versi skalar
+        results.append((round(float(final[i]), 2), feedback))
+
+    return results
+
+
 def get_feedback_level(score: float) -> str:
     """Kategori feedback berdasarkan score."""
     if score >= 85:
@@ -0,0 +1,116 @@
+# app/utils/similarity.py
+
+"""
+Penilai offline berbasis kemiripan teks (tanpa jaringan).
+
+Semua jawaban untuk satu soal + kunci jawaban di-vektorisasi sekaligus menjadi matriks
+TF-IDF sparse (format COO: baris, kolom, bobot) memakai NumPy. Kemiripan kosinus setiap
+jawaban terhadap kunci dihitung dalam satu operasi `np.bincount`, sehingga menilai ratusan
+jawaban cukup beberapa milidetik.
+
+Dua cara memetakan token ke kolom:
+  - "tfidf"  : vocabulary eksplisit dari korpus soal tersebut.
+  - "hashing": hashing trick (crc32 % n_features), tanpa menyimpan vocabulary.
+"""
+
+import re
+import zlib
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Batas kemiripan kosinus yang dipetakan ke skor 0 dan 100
+DEFAULT_LOW = 0.10
+DEFAULT_HIGH = 0.80
+
+
+def tokenize(text: str, ngram_max: int = 2) -> list[str]:
+    """Token kata lowercase + n-gram kata (default unigram & bigram)."""
+    words = TOKEN_PATTERN.findall((text or "").lower())
+    tokens = list(words)
+    for n in range(2, ngram_max + 1):
+        tokens += [" ".join(words[i:i + n]) for i in range(len(words) - n + 1)]
+    return tokens
+
+
+def _to_coo(docs: list[str], vectorizer: str, n_features: int, ngram_max: int):
+    """Ubah dokumen menjadi (rows, cols, counts) dengan kolom unik per (baris, token)."""
+    rows, cols = [], []
+    vocab: dict[str, int] = {}
+    for r, doc in enumerate(docs):
+        for token in tokenize(doc, ngram_max):
+            if vectorizer == "hashing":
+                col = zlib.crc32(token.encode("utf-8")) % n_features
+            else:
+                col = vocab.setdefault(token, len(vocab))
+            rows.append(r)
+            cols.append(col)
+
+    n_cols = n_features if vectorizer == "hashing" else max(len(vocab), 1)
+    if not rows:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0), n_cols
+
+    # Gabungkan token duplikat dalam dokumen yang sama -> term frequency
+    keys = np.asarray(rows, dtype=np.int64) * n_cols + np.asarray(cols, dtype=np.int64)
+    unique_keys, counts = np.unique(keys, return_counts=True)
+    return unique_keys // n_cols, unique_keys % n_cols, counts.astype(np.float64), n_cols
+
+
+def tfidf_matrix(docs: list[str], vectorizer: str = "tfidf", n_features: int = 2 ** 18, ngram_max: int = 2):
+    """
+    Matriks TF-IDF ternormalisasi L2 dalam format COO.
+    Return (rows, cols, weights, n_cols).
+    """
+    rows, cols, tf, n_cols = _to_coo(docs, vectorizer, n_features, ngram_max)
+    if rows.size == 0:
+        return rows, cols, tf, n_cols
+
+    n_docs = len(docs)
+    df = np.bincount(cols, minlength=n_cols)
+    idf = np.log((1.0 + n_docs) / (1.0 + df)) + 1.0  # smooth idf (seperti scikit-learn)
+
+    # Sublinear tf agar jawaban yang mengulang-ulang kata tidak diuntungkan
+    weights = (1.0 + np.log(tf)) * idf[cols]
+
+    norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=n_docs))
+    weights = weights / np.where(norms[rows] > 0, norms[rows], 1.0)
+    return rows, cols, weights, n_cols
+
+
+def similarity_to_key(kunci: str, answers: list[str], vectorizer: str = "tfidf",
+                      n_features: int = 2 ** 18, ngram_max: int = 2) -> np.ndarray:
+    """Kemiripan kosinus (0..1) setiap jawaban terhadap kunci, dalam satu operasi matriks."""
+    if not answers:
+        return np.zeros(0)
+
+    # Dokumen 0 = kunci, dokumen 1..n = jawaban
+    rows, cols, weights, n_cols = tfidf_matrix([kunci or ""] + list(answers), vectorizer, n_features, ngram_max)
+    n_docs = len(answers) + 1
+
+    key_mask = rows == 0
+    key_vector = np.zeros(n_cols)
+    key_vector[cols[key_mask]] = weights[key_mask]
+
+    sims = np.bincount(rows, weights=weights * key_vector[cols], minlength=n_docs)[1:]
+    return np.clip(sims, 0.0, 1.0)
+
+
+def similarity_to_score(sims: np.ndarray, low: float = DEFAULT_LOW, high: float = DEFAULT_HIGH) -> np.ndarray:
+    """Petakan kemiripan kosinus ke skor 0-100 secara linear di antara low..high."""
+    span = max(high - low, 1e-9)
+    return np.clip((np.asarray(sims, dtype=np.float64) - low) / span, 0.0, 1.0) * 100.0
+
+
+def similarity_feedback(sim: float) -> str:
+    percent = round(float(sim) * 100, 1)
+    if sim >= 0.6:
+        note = "Jawaban sangat sesuai dengan kunci jawaban."
+    elif sim >= 0.35:
+        note = "Jawaban cukup sesuai, namun beberapa poin kunci belum dibahas."
+    elif sim >= 0.15:
+        note = "Jawaban hanya sebagian kecil menyentuh poin kunci jawaban."
+    else:
+        note = "Jawaban kurang relevan dengan kunci jawaban."
+    return f"{note} (Kemiripan dengan kunci jawaban: {percent}%)"
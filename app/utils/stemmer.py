@@ -0,0 +1,153 @@
+# app/utils/stemmer.py
+
+"""
+Normalisasi teks Bahasa Indonesia: tokenisasi, stopword, dan stemming berbasis aturan.
+
+Keyword "belajar" tidak cocok secara substring dengan "mempelajari". Stemmer di sini
+melepas imbuhan mengikuti urutan Nazief-Adriani / confix stripping:
+  1. partikel (-lah, -kah, -tah, -pun) lalu kata ganti milik (-ku, -mu, -nya)
+  2. hingga 3 awalan (di-, ke-an, ber-, ter-, me(N)-, pe(N)-, per-) dengan aturan
+     peluluhan (menulis -> tulis, menyerap -> serap, memakai -> pakai) dan kasus khusus
+     bel-/pel- pada "ajar" (belajar, pelajar, mempelajari -> ajar)
+  3. satu akhiran derivasi (-kan, -an, -i)
+Tanpa kamus kata dasar, pemotongan dibatasi panjang sisa kata (mis. "makan" tidak menjadi
+"mak") dan awalan yang rawan memotong kata dasar (se-, ke- tanpa -an) tidak dilepas.
+Hasilnya tidak selalu kata dasar baku, tetapi konsisten: bentuk berimbuhan dan kata
+dasarnya menuju stem yang sama.
+
+stem() dimemo dengan cache LRU terbatas (STEMMER_CACHE_SIZE) karena kosakata jawaban
+mahasiswa berulang; token_bag() menghasilkan bag {stem: jumlah} yang disimpan per Submission
+saat jawaban masuk sehingga penilaian keyword cukup operasi himpunan.
+"""
+
+import os
+import re
+from functools import lru_cache
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_VOWELS = frozenset("aiueo")
+
+INDONESIAN_STOPWORDS = frozenset("""
+ada adalah adanya agar akan akhirnya aku amat anda antara apa apabila apakah atas atau bagaimana
+bagi bahkan bahwa banyak baru beberapa begitu belum benar berada berbagai berikut bersama beserta
+biasa biasanya bila bisa boleh buah bukan cukup dalam dan dapat dari daripada demikian dengan di
+dia diri dua hal hampir hanya harus hingga ia ialah ini itu jadi jika juga jumlah kalau kami kamu
+karena kata ke kecuali kembali kemudian kepada ketika kita lagi lain lainnya lalu lebih maka mampu
+mana masih masing melalui melakukan memang memiliki menjadi mereka merupakan meski misalnya mungkin
+namun nya oleh pada paling para pasti pula pun saat saja salah sama sampai sangat satu saya sebab
+sebagai sebagian sebelum sebuah secara sedang sehingga sejak sekali sekitar selain selalu seluruh
+semua sendiri seperti serta sesuatu setelah setiap suatu sudah supaya tanpa tapi telah tentang
+terdapat terhadap termasuk tersebut tetap tetapi tiap tidak untuk waktu yaitu yakni yang
+and are for from has have into its not that the their then there these this those was were which
+with
+berikan contoh jelaskan mengapa sebutkan uraikan tuliskan
+""".split())
+
+_PARTICLES = ("lah", "kah", "tah", "pun")
+_POSSESSIVES = ("nya", "ku", "mu")
+_SUFFIXES = ("kan", "an", "i")
+
+MIN_STEM = 3         # sisa kata minimal setelah melepas awalan / partikel
+MIN_SUFFIX_STEM = 4  # sisa kata minimal setelah melepas akhiran derivasi (makan, bahan, cari)
+
+
+def _strip_prefix(word: str, outermost: bool) -> tuple[str, str] | None:
+    """Satu awalan: (jenis awalan, sisa kata setelah peluluhan), atau None."""
+    if word.startswith(("belajar", "pelajar")):
+        return word[:2], word[3:]
+    # di-/ke- hanya sebagai awalan terluar, ke- hanya dalam konfiks ke-an (kehidupan), agar
+    # kata dasar seperti "kerja" (bekerja, pekerjaan) tidak ikut terpotong
+    if outermost and word.startswith("di"):
+        return "di", word[2:]
+    if outermost and word.startswith("ke") and word.endswith("an"):
+        return "ke", word[2:]
+
+    for base in ("be", "te", "pe"):
+        if word.startswith(base + "r"):
+            return base, word[3:]                          # berfungsi, terjadi, pertanian
+        if word.startswith(base) and len(word) > 4 and word[2] not in _VOWELS and word[3:5] == "er":
+            return base, word[2:]                          # bekerja, pekerjaan -> kerja
+
+    for base in ("me", "pe"):
+        if not word.startswith(base):
+            continue
+        rest = word[2:]
+        if rest.startswith("ny") and rest[2:3] in _VOWELS:
+            return base, "s" + rest[2:]                    # menyerap -> serap
+        if rest.startswith("ng"):
+            return base, rest[2:]                          # mengubah -> ubah, menghasilkan -> hasilkan
+        if rest.startswith("m"):
+            if rest[1:2] in _VOWELS:
+                return base, "p" + rest[1:]                # memakai -> pakai
+            if rest[1:2] in ("b", "f", "p", "v"):
+                return base, rest[1:]                      # membuat -> buat, mempelajari -> pelajari
+        if rest.startswith("n"):
+            if rest[1:2] in _VOWELS:
+                return base, "t" + rest[1:]                # menulis -> tulis
+            if rest[1:2] in ("c", "d", "j", "s", "z"):
+                return base, rest[1:]                      # mencari -> cari
+        if rest[:1] in ("l", "r", "w", "y"):
+            return base, rest                              # melihat -> lihat
+    return None
+
+
+@lru_cache(maxsize=max(1, int(os.getenv("STEMMER_CACHE_SIZE", "50000"))))
+def stem(word: str) -> str:
+    """Stem satu kata lowercase (dimemo, cache LRU terbatas)."""
+    if len(word) <= MIN_STEM or not word.isalpha():
+        return word
+
+    for group in (_PARTICLES, _POSSESSIVES):
+        for suffix in group:
+            if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM:
+                word = word[:-len(suffix)]
+                break
+
+    # Awalan dulu, baru akhiran: batas panjang akhiran berlaku pada sisa kata dasar,
+    # sehingga "mencari" -> "cari" (bukan "car") sama dengan kata dasarnya
+    seen: list[str] = []
+    for _ in range(3):
+        stripped = _strip_prefix(word, outermost=not seen)
+        if stripped is None:
+            break
+        prefix, rest = stripped
+        if prefix in seen or len(rest) < MIN_STEM:
+            break
+        seen.append(prefix)
+        word = rest
+
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_SUFFIX_STEM:
+            return word[:-len(suffix)]
+    return word
+
+
+def normalize_tokens(text: str, drop_stopwords: bool = True) -> list[str]:
+    """Token kata lowercase yang sudah di-stem (stopword dibuang), urut sesuai teks."""
+    words = _WORD_RE.findall((text or "").lower())
+    if drop_stopwords:
+        words = [w for w in words if w not in INDONESIAN_STOPWORDS]
+    return [stem(w) for w in words]
+
+
+def token_bag(text: str) -> dict[str, int]:
+    """Bag of stems {stem: jumlah} untuk disimpan per jawaban."""
+    bag: dict[str, int] = {}
+    for token in normalize_tokens(text):
+        bag[token] = bag.get(token, 0) + 1
+    return bag
+
+
+@lru_cache(maxsize=4096)
+def keyword_stems(keyword: str) -> frozenset[str]:
+    """
+    Stem kata pada keyword (frasa cocok jika semua stem-nya ada di bag). Stopword dibuang
+    seperti pada token_bag; hanya jika keyword seluruhnya stopword dipakai semua stem-nya.
+    """
+    return frozenset(normalize_tokens(keyword) or normalize_tokens(keyword, drop_stopwords=False))
+
+
+@lru_cache(maxsize=4096)
+def is_stopword_keyword(keyword: str) -> bool:
+    """Keyword yang seluruhnya stopword (mis. "waktu") tidak pernah ada di token_bag."""
+    return bool(normalize_tokens(keyword, drop_stopwords=False)) and not normalize_tokens(keyword)
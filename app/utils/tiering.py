@@ -0,0 +1,114 @@
+# app/utils/tiering.py
+
+"""
+Penilaian bertingkat (tiered): sinyal lokal murah dulu, LLM hanya untuk jawaban yang ambigu.
+
+Setiap jawaban valid diberi kemiripan TF-IDF terhadap kunci (satu operasi matriks untuk semua
+jawaban satu soal) dan skor kualitas dari score_essays_batch (sekali untuk semua jawaban lokal). Lalu dipilih tier:
+  - "near_key"  : kemiripan >= high_similarity -> hampir sama dengan kunci, diterima lokal
+  - "off_topic" : kemiripan <= low_similarity  -> tidak relevan, skor 0, diterima lokal
+  - "short"     : jumlah kata < min_words      -> terlalu pendek untuk layak dikirim ke LLM
+  - "llm"       : selain itu (ambigu)          -> dieskalasi ke LLM
+Jawaban kosong tetap ditangani validasi biasa (tier "invalid").
+Ambang default dari env AI_TIER_*, bisa ditimpa per assignment (kolom tier_* di assignments).
+"""
+
+import os
+
+from app.utils.scoring import score_essays_batch, get_feedback_level
+from app.utils.similarity import similarity_to_key, similarity_to_score, similarity_feedback
+from app.utils.stemmer import token_bag
+
+TIERS = ("invalid", "short", "off_topic", "near_key", "llm")
+LOCAL_TIERS = ("invalid", "short", "off_topic", "near_key")
+
+
+class TierPolicy:
+    """Ambang tier untuk satu assignment (None pada kolom assignment = pakai default env)."""
+
+    def __init__(self, low_similarity: float | None = None, high_similarity: float | None = None,
+                 min_words: int | None = None, quality_weight: float | None = None):
+        self.low_similarity = low_similarity if low_similarity is not None \
+            else float(os.getenv("AI_TIER_LOW_SIMILARITY", "0.05"))
+        self.high_similarity = high_similarity if high_similarity is not None \
+            else float(os.getenv("AI_TIER_HIGH_SIMILARITY", "0.85"))
+        self.min_words = min_words if min_words is not None \
+            else int(os.getenv("AI_TIER_MIN_WORDS", "8"))
+        # Porsi skor kualitas (calculate_essay_score) dalam skor lokal; sisanya dari kemiripan
+        self.quality_weight = quality_weight if quality_weight is not None \
+            else float(os.getenv("AI_TIER_QUALITY_WEIGHT", "0.2"))
+
+    @classmethod
+    def for_assignment(cls, assignment) -> "TierPolicy":
+        if assignment is None:
+            return cls()
+        return cls(
+            low_similarity=assignment.tier_low_similarity,
+            high_similarity=assignment.tier_high_similarity,
+            min_words=assignment.tier_min_words,
+        )
+
+    def as_dict(self) -> dict:
+        return {
+            "low_similarity": self.low_similarity,
+            "high_similarity": self.high_similarity,
+            "min_words": self.min_words,
+            "quality_weight": self.quality_weight,
+        }
+
+    def tier_for(self, similarity: float, word_count: int) -> str:
+        if similarity >= self.high_similarity:
+            return "near_key"
+        if similarity <= self.low_similarity:
+            return "off_topic"
+        if word_count < self.min_words:
+            return "short"
+        return "llm"
+
+
+def classify_answers(kunci: str, answers: list[str], policy: TierPolicy, vectorizer: str = "tfidf",
+                     score_low: float = 0.10, score_high: float = 0.80, keywords: list[str] | None = None,
+                     token_bags: list[dict | None] | None = None) -> list[dict]:
+    """
+    Tentukan tier setiap jawaban (semua dianggap sudah lolos validasi kosong).
+    `keywords` (kata kunci soal) ikut menentukan skor kualitas jawaban yang diputuskan lokal;
+    dicocokkan per stem memakai `token_bags` (Submission.token_bag, sejajar dengan answers).
+    Bag yang belum ada (jawaban lama / preview) dihitung di sini.
+    Return list dict {tier, similarity, quality, score (0-100, None jika "llm"), feedback}.
+    Tanpa kunci jawaban tidak ada sinyal kemiripan, sehingga semua dieskalasi ke LLM.
+    """
+    if not answers:
+        return []
+    if not (kunci or "").strip():
+        return [{"tier": "llm", "similarity": None, "quality": None, "score": None, "feedback": None}
+                for _ in answers]
+
+    sims = similarity_to_key(kunci, answers, vectorizer=vectorizer)
+    sim_scores = similarity_to_score(sims, score_low, score_high)
+
+    sims = [float(sim) for sim in sims]
+    tiers = [policy.tier_for(sim, len(jawaban.split())) for jawaban, sim in zip(answers, sims)]
+    local_idx = [i for i, tier in enumerate(tiers) if tier != "llm"]
+    bags = None
+    if keywords:
+        token_bags = token_bags or [None] * len(answers)
+        bags = [token_bags[i] if token_bags[i] is not None else token_bag(answers[i]) for i in local_idx]
+    scored = score_essays_batch([answers[i] for i in local_idx], keywords, token_bags=bags)
+    qualities = dict(zip(local_idx, (q for q, _ in scored)))
+
+    decisions = []
+    for i, (sim, sim_score, tier) in enumerate(zip(sims, sim_scores, tiers)):
+        if tier == "llm":
+            decisions.append({"tier": tier, "similarity": sim, "quality": None, "score": None, "feedback": None})
+            continue
+
+        quality = qualities[i]
+        if tier == "off_topic":
+            score = 0.0
+        else:
+            score = (1 - policy.quality_weight) * float(sim_score) + policy.quality_weight * quality
+        feedback = (f"{similarity_feedback(sim)}\n"
+                    f"Kualitas penulisan: {get_feedback_level(quality)} ({quality:.1f}/100).")
+        decisions.append({"tier": tier, "similarity": sim, "quality": quality,
+                          "score": round(score, 2), "feedback": feedback})
+    return decisions
@@ -0,0 +1,198 @@
+"""
+Benchmark throughput endpoint baca pada konkurensi tinggi: handler sync lama (Session + threadpool
+Starlette) vs handler async (AsyncSession asyncpg) untuk /submission/my, /course/my dan
+/assignment/{id}. Butuh database (env DB_*); data uji dibuat sekali per run.
+
+Aplikasi dijalankan in-process lewat httpx.ASGITransport; handler sync tetap berjalan di
+threadpool anyio seperti di uvicorn. Request sync lama dibatasi sebesar kapasitas pool engine
+sync (pool_size + max_overflow): tanpa batas itu, thread yang menunggu koneksi pool menghabiskan
+thread yang dibutuhkan teardown get_db untuk mengembalikan koneksi, sehingga handler sync macet
+sampai pool timeout (30 dtk) begitu konkurensi melebihi kapasitas pool.
+
+Contoh:
+    python -m benchmarks.db_throughput --requests 2000 --concurrency 50 200
+"""
+import time
+import uuid
+import asyncio
+import argparse
+import statistics
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException, Request
+from sqlalchemy.orm import Session, joinedload
+
+from app.database import SessionLocal, async_engine, engine
+from app.dependencies import get_db, get_current_active_user
+from app.models.assignments import Assignment
+from app.models.course import Course
+from app.models.course_enroll import CourseEnroll
+from app.models.grading import Grading
+from app.models.questions import Question
+from app.models.submissions import Submission
+from app.models.user import User
+from app.routers import assignment, course, submission
+from app.utils.auth import create_access_token
+
+
+def seed(assignments: int = 5, questions: int = 4) -> dict:
+    """1 dosen, 1 course, beberapa assignment; 1 mahasiswa yang submit + sebagian dinilai dosen."""
+    db = SessionLocal()
+    tag = uuid.uuid4().hex[:8]
+    try:
+        dosen = User(nama="Dosen Bench", nim_nip=f"bd{tag}", password="x", role="dosen", prodi="bench")
+        student = User(nama="Mahasiswa Bench", nim_nip=f"bm{tag}", password="x", role="mahasiswa", prodi="bench")
+        db.add_all([dosen, student])
+        db.flush()
+        c = Course(kode_course=f"B{tag}", nama_course="Benchmark", id_dosen=dosen.id_user, access_code="bench")
+        db.add(c)
+        db.flush()
+        db.add(CourseEnroll(id_course=c.id_course, id_mahasiswa=student.id_user))
+
+        ids = []
+        for a in range(assignments):
+            asg = Assignment(id_course=c.id_course, judul=f"Tugas {a + 1}", points=questions * 10, created_by=dosen.id_user)
+            db.add(asg)
+            db.flush()
+            ids.append(asg.id_assignment)
+            for n in range(questions):
+                q = Question(id_assignment=asg.id_assignment, nomor_soal=n + 1, teks_soal=f"Soal {n + 1}?",
+                             bobot=10, kunci_jawaban="Fotosintesis mengubah cahaya menjadi glukosa.")
+                db.add(q)
+                db.flush()
+                sub = Submission(id_assignment=asg.id_assignment, id_mahasiswa=student.id_user,
+                                 id_question=q.id_question, jawaban="Tumbuhan memakai cahaya untuk membuat glukosa.")
+                db.add(sub)
+                db.flush()
+                if a % 2 == 0:
+                    db.add(Grading(id_submission=sub.id_submission, skor_dosen=8))
+        db.commit()
+        return {"token": create_access_token({"sub": student.nim_nip}), "assignment": ids[0]}
+    finally:
+        db.close()
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(course.router, prefix="/course")
+    app.include_router(assignment.router, prefix="/assignment")
+    app.include_router(submission.router, prefix="/submission")
+
+    sync_gate = asyncio.Semaphore(engine.pool.size() + engine.pool._max_overflow)
+
+    @app.middleware("http")
+    async def limit_legacy(request: Request, call_next):
+        if not request.url.path.startswith("/legacy/"):
+            return await call_next(request)
+        async with sync_gate:
+            return await call_next(request)
+
+    # Salinan handler sync sebelum migrasi ke AsyncSession
+    @app.get("/legacy/submission/my")
+    def legacy_my_submissions(db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+        results = []
+        for (aid,) in db.query(Submission.id_assignment).filter(Submission.id_mahasiswa == current_user.id_user).distinct().all():
+            asg = db.query(Assignment).filter(Assignment.id_assignment == aid).first()
+            c = db.query(Course).filter(Course.id_course == asg.id_course).first()
+            last_sub = db.query(Submission).filter(
+                Submission.id_assignment == aid, Submission.id_mahasiswa == current_user.id_user
+            ).order_by(Submission.submitted_at.desc()).first()
+            grades = db.query(Grading).join(Submission).filter(
+                Submission.id_assignment == aid, Submission.id_mahasiswa == current_user.id_user
+            ).all()
+            graded = any(g.skor_dosen is not None for g in grades)
+            results.append({
+                "id_assignment": asg.id_assignment, "judul_assignment": asg.judul,
+                "nama_course": c.nama_course if c else "Unknown Course", "submitted_at": last_sub.submitted_at,
+                "status": "Graded" if graded else "Submitted",
+                "nilai": float(sum(g.skor_dosen for g in grades if g.skor_dosen)) if graded else 0.0,
+            })
+        return results
+
+    @app.get("/legacy/course/my")
+    def legacy_my_courses(db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+        enrollments = db.query(CourseEnroll).filter(
+            CourseEnroll.id_mahasiswa == current_user.id_user
+        ).options(joinedload(CourseEnroll.course)).all()
+        taught = db.query(Course).filter(Course.id_dosen == current_user.id_user).all()
+        combined = {c.id_course: c for c in [e.course for e in enrollments if e.course] + taught}
+        return [{"id_course": c.id_course, "kode_course": c.kode_course, "nama_course": c.nama_course,
+                 "access_code": c.access_code} for c in combined.values()]
+
+    @app.get("/legacy/assignment/{assignment_id}")
+    def legacy_assignment_detail(assignment_id: int, db: Session = Depends(get_db)):
+        asg = db.query(Assignment).filter(Assignment.id_assignment == assignment_id).first()
+        if not asg:
+            raise HTTPException(status_code=404, detail="Assignment tidak ditemukan")
+        asg.total_submitted = (
+            db.query(Submission.id_mahasiswa)
+            .join(Question, Question.id_question == Submission.id_question)
+            .filter(Question.id_assignment == assignment_id)
+            .distinct()
+            .count()
+        )
+        return assignment.AssignmentOut.model_validate(asg)
+
+    return app
+
+
+async def run(client: httpx.AsyncClient, path: str, headers: dict, total: int, concurrency: int) -> dict:
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    wall = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "rps": total / wall,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+async def main_async(args):
+    data = seed()
+    headers = {"Authorization": f"Bearer {data['token']}"}
+    endpoints = [
+        ("/submission/my", "/legacy/submission/my", "/submission/my"),
+        ("/course/my", "/legacy/course/my", "/course/my"),
+        ("/assignment/{id}", f"/legacy/assignment/{data['assignment']}", f"/assignment/{data['assignment']}"),
+    ]
+
+    transport = httpx.ASGITransport(app=build_app())
+    limits = httpx.Limits(max_connections=None)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", limits=limits, timeout=120) as client:
+        for _, legacy, current in endpoints:
+            # Respons sync lama dan async baru harus sama
+            old = (await client.get(legacy, headers=headers)).json()
+            new = (await client.get(current, headers=headers)).json()
+            assert old == new, (legacy, old, new)
+
+        print(f"{'endpoint':>18} {'conc':>5} {'sync_rps':>9} {'async_rps':>10} {'sync_p95_ms':>12} {'async_p95_ms':>13}")
+        for name, legacy, current in endpoints:
+            for concurrency in args.concurrency:
+                await run(client, current, headers, min(200, args.requests), concurrency)  # pemanasan pool
+                sync = await run(client, legacy, headers, args.requests, concurrency)
+                asyn = await run(client, current, headers, args.requests, concurrency)
+                print(f"{name:>18} {concurrency:>5} {sync['rps']:>9.0f} {asyn['rps']:>10.0f} "
+                      f"{sync['p95_ms']:>12.1f} {asyn['p95_ms']:>13.1f}")
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark throughput endpoint baca: Session sync vs AsyncSession.")
+    parser.add_argument("--requests", type=int, default=2000, help="jumlah request per pengukuran")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200], help="request bersamaan")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
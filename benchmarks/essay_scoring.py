@@ -0,0 +1,61 @@
+"""
+Benchmark calculate_essay_score (per essay) vs score_essays_batch (satu pass untuk semua jawaban).
+
+Contoh:
+    python -m benchmarks.essay_scoring -n 2000 --words 250
+"""
+import time
+import random
+import argparse
+
+from app.utils.scoring import calculate_essay_score, score_essays_batch
+
+KALIMAT = [
+    "Fotosintesis terjadi di kloroplas dengan bantuan klorofil.",
+    "Tumbuhan menyerap air dan karbon dioksida, namun membutuhkan cahaya.",
+    "Oleh karena itu cahaya matahari menjadi sumber energi utama.",
+    "Hasilnya adalah glukosa dan oksigen; keduanya penting bagi makhluk hidup.",
+    "proses ini juga memengaruhi rantai makanan karena tumbuhan adalah produsen.",
+    "Lebih lanjut, respirasi sel berbeda dengan fotosintesis.",
+]
+KEYWORDS = ["fotosintesis", "klorofil", "glukosa", "oksigen", "kloroplas"]
+
+
+def make_essays(n: int, words: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    essays = []
+    for _ in range(n):
+        parts, count = [], 0
+        while count < words:
+            sentence = rng.choice(KALIMAT)
+            parts.append(sentence)
+            count += len(sentence.split())
+        essays.append(" ".join(parts))
+    return essays
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark skor essay skalar vs batch.")
+    parser.add_argument("-n", "--essays", type=int, default=1000, help="jumlah essay")
+    parser.add_argument("--words", type=int, default=200, help="perkiraan jumlah kata per essay")
+    args = parser.parse_args()
+
+    essays = make_essays(args.essays, args.words)
+
+    start = time.perf_counter()
+    scalar = [calculate_essay_score(e, KEYWORDS) for e in essays]
+    scalar_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = score_essays_batch(essays, KEYWORDS)
+    batch_s = time.perf_counter() - start
+
+    print(f"{'essays':>12}: {len(essays)}")
+    print(f"{'scalar_ms':>12}: {scalar_s * 1000:.1f}")
+    print(f"{'batch_ms':>12}: {batch_s * 1000:.1f}")
+    print(f"{'speedup':>12}: {scalar_s / batch_s:.2f}x" if batch_s else "")
+    print(f"{'identical':>12}: {scalar == batch}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Benchmark pencocokan keyword: loop `keyword in teks` vs KeywordMatcher (Aho-Corasick),
+untuk beberapa ukuran rubrik. Biaya loop naik linear dengan jumlah keyword, matcher tidak.
+
+Contoh:
+    python -m benchmarks.keyword_matching -n 1000 --words 300 --keywords 20 200 2000
+"""
+import time
+import argparse
+
+from app.utils.keyword_matcher import KeywordMatcher
+from benchmarks.essay_scoring import KEYWORDS, make_essays
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark loop keyword vs automaton Aho-Corasick.")
+    parser.add_argument("-n", "--essays", type=int, default=1000, help="jumlah essay")
+    parser.add_argument("--words", type=int, default=300, help="perkiraan jumlah kata per essay")
+    parser.add_argument("--keywords", type=int, nargs="+", default=[20, 200, 2000], help="ukuran set keyword")
+    args = parser.parse_args()
+
+    essays = [e.lower() for e in make_essays(args.essays, args.words)]
+
+    print(f"{'keywords':>9} {'loop_ms':>9} {'substr_ms':>10} {'words_ms':>9} {'identical':>10}")
+    for n in args.keywords:
+        keywords = tuple(KEYWORDS) + tuple(f"istilah{i}" for i in range(max(0, n - len(KEYWORDS))))
+
+        start = time.perf_counter()
+        loop = [[kw for kw in keywords if kw in e] for e in essays]
+        loop_s = time.perf_counter() - start
+
+        matcher = KeywordMatcher(keywords)
+        start = time.perf_counter()
+        substr = [matcher.matches(e, lowered=True) for e in essays]
+        substr_s = time.perf_counter() - start
+
+        matcher = KeywordMatcher(keywords, word_boundary=True)
+        start = time.perf_counter()
+        [matcher.matches(e, lowered=True) for e in essays]
+        words_s = time.perf_counter() - start
+
+        print(f"{len(keywords):>9} {loop_s * 1000:>9.1f} {substr_s * 1000:>10.1f} {words_s * 1000:>9.1f} "
+              f"{str(loop == substr):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark throughput & tail latency penilaian LLM tanpa biaya Gemini.
+
+Contoh (backend tiruan in-process, latency lognormal median 800ms, 5% error 503):
+    AI_GRADER_BACKEND=fake FAKE_LLM_ERROR_RATE=0.05 python -m benchmarks.llm_grading -n 200 -c 10
+
+Rekam sekali dari Gemini asli lalu putar ulang secara offline:
+    AI_CASSETTE_MODE=record AI_CASSETTE_PATH=cassettes/run1.jsonl python -m benchmarks.llm_grading -n 50
+    AI_CASSETTE_MODE=replay AI_CASSETTE_PATH=cassettes/run1.jsonl python -m benchmarks.llm_grading -n 50
+"""
+import os
+import time
+import asyncio
+import argparse
+
+# Cache hasil harus mati agar setiap jawaban benar-benar memanggil backend
+os.environ.setdefault("AI_CACHE_PERSIST", "false")
+
+from app.utils.ai_grader import grader  # noqa: E402
+
+SOAL = "Jelaskan proses fotosintesis pada tumbuhan."
+KUNCI = ("Fotosintesis adalah proses tumbuhan hijau mengubah air dan karbon dioksida menjadi glukosa "
+         "dan oksigen dengan bantuan cahaya matahari yang diserap klorofil di kloroplas.")
+KALIMAT = [
+    "Fotosintesis terjadi di kloroplas dengan bantuan klorofil.",
+    "Tumbuhan menyerap air dan karbon dioksida.",
+    "Cahaya matahari menjadi sumber energi utama.",
+    "Hasilnya adalah glukosa dan oksigen.",
+    "Proses ini penting bagi rantai makanan.",
+    "Respirasi sel berbeda dengan fotosintesis.",
+]
+
+
+def make_answers(n: int) -> list[str]:
+    """Jawaban sintetis yang deterministik dan berbeda-beda (tidak kena dedup/cache)."""
+    answers = []
+    for i in range(n):
+        picked = [KALIMAT[(i + j) % len(KALIMAT)] for j in range(1 + i % 4)]
+        answers.append(f"Jawaban mahasiswa {i}: " + " ".join(picked))
+    return answers
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    idx = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+async def run(n: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, methods = [], {}
+
+    async def one(jawaban: str):
+        async with semaphore:
+            start = time.perf_counter()
+            result = await grader.agrade_essay(SOAL, KUNCI, jawaban, 10.0)
+            latencies.append(time.perf_counter() - start)
+            methods[result["method"]] = methods.get(result["method"], 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(j) for j in make_answers(n)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "backend": grader.backend,
+        "answers": n,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_per_s": round(n / elapsed, 2) if elapsed else None,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "max_ms": round(max(latencies) * 1000, 1) if latencies else 0.0,
+        "methods": methods,
+        "breaker": grader.breaker.stats()["state"],
+        "hedge": {k: grader.hedge_stats()[k] for k in ("fired", "won", "rerouted")},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark penilaian LLM (throughput & tail latency).")
+    parser.add_argument("-n", "--answers", type=int, default=100, help="jumlah jawaban yang dinilai")
+    parser.add_argument("-c", "--concurrency", type=int, default=grader.max_concurrency, help="panggilan paralel")
+    args = parser.parse_args()
+
+    if not grader.client:
+        raise SystemExit("Backend LLM tidak aktif. Set AI_GRADER_BACKEND=fake, GEMINI_API_KEY, atau AI_CASSETTE_MODE=replay.")
+
+    grader.cache.clear_memory()
+    for key, value in asyncio.run(run(args.answers, args.concurrency)).items():
+        print(f"{key:>18}: {value}")
+
+
+if __name__ == "__main__":
+    main()
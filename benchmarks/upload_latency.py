@@ -0,0 +1,148 @@
+"""
+Benchmark lag event loop selama upload PDF: handler lama (baca penuh + PdfReader di event loop)
+vs pipeline baru (spool + process pool). Selama upload berjalan, sebuah ticker tidur 10 ms
+berulang dan mencatat keterlambatannya; request ringan /ping (dijadwalkan tiap 50 ms) diukur
+latency-nya.
+
+Contoh:
+    python -m benchmarks.upload_latency --pages 200 --uploads 4
+"""
+import io
+import time
+import asyncio
+import argparse
+import statistics
+
+import httpx
+from fastapi import FastAPI, File, UploadFile
+from PyPDF2 import PdfReader
+
+from app.routers import upload
+from app.utils.file_extract import ExtractionCache, pdf_extractor
+from benchmarks.essay_scoring import make_essays
+
+TICK_SECONDS = 0.01
+
+
+def make_pdf(pages: int, words_per_page: int = 300, seed: int = 0) -> bytes:
+    """PDF teks sederhana (satu font Helvetica, satu baris teks per ~12 kata per halaman)."""
+    texts = make_essays(pages, words_per_page, seed=seed)
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in texts:
+        words = text.replace("\\", "").replace("(", "").replace(")", "").split()
+        lines = [" ".join(words[i:i + 12]) for i in range(0, len(words), 12)]
+        stream = "BT /F1 10 Tf 12 TL 40 800 Td " + " ".join(f"({line}) '" for line in lines) + " ET"
+        objects.append(f"<< /Length {len(stream.encode('latin-1', 'replace'))} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1", "replace"))
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(upload.router, prefix="/upload")
+
+    @app.post("/legacy/file")
+    async def legacy_upload(file: UploadFile = File(...)):
+        # Salinan handler sebelum pipeline non-blocking
+        content = await file.read()
+        reader = PdfReader(io.BytesIO(content))
+        text = ""
+        for page in reader.pages:
+            page_text = page.extract_text()
+            if page_text:
+                text += page_text + "\n"
+        return {"filename": file.filename, "word_count": len(text.split())}
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+async def run(client: httpx.AsyncClient, path: str, pdf: bytes, uploads: int) -> dict:
+    lags: list[float] = []
+    pings: list[float] = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK_SECONDS)
+            lags.append(time.perf_counter() - start - TICK_SECONDS)
+
+    async def pinger():
+        # Latency dihitung dari jadwal kirim, jadi waktu tertahan di event loop ikut terukur
+        scheduled = time.perf_counter()
+        while not done.is_set():
+            scheduled += 0.05
+            await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+            await client.get("/ping")
+            pings.append(time.perf_counter() - scheduled)
+
+    async def one(i: int):
+        response = await client.post(path, files={"file": (f"esai{i}.pdf", pdf, "application/pdf")})
+        response.raise_for_status()
+        return response.json()["word_count"]
+
+    background = [asyncio.create_task(ticker()), asyncio.create_task(pinger())]
+    start = time.perf_counter()
+    counts = await asyncio.gather(*(one(i) for i in range(uploads)))
+    wall = time.perf_counter() - start
+    done.set()
+    await asyncio.gather(*background)
+
+    return {
+        "wall_s": wall,
+        "lag_max_ms": max(lags, default=0.0) * 1000,
+        "lag_p95_ms": (statistics.quantiles(lags, n=20, method="inclusive")[-1] if len(lags) >= 2 else max(lags, default=0.0)) * 1000,
+        "ping_max_ms": max(pings, default=0.0) * 1000,
+        "words": counts[0],
+    }
+
+
+async def main_async(args):
+    pdf = make_pdf(args.pages, args.words)
+    # Tanpa cache ekstraksi: setiap upload diukur dengan ekstraksi penuh
+    pdf_extractor.cache = ExtractionCache("")
+    transport = httpx.ASGITransport(app=build_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Pemanasan: proses anak spawn dibuat sebelum pengukuran
+        await client.post("/upload/file", files={"file": ("warm.pdf", make_pdf(1, 20), "application/pdf")})
+
+        print(f"PDF {args.pages} halaman, {len(pdf) / 1024:.0f} KiB, {args.uploads} upload bersamaan")
+        print(f"{'handler':>9} {'wall_s':>8} {'lag_p95_ms':>11} {'lag_max_ms':>11} {'ping_max_ms':>12} {'words':>7}")
+        for name, path in (("legacy", "/legacy/file"), ("pipeline", "/upload/file")):
+            r = await run(client, path, pdf, args.uploads)
+            print(f"{name:>9} {r['wall_s']:>8.2f} {r['lag_p95_ms']:>11.1f} {r['lag_max_ms']:>11.1f} "
+                  f"{r['ping_max_ms']:>12.1f} {r['words']:>7}")
+    pdf_extractor.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark lag event loop selama upload PDF.")
+    parser.add_argument("--pages", type=int, default=200, help="jumlah halaman PDF")
+    parser.add_argument("--words", type=int, default=300, help="perkiraan jumlah kata per halaman")
+    parser.add_argument("--uploads", type=int, default=4, help="jumlah upload bersamaan")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
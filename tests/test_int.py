@@ -46,4 +46,531 @@ def test_system_log_model_usage():
     """Menaikkan coverage app/models/system_logs.py"""
     from app.models.system_logs import SystemLog
     log = SystemLog(aksi="Test Coverage")
-    assert log.aksi == "Test Coverage"
\ No newline at end of file
+    assert log.aksi == "Test Coverage"
+
+# ==========================================
+# Job AI grading (DB): klaim SKIP LOCKED, retry, endpoint status job
+# ==========================================
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+@pytest.fixture
+def grading_data():
+    """1 dosen, 1 assignment dengan 2 soal, 3 mahasiswa yang menjawab semua soal; dihapus lagi setelah test."""
+    from app.database import SessionLocal
+    from app.models.assignments import Assignment
+    from app.models.course import Course
+    from app.models.grading import Grading
+    from app.models.grading_job import GradingJob, GradingJobItem
+    from app.models.ingest_job import IngestJob
+    from app.models.questions import Question
+    from app.models.submissions import Submission
+    from app.models.user import User
+    from app.utils.auth import create_access_token
+
+    db = SessionLocal()
+    tag = uuid.uuid4().hex[:8]
+    dosen = User(nama="Dosen Job", nim_nip=f"jd{tag}", password="x", role="dosen", prodi="test")
+    students = [User(nama=f"Mhs {i}", nim_nip=f"jm{tag}{i}", password="x", role="mahasiswa", prodi="test") for i in range(3)]
+    db.add_all([dosen, *students])
+    db.flush()
+    course = Course(kode_course=f"J{tag}", nama_course="Job Test", id_dosen=dosen.id_user, access_code="job")
+    db.add(course)
+    db.flush()
+    assignment = Assignment(id_course=course.id_course, judul="Tugas Job", points=20, created_by=dosen.id_user)
+    db.add(assignment)
+    db.flush()
+    questions = [
+        Question(id_assignment=assignment.id_assignment, nomor_soal=n + 1, teks_soal=f"Soal job {n + 1}?",
+                 bobot=10, kunci_jawaban="Fotosintesis mengubah cahaya menjadi glukosa.")
+        for n in range(2)
+    ]
+    db.add_all(questions)
+    db.flush()
+    submissions = [
+        Submission(id_assignment=assignment.id_assignment, id_mahasiswa=s.id_user, id_question=q.id_question,
+                   jawaban=f"Tumbuhan memakai cahaya untuk membuat glukosa ({s.nama}, soal {q.nomor_soal}).")
+        for q in questions for s in students
+    ]
+    db.add_all(submissions)
+    db.commit()
+
+    data = {
+        "assignment": assignment.id_assignment,
+        "questions": [q.id_question for q in questions],
+        "students": [s.id_user for s in students],
+        "submissions": [s.id_submission for s in submissions],
+        "question_of": {s.id_submission: s.id_question for s in submissions},
+        "dosen": dosen.id_user,
+        "headers": {"Authorization": f"Bearer {create_access_token({'sub': dosen.nim_nip})}"},
+        "student_headers": [{"Authorization": f"Bearer {create_access_token({'sub': s.nim_nip})}"} for s in students],
+    }
+    try:
+        yield data
+    finally:
+        db.rollback()
+        sub_ids = data["submissions"]
+        job_ids = [j for (j,) in db.query(GradingJob.id_job).filter(GradingJob.id_assignment == assignment.id_assignment)]
+        db.query(GradingJobItem).filter(GradingJobItem.id_job.in_(job_ids)).delete(synchronize_session=False)
+        db.query(GradingJob).filter(GradingJob.id_job.in_(job_ids)).delete(synchronize_session=False)
+        db.query(IngestJob).filter(IngestJob.id_assignment == assignment.id_assignment).delete(synchronize_session=False)
+        db.query(Grading).filter(Grading.id_submission.in_(sub_ids)).delete(synchronize_session=False)
+        db.query(Submission).filter(Submission.id_submission.in_(sub_ids)).delete(synchronize_session=False)
+        db.query(Question).filter(Question.id_assignment == assignment.id_assignment).delete(synchronize_session=False)
+        db.query(Assignment).filter(Assignment.id_assignment == assignment.id_assignment).delete(synchronize_session=False)
+        db.query(Course).filter(Course.id_course == course.id_course).delete(synchronize_session=False)
+        db.query(User).filter(User.id_user.in_([dosen.id_user, *data["students"]])).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+
+@pytest.fixture
+def job_client(monkeypatch):
+    """Router predict + submission tanpa worker global; test menjalankan GradingWorkerPool sendiri."""
+    from fastapi import FastAPI
+    from app.database import async_engine
+    from app.routers import predict, submission
+    from app.utils.ai_grader import CircuitBreaker, grader
+
+    monkeypatch.setattr(predict.grading_workers, "start", lambda: None)
+    monkeypatch.setattr(grader, "breaker", CircuitBreaker())
+    app_ = FastAPI()
+    app_.include_router(predict.router, prefix="/predict")
+    app_.include_router(submission.router, prefix="/submission")
+    with TestClient(app_) as c:
+        yield c
+        # Koneksi asyncpg terikat ke event loop TestClient ini; tutup sebelum loop berhenti
+        c.portal.call(async_engine.dispose)
+
+
+def _fake_grade_batch(result):
+    def grade_batch(**kwargs):
+        return [dict(result) for _ in kwargs["jawaban_list"]]
+    return grade_batch
+
+
+def _drain(pool):
+    rounds = 0
+    while pool.process_next():
+        rounds += 1
+    return rounds
+
+
+def test_grading_job_completes_and_reports_progress(grading_data, job_client, monkeypatch):
+    from app.database import SessionLocal
+    from app.models.grading import Grading
+    from app.utils.ai_grader import grader
+    from app.utils.grading_worker import GradingWorkerPool
+
+    ok = {"final_score": 7.5, "llm_score": 75.0, "feedback": "Bagus.", "method": "LLM", "backend": "fake"}
+    monkeypatch.setattr(grader, "grade_batch", _fake_grade_batch(ok))
+
+    res = job_client.post(f"/predict/jobs/assignment/{grading_data['assignment']}", headers=grading_data["headers"])
+    assert res.status_code == 202
+    job = res.json()
+    assert job["status"] == "queued" and job["total_items"] == 6
+
+    # Submission yang sudah di antrean aktif tidak dimasukkan ke job kedua
+    again = job_client.post(f"/predict/jobs/assignment/{grading_data['assignment']}", headers=grading_data["headers"])
+    assert again.json() == {"id_job": None, "status": "nothing_to_do", "total_items": 0}
+
+    pool = GradingWorkerPool(workers=0)
+    pool.claim_size = 32
+    # Satu klaim = semua item dari satu soal -> 2 batch untuk 2 soal
+    assert _drain(pool) == 2
+
+    status_ = job_client.get(f"/predict/jobs/{job['id_job']}", headers=grading_data["headers"]).json()
+    assert status_["status"] == "completed"
+    assert status_["done"] == 6 and status_["pending"] == status_["failed"] == 0
+    assert status_["progress_percent"] == 100.0 and status_["finished_at"] is not None
+
+    db = SessionLocal()
+    try:
+        grades = db.query(Grading).filter(Grading.id_submission.in_(grading_data["submissions"])).all()
+        assert len(grades) == 6
+        assert {float(g.skor_ai) for g in grades} == {7.5} and {g.ai_backend for g in grades} == {"fake"}
+    finally:
+        db.close()
+
+    assert job_client.get("/predict/jobs/999999999", headers=grading_data["headers"]).status_code == 404
+
+
+@pytest.mark.parametrize("bad_result", [
+    {"final_score": 4.0, "llm_score": 0.0, "feedback": "[Penilaian sementara tanpa AI]", "method": "Heuristic", "fallback": True},
+    {"final_score": 0.0, "llm_score": 0.0, "feedback": "Gagal terhubung ke AI", "method": "Error"},
+])
+def test_grading_job_retries_failed_ai_results_then_fails(grading_data, job_client, monkeypatch, bad_result):
+    from app.database import SessionLocal
+    from app.models.grading import Grading
+    from app.models.grading_job import GradingJobItem
+    from app.utils.ai_grader import grader
+    from app.utils.grading_worker import GradingWorkerPool, enqueue_submissions
+
+    monkeypatch.setattr(grader, "grade_batch", _fake_grade_batch(bad_result))
+    sub_ids = grading_data["submissions"][:3]  # semua dari soal pertama
+    db = SessionLocal()
+    try:
+        job = enqueue_submissions(db, grading_data["assignment"], sub_ids)
+        db.commit()
+        id_job = job.id_job
+    finally:
+        db.close()
+
+    pool = GradingWorkerPool(workers=0, max_attempts=2)
+    pool.retry_base_seconds = 60.0
+
+    # Percobaan pertama gagal -> kembali pending dengan available_at di masa depan (backoff)
+    assert pool.process_next() is True
+    assert pool.process_next() is False
+    db = SessionLocal()
+    try:
+        items = db.query(GradingJobItem).filter(GradingJobItem.id_job == id_job).all()
+        assert {(i.status, i.attempts) for i in items} == {("pending", 1)}
+        assert all(i.available_at is not None and i.error for i in items)
+
+        # Lewati jeda backoff; percobaan kedua = maksimum -> failed
+        for item in items:
+            item.available_at = None
+        db.commit()
+    finally:
+        db.close()
+    assert _drain(pool) == 1
+
+    status_ = job_client.get(f"/predict/jobs/{id_job}", headers=grading_data["headers"]).json()
+    assert status_["status"] == "completed_with_errors"
+    assert status_["failed"] == 3 and status_["done"] == 0
+    assert {f["attempts"] for f in status_["failures"]} == {2}
+
+    db = SessionLocal()
+    try:
+        # Skor fallback / error tidak pernah tersimpan sebagai skor AI
+        assert db.query(Grading).filter(Grading.id_submission.in_(sub_ids)).count() == 0
+    finally:
+        db.close()
+
+
+def test_grading_workers_never_claim_the_same_item(grading_data, job_client):
+    from app.database import SessionLocal
+    from app.utils.grading_worker import GradingWorkerPool, enqueue_submissions
+
+    db = SessionLocal()
+    try:
+        enqueue_submissions(db, grading_data["assignment"], grading_data["submissions"])
+        db.commit()
+    finally:
+        db.close()
+
+    pool = GradingWorkerPool(workers=0)
+
+    def worker(_):
+        claimed = []
+        session = SessionLocal()
+        try:
+            while True:
+                batch = pool._claim(session, batch_size=2)
+                if not batch:
+                    return claimed
+                claimed.append([(item.id_item, item.id_submission) for item in batch])
+        finally:
+            session.close()
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        batches = [batch for claimed in executor.map(worker, range(4)) for batch in claimed]
+
+    claimed_subs = [sid for batch in batches for _, sid in batch]
+    assert sorted(claimed_subs) == sorted(grading_data["submissions"])  # tiap item tepat sekali
+    for batch in batches:
+        assert 1 <= len(batch) <= 2
+        assert len({grading_data["question_of"][sid] for _, sid in batch}) == 1  # 1 batch = 1 soal
+
+
+def test_save_endpoints_do_not_store_fallback_or_failed_ai_scores(grading_data, job_client, monkeypatch):
+    from app.database import SessionLocal
+    from app.models.grading import Grading
+    from app.utils.ai_grader import grader
+
+    fallback = {"final_score": 4.0, "llm_score": 0.0, "feedback": "[Penilaian sementara tanpa AI]",
+                "method": "Heuristic", "fallback": True}
+    failed = {"final_score": 0.0, "llm_score": 0.0, "feedback": "Gagal terhubung ke AI", "method": "Error"}
+    ok = {"final_score": 8.0, "llm_score": 80.0, "feedback": "Bagus.", "method": "LLM", "backend": "fake"}
+
+    async def agrade_many(items, concurrency=None):
+        return [dict(r) for r in (fallback, failed, ok)][:len(items)]
+
+    monkeypatch.setattr(grader, "grade_essay", lambda **kwargs: dict(fallback))
+    monkeypatch.setattr(grader, "agrade_many", agrade_many)
+
+    sub_id = grading_data["submissions"][0]
+    res = job_client.post("/predict/grade", json={"id_submission": sub_id}, headers=grading_data["headers"])
+    assert res.status_code == 503
+
+    # 1 mahasiswa menjawab 2 soal -> hasil fallback (503) dan AI gagal (502), tidak ada yang tersimpan
+    student = grading_data["students"][0]
+    res = job_client.post(f"/predict/grade/assignment/{grading_data['assignment']}/student/{student}",
+                          json={}, headers=grading_data["headers"])
+    assert res.status_code == 200
+    assert sorted((r["saved"], r["status_code"], r["skor_ai"]) for r in res.json()) == [(False, 502, None), (False, 503, None)]
+
+    monkeypatch.setattr(grader, "grade_essay", lambda **kwargs: dict(ok))
+    res = job_client.post("/predict/grade", json={"id_submission": sub_id}, headers=grading_data["headers"])
+    assert res.status_code == 200 and res.json()["skor_ai"] == 8.0
+
+    db = SessionLocal()
+    try:
+        grades = db.query(Grading).filter(Grading.id_submission.in_(grading_data["submissions"])).all()
+        assert [(g.id_submission, float(g.skor_ai), g.ai_backend) for g in grades] == [(sub_id, 8.0, "fake")]
+    finally:
+        db.close()
+
+
+def test_bulk_endpoints_release_the_db_connection_while_grading(grading_data, job_client, monkeypatch):
+    from app.database import SessionLocal, async_engine
+    from app.models.grading import Grading
+    from app.utils.ai_grader import grader
+
+    checked_out = []
+
+    async def agrade_many(items, concurrency=None):
+        checked_out.append(async_engine.pool.checkedout())
+        return [{"final_score": 7.0, "llm_score": 70.0, "feedback": "Cukup.", "method": "LLM"} for _ in items]
+
+    monkeypatch.setattr(grader, "agrade_many", agrade_many)
+    student = grading_data["students"][0]
+    for path in ("predict/assignment", "grade/assignment"):
+        res = job_client.post(f"/predict/{path}/{grading_data['assignment']}/student/{student}",
+                              json={}, headers=grading_data["headers"])
+        assert res.status_code == 200 and [r["skor_ai"] for r in res.json()] == [7.0, 7.0]
+    assert checked_out == [0, 0]
+
+    # Upsert setelah fan-out berjalan di transaksi baru dan tetap tersimpan
+    db = SessionLocal()
+    try:
+        assert db.query(Grading).filter(Grading.id_submission.in_(grading_data["submissions"])).count() == 2
+    finally:
+        db.close()
+
+
+def test_predict_stream_loads_submission_through_async_session(grading_data, job_client, monkeypatch):
+    from app.utils.ai_grader import grader
+    from app.utils.llm_metrics import _scope
+
+    seen = {}
+
+    async def agrade_essay_stream(soal, kunci, jawaban, bobot, method=None, tier_policy=None, keywords=None):
+        seen.update(soal=soal, bobot=bobot, scope=_scope.get())
+        yield "feedback", "Jawaban "
+        yield "result", {"final_score": 6.0, "feedback": "Jawaban cukup.", "method": "LLM", "backend": "fake"}
+
+    monkeypatch.setattr(grader, "agrade_essay_stream", agrade_essay_stream)
+    sub_id = grading_data["submissions"][0]
+    res = job_client.post("/predict/predict/stream", json={"id_submission": sub_id}, headers=grading_data["headers"])
+    assert res.status_code == 200
+
+    events = [block.split("\n")[0].removeprefix("event: ") for block in res.text.strip().split("\n\n")]
+    assert events == ["start", "feedback", "result"]
+    assert '"skor_ai": 6.0' in res.text
+    assert seen["soal"] == "Soal job 1?" and seen["bobot"] == 10.0
+    assert seen["scope"][1] == grading_data["assignment"] and seen["scope"][0] is not None
+
+    assert job_client.post("/predict/predict/stream", json={"id_submission": 999999999},
+                           headers=grading_data["headers"]).status_code == 404
+
+
+def test_resubmit_within_debounce_moves_the_pending_item_instead_of_adding_one(grading_data, job_client, monkeypatch):
+    from sqlalchemy import func
+    from app.database import SessionLocal
+    from app.models.grading_job import GradingJob, GradingJobItem
+    from app.routers import submission
+    from app.utils.grading_worker import GradingWorkerPool
+
+    monkeypatch.setattr(submission, "EAGER_GRADING_ENABLED", True)
+    sub_id, id_question = grading_data["submissions"][0], grading_data["questions"][0]
+    headers = grading_data["student_headers"][0]
+
+    def submit(jawaban):
+        res = job_client.post("/submission/", headers=headers, json={
+            "id_assignment": grading_data["assignment"], "items": [{"id_question": id_question, "jawaban": jawaban}]
+        })
+        assert res.status_code == 201
+
+    def pending_items(db):
+        db.expire_all()
+        return db.query(GradingJobItem).filter(GradingJobItem.id_submission == sub_id).all()
+
+    db = SessionLocal()
+    try:
+        submit("Versi pertama: tumbuhan memakai cahaya.")
+        [item] = pending_items(db)
+        first_available = item.available_at
+        assert item.status == "pending" and first_available > db.query(func.localtimestamp()).scalar()
+
+        # Item belum tersedia (masih dalam jeda debounce) tidak diklaim worker
+        pool = GradingWorkerPool(workers=0)
+        worker_db = SessionLocal()
+        try:
+            assert sub_id not in [i.id_submission for i in pool._claim(worker_db, batch_size=8)]
+        finally:
+            worker_db.close()
+
+        # Submit ulang dalam jeda: item yang sama digeser, tidak ada item / job baru
+        submit("Versi kedua: tumbuhan memakai cahaya untuk membuat glukosa.")
+        [item] = pending_items(db)
+        assert item.status == "pending" and item.available_at > first_available
+        assert db.query(GradingJob).filter(GradingJob.id_assignment == grading_data["assignment"]).count() == 1
+
+        # Setelah jeda lewat, item diklaim
+        item.available_at = func.localtimestamp()
+        db.commit()
+        worker_db = SessionLocal()
+        try:
+            assert sub_id in [i.id_submission for i in pool._claim(worker_db, batch_size=8)]
+        finally:
+            worker_db.close()
+    finally:
+        db.close()
+
+
+def test_submit_commits_answers_when_eager_enqueue_fails(grading_data, job_client, monkeypatch):
+    from app.database import SessionLocal
+    from app.models.grading_job import GradingJobItem
+    from app.models.submissions import Submission
+    from app.routers import submission
+
+    def broken_enqueue(*args, **kwargs):
+        raise RuntimeError("antrean tidak tersedia")
+
+    monkeypatch.setattr(submission, "EAGER_GRADING_ENABLED", True)
+    monkeypatch.setattr(submission, "enqueue_debounced", broken_enqueue)
+    sub_id, id_question = grading_data["submissions"][0], grading_data["questions"][0]
+
+    res = job_client.post("/submission/", headers=grading_data["student_headers"][0], json={
+        "id_assignment": grading_data["assignment"],
+        "items": [{"id_question": id_question, "jawaban": "Jawaban baru yang tetap harus tersimpan."}]
+    })
+    assert res.status_code == 201 and res.json()["total_saved"] == 1
+
+    db = SessionLocal()
+    try:
+        sub = db.query(Submission).filter(Submission.id_submission == sub_id).first()
+        assert sub.jawaban == "Jawaban baru yang tetap harus tersimpan."
+        assert db.query(GradingJobItem).filter(GradingJobItem.id_submission == sub_id).count() == 0
+    finally:
+        db.close()
+
+
+def test_archive_ingest_batch_queues_eager_grading_like_submit(grading_data, monkeypatch):
+    from app.database import SessionLocal
+    from app.models.grading_job import GradingJob, GradingJobItem
+    from app.models.ingest_job import IngestJob
+    from app.models.submissions import Submission
+    from app.utils import archive_ingest
+
+    started = []
+    monkeypatch.setattr(archive_ingest, "EAGER_GRADING_ENABLED", True)
+    monkeypatch.setattr(archive_ingest.grading_workers, "start", lambda: started.append(True))
+
+    db = SessionLocal()
+    try:
+        ingest = IngestJob(id_assignment=grading_data["assignment"], created_by=grading_data["dosen"],
+                           status="running", total_files=2)
+        db.add(ingest)
+        db.commit()
+
+        student = grading_data["students"][0]
+        rows = [(student, q, f"Jawaban dari arsip untuk soal {q}: cahaya dan glukosa.") for q in grading_data["questions"]]
+        archive_ingest._store_batch(ingest.id_job, grading_data["assignment"], rows, [])
+
+        db.expire_all()
+        subs = db.query(Submission).filter(Submission.id_mahasiswa == student).all()
+        assert {s.jawaban for s in subs} == {r[2] for r in rows}
+        items = db.query(GradingJobItem).filter(GradingJobItem.id_submission.in_([s.id_submission for s in subs])).all()
+        assert len(items) == 2 and {i.status for i in items} == {"pending"}
+        job = db.query(GradingJob).filter(GradingJob.id_job == items[0].id_job).first()
+        assert job.source == "eager" and job.created_by == grading_data["dosen"]
+        assert started == [True]
+        assert db.query(IngestJob).filter(IngestJob.id_job == ingest.id_job).first().updated_count == 2
+    finally:
+        db.close()
+
+
+def test_update_assignment_keeps_tier_thresholds_the_client_did_not_send(grading_data):
+    from fastapi import FastAPI
+    from app.database import SessionLocal
+    from app.models.assignments import Assignment
+    from app.models.questions import Question
+    from app.routers import assignment
+
+    id_assignment = grading_data["assignment"]
+    db = SessionLocal()
+    try:
+        db.query(Assignment).filter(Assignment.id_assignment == id_assignment).update(
+            {"tier_low_similarity": 0.1, "tier_high_similarity": 0.7, "tier_min_words": 5})
+        db.commit()
+        questions = [
+            {"id_question": q.id_question, "nomor_soal": q.nomor_soal, "teks_soal": q.teks_soal,
+             "bobot": q.bobot, "kunci_jawaban": q.kunci_jawaban}
+            for q in db.query(Question).filter(Question.id_assignment == id_assignment)
+        ]
+        course = db.query(Assignment.id_course).filter(Assignment.id_assignment == id_assignment).scalar()
+    finally:
+        db.close()
+
+    app_ = FastAPI()
+    app_.include_router(assignment.router, prefix="/assignment")
+    body = {"id_course": course, "judul": "Tugas Job (edit)", "questions": questions}
+    with TestClient(app_) as client:
+        res = client.put(f"/assignment/{id_assignment}", headers=grading_data["headers"], json=body)
+        assert res.status_code == 200, res.text
+        assert res.json()["tier_low_similarity"] == 0.1
+        assert res.json()["tier_high_similarity"] == 0.7 and res.json()["tier_min_words"] == 5
+
+        res = client.put(f"/assignment/{id_assignment}", headers=grading_data["headers"],
+                         json={**body, "tier_high_similarity": None, "tier_min_words": 3})
+        assert res.status_code == 200, res.text
+        assert res.json()["tier_high_similarity"] is None and res.json()["tier_min_words"] == 3
+        assert res.json()["tier_low_similarity"] == 0.1
+
+        # low >= high ditolak tanpa mengubah ambang yang tersimpan
+        res = client.put(f"/assignment/{id_assignment}", headers=grading_data["headers"],
+                         json={**body, "tier_low_similarity": 0.9, "tier_high_similarity": 0.6})
+        assert res.status_code == 400
+
+    db = SessionLocal()
+    try:
+        saved = db.query(Assignment).filter(Assignment.id_assignment == id_assignment).first()
+        assert (saved.tier_low_similarity, saved.tier_high_similarity, saved.tier_min_words) == (0.1, None, 3)
+    finally:
+        db.close()
+
+
+def test_prometheus_metrics_fail_closed_without_a_metrics_token(grading_data, monkeypatch):
+    from fastapi import FastAPI
+    from app.database import SessionLocal
+    from app.models.user import User
+    from app.routers import metrics
+    from app.utils.auth import create_access_token
+
+    app_ = FastAPI()
+    app_.include_router(metrics.router, prefix="/metrics")
+    client = TestClient(app_)
+    db = SessionLocal()
+    admin = User(nama="Admin Metrics", nim_nip=f"am{uuid.uuid4().hex[:8]}", password="x", role="admin", prodi="test")
+    db.add(admin)
+    db.commit()
+    admin_headers = {"Authorization": f"Bearer {create_access_token({'sub': admin.nim_nip})}"}
+    try:
+        monkeypatch.delenv("METRICS_TOKEN", raising=False)
+        assert client.get("/metrics/prometheus").status_code == 401
+        assert client.get("/metrics/prometheus", headers={"Authorization": "Bearer "}).status_code == 401
+        assert client.get("/metrics/prometheus", headers=grading_data["headers"]).status_code == 403
+        assert client.get("/metrics/prometheus", headers=admin_headers).status_code == 200
+
+        monkeypatch.setenv("METRICS_TOKEN", "rahasia-scraper")
+        assert client.get("/metrics/prometheus", headers={"Authorization": "Bearer rahasia-scraper"}).status_code == 200
+        assert client.get("/metrics/prometheus", headers={"Authorization": "Bearer salah"}).status_code == 401
+        assert client.get("/metrics/prometheus", headers=admin_headers).status_code == 200
+    finally:
+        db.delete(admin)
+        db.commit()
+        db.close()
@@ -45,4 +45,683 @@ def test_llm_grader_get_score_structure():
     # Memanggil fungsi internal untuk memicu baris 90-98 (Gemini call)
     # Meskipun API Key mungkin dummy, baris pemanggilan kode akan ter-cover
     score, feedback = grader._get_llm_score("Soal", "Kunci", "Jawaban panjang mahasiswa yang valid")
-    assert isinstance(score, float)
\ No newline at end of file
+    assert isinstance(score, float)
+
+def test_ai_grader_agrade_many_concurrency(monkeypatch):
+    # Fan-out async: urutan hasil tetap, jumlah panggilan bersamaan dibatasi
+    import asyncio
+
+    state = {"active": 0, "peak": 0}
+
+    async def fake_score(soal, kunci, jawaban):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.01)
+        state["active"] -= 1
+        return float(len(jawaban)), "ok"
+
+    monkeypatch.setattr(grader, "_aget_llm_score", fake_score)
+    items = [
+        {"soal": "S", "kunci_jawaban": "K", "jawaban_mahasiswa": "x" * (10 + i), "max_score_dosen": 100.0}
+        for i in range(6)
+    ]
+    results = asyncio.run(grader.agrade_many(items, concurrency=2))
+
+    assert [r["llm_score"] for r in results] == [10.0 + i for i in range(6)]
+    assert state["peak"] == 2
+
+
+def test_grading_cache_memory_tier_and_invalidation():
+    from app.utils.grading_cache import GradingResultCache, make_cache_key, make_question_key
+
+    cache = GradingResultCache(maxsize=2, persist=False)
+    key = make_cache_key("Soal", "Kunci", "Jawaban", "model-x", "v1")
+    assert cache.get(key) is None
+
+    cache.set(key, make_question_key("Soal", "Kunci"), 80.0, "Bagus", model="model-x", prompt_version="v1")
+    assert cache.get(key) == (80.0, "Bagus")
+
+    # Kunci berbeda (mis. versi prompt lain) -> entri berbeda
+    assert make_cache_key("Soal", "Kunci", "Jawaban", "model-x", "v2") != key
+
+    assert cache.invalidate_question("Soal", "Kunci") == 1
+    assert cache.get(key) is None
+    stats = cache.stats()
+    assert stats["memory_hits"] == 1 and stats["misses"] == 2
+
+
+def test_ai_grader_batch_chunking_and_validation():
+    # Chunk dibatasi batch_size dan token budget
+    chunks = grader._chunk_for_batch("Soal", "Kunci", ["jawaban"] * (grader.batch_size + 1))
+    assert [len(c) for c in chunks] == [grader.batch_size, 1]
+
+    assert grader._parse_batch_response('{"hasil": [{"id": 0, "skor": 120, "feedback": "a"}]}', 1) == [(100.0, "a")]
+    with pytest.raises(ValueError):
+        grader._parse_batch_response('{"hasil": [{"id": 0, "skor": 80}]}', 2)
+
+
+def test_ai_grader_batch_falls_back_to_single(monkeypatch):
+    monkeypatch.setattr(grader, "_get_llm_scores_batch", lambda soal, kunci, answers: None)
+    monkeypatch.setattr(grader, "_get_llm_score", lambda soal, kunci, jawaban: (50.0, "single"))
+
+    results = grader.grade_batch("Soal", "Kunci", ["jawaban pertama", "abc", "jawaban kedua"], 10.0)
+
+    assert [r["final_score"] for r in results] == [5.0, 0.0, 5.0]
+    assert results[1]["method"] == "Error"
+
+
+def test_token_bucket_rate_limiter_waits_when_empty():
+    from app.utils.ai_grader import TokenBucketRateLimiter
+
+    limiter = TokenBucketRateLimiter(rpm=600, tpm=0)  # 10 request/detik, burst 600
+    limiter._req_tokens = 0.0
+    waited = limiter.acquire()
+    assert waited >= 0.05
+    stats = limiter.stats()
+    assert stats["acquired"] == 1 and stats["waited"] == 1
+
+
+def test_ai_grader_retries_on_429(monkeypatch):
+    from google.genai.errors import APIError
+    from app.utils.ai_grader import _retry_after_seconds
+
+    quota_error = APIError(429, {"error": {"code": 429, "message": "quota", "details": [{"retryDelay": "0.01s"}]}})
+    assert _retry_after_seconds(quota_error) == 0.01
+    # Body error string (proxy / API kompatibel OpenAI) tidak boleh merusak jalur retry
+    proxy_error = APIError(429, {"error": {"message": "quota exceeded"}})
+    proxy_error.details = {"error": "quota exceeded"}
+    assert _retry_after_seconds(proxy_error) is None
+
+    calls = {"n": 0}
+
+    class FakeModels:
+        def generate_content(self, model, contents, config):
+            calls["n"] += 1
+            if calls["n"] < 3:
+                raise quota_error
+            return type("Resp", (), {"text": '{"skor": 70, "feedback": "ok"}'})()
+
+    monkeypatch.setattr(grader, "client", type("Client", (), {"models": FakeModels()})())
+    monkeypatch.setattr(grader, "retry_base_seconds", 0.01)
+    monkeypatch.setattr(grader, "retry_max_seconds", 0.02)
+
+    response = grader._generate("prompt")
+    assert response.text and calls["n"] == 3
+
+
+def test_circuit_breaker_state_transitions():
+    from app.utils.ai_grader import CircuitBreaker
+
+    breaker = CircuitBreaker(window=4, min_calls=2, failure_rate=0.5, slow_seconds=1.0, open_seconds=0.05)
+    breaker.record(success=True, latency=0.1)
+    breaker.record(success=True, latency=5.0)  # lambat dihitung gagal -> 1/2 -> open
+    assert breaker.state == "open"
+    assert breaker.allow() is False
+
+    import time
+    time.sleep(0.06)
+    assert breaker.state == "half_open"
+    assert breaker.allow() is True
+    assert breaker.allow() is False  # hanya 1 panggilan percobaan
+    breaker.record(success=True, latency=0.1)
+    assert breaker.state == "closed"
+
+
+def test_ai_grader_heuristic_fallback_when_breaker_open(monkeypatch):
+    from app.utils.ai_grader import CircuitBreaker, FALLBACK_METHOD
+
+    breaker = CircuitBreaker(min_calls=1, open_seconds=60)
+    breaker.record(success=False, latency=0.1)
+    monkeypatch.setattr(grader, "breaker", breaker)
+    monkeypatch.setattr(grader, "api_key", "dummy")
+    monkeypatch.setattr(grader, "client", object())
+    monkeypatch.setattr(grader, "breaker_fallback", "heuristic")
+
+    result = grader.grade_essay("Soal breaker", "Kunci", "Fotosintesis adalah proses tumbuhan membuat makanan.", 10.0)
+    assert result["method"] == FALLBACK_METHOD
+    assert result["fallback"] is True and result["final_score"] > 0
+
+
+def test_failed_llm_call_is_an_error_result_not_a_zero_score(monkeypatch):
+    import asyncio
+    from app.utils.ai_grader import CircuitBreaker
+    from app.utils.grading_cache import GradingResultCache
+
+    def timeout(*args, **kwargs):
+        raise TimeoutError("read timeout")
+
+    async def atimeout(*args, **kwargs):
+        raise TimeoutError("read timeout")
+
+    monkeypatch.setattr(grader, "cache", GradingResultCache(persist=False))
+    monkeypatch.setattr(grader, "breaker", CircuitBreaker())
+    monkeypatch.setattr(grader, "client", object())
+    monkeypatch.setattr(grader, "_generate", timeout)
+    monkeypatch.setattr(grader, "_agenerate", atimeout)
+
+    jawaban = "Fotosintesis adalah proses tumbuhan membuat makanan."
+    results = [
+        grader.grade_essay("Soal timeout", "Kunci", jawaban, 10.0, method="llm"),
+        asyncio.run(grader.agrade_essay("Soal timeout", "Kunci", jawaban, 10.0, method="llm")),
+        *grader.grade_batch("Soal timeout", "Kunci", [jawaban, jawaban + " Lagi."], 10.0, method="llm"),
+    ]
+    for result in results:
+        assert result["method"] == "Error" and result["final_score"] == 0.0
+        # Tidak disimpan sebagai skor AI: endpoint menjawab 502, worker mencoba ulang
+        assert grader.unsaved_result_status(result, jawaban) == 502
+    assert grader.cache.stats()["stores"] == 0
+
+
+def test_similarity_grader_ranks_answers_against_key():
+    from app.utils.similarity import similarity_to_key
+
+    kunci = "Fotosintesis adalah proses tumbuhan membuat makanan menggunakan cahaya matahari"
+    answers = [
+        "Fotosintesis adalah proses tumbuhan membuat makanan dengan bantuan cahaya matahari",
+        "Tumbuhan membutuhkan air",
+        "Sepak bola dimainkan oleh dua tim",
+    ]
+    for vectorizer in ("tfidf", "hashing"):
+        sims = similarity_to_key(kunci, answers, vectorizer=vectorizer)
+        assert sims[0] > sims[1] > sims[2]
+        assert sims[2] == 0.0
+
+    results = grader.grade_essay("Soal", kunci, answers[0], 10.0, method="similarity")
+    assert results["method"].startswith("Similarity") and 0 < results["final_score"] <= 10.0
+
+
+def test_dedup_clusters_exact_and_near_duplicates():
+    from app.utils.dedup import cluster_answers
+
+    answers = [
+        "Fotosintesis adalah proses tumbuhan membuat makanan dari cahaya matahari.",
+        "fotosintesis adalah proses tumbuhan membuat makanan dari cahaya matahari",
+        "Fotosintesis ialah proses tumbuhan membuat makanan dari cahaya matahari",
+        "Respirasi menghasilkan energi bagi sel",
+    ]
+    assert cluster_answers(answers, threshold=0.7) == [0, 0, 0, 3]
+
+
+def test_ai_grader_batch_grades_one_representative_per_cluster(monkeypatch):
+    graded = []
+
+    def fake_single(soal, kunci, jawaban):
+        graded.append(jawaban)
+        return 66.0, "ok"
+
+    monkeypatch.setattr(grader, "_get_llm_scores_batch", lambda soal, kunci, answers: None)
+    monkeypatch.setattr(grader, "_get_llm_score", fake_single)
+    monkeypatch.setattr(grader, "dedup_enabled", True)
+
+    answers = ["Jawaban yang sama persis.", "jawaban yang sama persis", "Jawaban lain sama sekali"]
+    results = grader.grade_batch("Soal dedup", "Kunci", answers, 10.0)
+
+    assert len(graded) == 2
+    assert results[0]["cluster_id"] == results[1]["cluster_id"]
+    assert "cluster_id" not in results[2]
+
+
+def test_minhash_lsh_finds_near_copies_and_groups_clusters():
+    from app.utils.minhash import MinHasher, MinHashLSH
+    from app.utils.plagiarism import clusters_from_pairs
+
+    hasher = MinHasher()
+    lsh = MinHashLSH(threshold=0.5)
+    lsh.insert(2, hasher.signature_of("fotosintesis adalah proses tumbuhan membuat makanan memakai cahaya matahari"))
+    lsh.insert(3, hasher.signature_of("Respirasi sel menghasilkan energi bagi tubuh manusia"))
+    matches = lsh.query(hasher.signature_of("Fotosintesis adalah proses tumbuhan membuat makanan dari cahaya matahari."))
+    assert [key for key, _ in matches] == [2]
+
+    clusters = clusters_from_pairs([(1, 2, 9, 0.8), (2, 4, 9, 0.9), (5, 6, 10, 0.7)])
+    assert [c["members"] for c in clusters] == [[1, 2, 4], [5, 6]]
+    assert clusters[0]["max_similarity"] == 0.9
+
+
+def test_fake_llm_is_deterministic_and_cassette_replays(tmp_path):
+    from app.utils.llm_backends import CassetteClient, FakeGeminiClient, FakeLLM
+
+    prompt = grader._build_prompt("Soal", "Fotosintesis menghasilkan oksigen", "Fotosintesis menghasilkan oksigen")
+    recorder = CassetteClient(FakeGeminiClient(FakeLLM(latency_ms=0)), str(tmp_path / "cas.jsonl"), mode="record")
+    recorded = recorder.models.generate_content(model="m", contents=prompt).text
+
+    assert FakeLLM(latency_ms=0).respond(prompt) == recorded
+    assert grader._parse_llm_response(recorded)[0] >= 90
+
+    replayer = CassetteClient(None, str(tmp_path / "cas.jsonl"), mode="replay", replay_latency=False)
+    assert replayer.models.generate_content(model="m", contents=prompt).text == recorded
+
+
+def test_llm_metrics_record_outcomes_per_assignment(monkeypatch):
+    from app.utils.llm_backends import FakeGeminiClient, FakeLLM
+    from app.utils.llm_metrics import LLMMetrics, metrics_scope
+    import app.utils.ai_grader as ai_grader_module
+
+    metrics = LLMMetrics(price_input_per_mtok=1.0, price_output_per_mtok=2.0)
+    monkeypatch.setattr(ai_grader_module, "llm_metrics", metrics)
+    monkeypatch.setattr(grader, "client", FakeGeminiClient(FakeLLM(latency_ms=0, malformed_rate=1.0)))
+
+    with metrics_scope(id_course=3, id_assignment=7):
+        score, _ = grader._get_llm_score("Soal metrik", "Kunci metrik", "Jawaban metrik yang cukup panjang")
+
+    assert score == 0.0
+    group = metrics.snapshot(("course", "assignment"))["groups"][0]
+    assert (group["course"], group["assignment"]) == (3, 7)
+    assert group["outcomes"]["json_error"] == 1 and group["prompt_tokens"] > 0
+    assert 'outcome="json_error",course="3",assignment="7",le="+Inf"} 1' in metrics.render_prometheus()
+
+
+def test_stream_grading_emits_feedback_deltas_then_same_result(monkeypatch):
+    import asyncio
+    from app.utils.ai_grader import FeedbackStreamExtractor
+    from app.utils.grading_cache import GradingResultCache
+    from app.utils.llm_backends import FakeGeminiClient, FakeLLM
+
+    extractor = FeedbackStreamExtractor()
+    pieces = ['{"skor": 80, "feed', 'back": "Bagus \\"seka', 'li\\" \\u00e9', 'ka"}']
+    assert "".join(extractor.feed(p) for p in pieces) == 'Bagus "sekali" éka'
+
+    # Cache hasil hanya di memory: run berikutnya tetap melewati jalur streaming LLM
+    monkeypatch.setattr(grader, "cache", GradingResultCache(persist=False))
+    monkeypatch.setattr(grader, "client", FakeGeminiClient(FakeLLM(latency_ms=0)))
+    args = ("Soal stream", "Fotosintesis menghasilkan oksigen", "Fotosintesis menghasilkan oksigen bagi makhluk hidup", 10.0)
+
+    async def collect():
+        return [event async for event in grader.agrade_essay_stream(*args)]
+
+    events = asyncio.run(collect())
+    result = events[-1][1]
+    assert events[-1][0] == "result" and all(kind == "feedback" for kind, _ in events[:-1])
+    assert "".join(delta for _, delta in events[:-1]) == result["feedback"]
+    assert result == grader.grade_essay(*args)
+
+
+def test_hedged_request_uses_secondary_backend_when_primary_is_slow(monkeypatch):
+    import asyncio
+    from app.utils.llm_backends import FakeGeminiClient, FakeLLM, build_backend
+
+    heuristic = build_backend("heuristic", 1.0)
+    monkeypatch.setattr(grader, "client", FakeGeminiClient(FakeLLM(latency_ms=500, latency_dist="fixed")))
+    monkeypatch.setattr(grader, "hedge_backends", [heuristic])
+    monkeypatch.setattr(grader, "backends", {**grader.backends, "heuristic": heuristic})
+    monkeypatch.setattr(grader, "hedge_default_seconds", 0.02)
+    monkeypatch.setattr(grader, "hedge_counts", {"fired": 0, "won": 0, "rerouted": 0})
+
+    args = ("Soal hedge", "Kunci hedge", "Jawaban hedge yang cukup panjang untuk dinilai", 10.0)
+    result = asyncio.run(grader.agrade_essay(*args))
+    assert result["backend"] == "heuristic" and result["method"] == heuristic.method_label
+    assert grader.grade_essay(*args)["backend"] == "heuristic"
+    assert grader.hedge_counts == {"fired": 2, "won": 2, "rerouted": 0}
+
+
+def test_tiered_grading_escalates_only_ambiguous_answers(monkeypatch):
+    from app.utils.llm_metrics import llm_metrics, metrics_scope
+    from app.utils.tiering import TierPolicy
+
+    kunci = "Fotosintesis mengubah air dan karbon dioksida menjadi glukosa dan oksigen dengan bantuan cahaya matahari."
+    answers = [
+        kunci,
+        "Saya suka bermain sepak bola di lapangan setiap sore bersama teman.",
+        "Tumbuhan butuh cahaya matahari dan air.",
+        "Fotosintesis adalah cara tumbuhan membuat makanan memakai cahaya matahari dan menghasilkan oksigen.",
+    ]
+    escalated = []
+    monkeypatch.setattr(grader, "grade_essay", lambda soal, kunci_jawaban, jawaban, max_score, method=None, keywords=None: (
+        escalated.append(jawaban) or {"final_score": 5.0, "llm_score": 50.0, "feedback": "ok", "method": "LLM"}
+    ))
+    llm_metrics.reset()
+
+    with metrics_scope(3, 9):
+        results = grader.grade_batch("Soal", kunci, answers, 10.0, method="tiered",
+                                     tier_policy=TierPolicy(low_similarity=0.05, high_similarity=0.85, min_words=8))
+
+    assert [r["tier"] for r in results] == ["near_key", "off_topic", "short", "llm"]
+    assert escalated == [answers[3]] and results[3]["final_score"] == 5.0
+    assert results[1]["final_score"] == 0.0 and results[0]["backend"] == "local"
+    snapshot = llm_metrics.tier_snapshot()
+    assert snapshot["llm_calls_avoided"] == 3 and snapshot["groups"][0]["assignment"] == 9
+
+
+def test_rubric_prefix_is_cached_per_question_and_invalidated(monkeypatch):
+    from app.utils.context_cache import RubricContextCache
+    from app.utils.grading_cache import GradingResultCache
+    from app.utils.llm_backends import FakeGeminiClient, FakeLLM
+
+    client = FakeGeminiClient(FakeLLM(latency_ms=0))
+    context_cache = RubricContextCache(enabled=True, ttl_seconds=600, min_tokens=0)
+    # Cache hasil hanya di memory: tidak menulis ke ai_grading_cache dan tidak melewati LLM
+    monkeypatch.setattr(grader, "cache", GradingResultCache(persist=False))
+    monkeypatch.setattr(grader, "client", client)
+    monkeypatch.setattr(grader, "context_cache", context_cache)
+    monkeypatch.setattr(grader, "hedge_backends", [])
+
+    soal, kunci = "Soal context cache", "Kunci context cache tentang glukosa dan oksigen."
+    prompt = grader._build_prompt(soal, kunci, "jawaban pertama")
+    assert prompt == prompt.prefix + prompt.suffix and "jawaban pertama" not in prompt.prefix
+
+    for i in range(3):
+        assert grader.grade_essay(soal, kunci, f"jawaban context cache {i} glukosa", 10.0, method="llm")["method"] != "Error"
+
+    stats = context_cache.stats()
+    assert stats["created"] == 1 and stats["hits"] == 2 and stats["provider_handles"] == 1
+    name = stats["questions"][0]["cached_content"]
+    assert name in client.caches._entries
+
+    assert context_cache.invalidate_question(soal, kunci, client=client) == 1
+    assert name not in client.caches._entries and context_cache.stats()["handles"] == 0
+
+
+def test_batch_essay_scoring_matches_scalar():
+    from app.utils.scoring import calculate_essay_score, score_essays_batch
+
+    long_text = "Fotosintesis terjadi di kloroplas karena ada klorofil. " * 30
+    texts = ["", "   ", "...", "satu kata", "kalimat pendek tanpa kapital. lalu yang lain!",
+             "Fotosintesis menghasilkan glukosa dan oksigen; namun butuh cahaya.", long_text,
+             "A" * 10 + " " + "kata " * 6000]
+    for keywords in (None, [], ["glukosa", "Oksigen", "klorofil"]):
+        expected = [calculate_essay_score(t, keywords) for t in texts]
+        assert score_essays_batch(texts, keywords) == expected
+    assert score_essays_batch([]) == []
+
+
+def test_keyword_matcher_word_boundaries_and_large_rubrics(monkeypatch):
+    from app.utils.keyword_matcher import KeywordMatcher, get_matcher
+    from app.utils.scoring import CONNECTOR_MATCHER, calculate_essay_score
+
+    text = "Dandelion, badan-nya hijau. Oleh   karena, itu fotosintesis berjalan"
+    # "karena" + "oleh karena itu"; "dan" di dalam "Dandelion"/"badan" tidak terhitung
+    assert CONNECTOR_MATCHER.matches(text) == ["karena", "oleh karena itu"]
+
+    assert KeywordMatcher(["dan", "Badan", "lion"]).matches(text) == ["dan", "Badan", "lion"]
+    assert KeywordMatcher(["dan", "Badan", "lion"], word_boundary=True).matches(text) == ["Badan"]
+
+    # Rubrik besar memakai automaton (bukan loop `in`), hasil tetap sama dengan substring biasa
+    keywords = tuple(f"istilah{i}" for i in range(300)) + ("sintesis", "hijau. oleh", "")
+    matcher = get_matcher(keywords)
+    assert matcher is get_matcher(keywords) and not matcher._direct
+    assert matcher.matches(text) == [kw for kw in keywords if kw in text.lower()]
+
+    _, feedback = calculate_essay_score(text, ["foto", "hijau"], whole_words=True)
+    assert "Kata kunci ditemukan: hijau" in feedback
+
+
+def test_keyword_extraction_prefers_terms_specific_to_the_question():
+    from app.utils.keywords import extract_keywords
+    from app.utils.tiering import TierPolicy, classify_answers
+
+    kunci = ("Fotosintesis adalah proses tumbuhan mengubah energi cahaya menjadi glukosa. "
+             "Klorofil di kloroplas menyerap cahaya, lalu air dan karbon dioksida diubah menjadi glukosa.")
+    corpus = [kunci,
+              "Jelaskan respirasi sel. Respirasi memecah glukosa menjadi energi di mitokondria.",
+              "Apa itu ekosistem? Interaksi makhluk hidup dengan lingkungan dan energi matahari."]
+    keywords = extract_keywords(kunci, corpus, top_k=20)
+
+    # "mengubah" + "diubah" = satu stem "ubah" (tf 2)
+    assert keywords[:4] == ["mengubah", "cahaya", "glukosa", "fotosintesis"] and "diubah" not in keywords
+    assert "klorofil" in keywords
+    assert not {"adalah", "dan", "di", "lalu", "menjadi"} & set(keywords)
+    # "energi" muncul di semua soal course -> idf paling rendah, peringkat terakhir
+    assert keywords[-1] == "energi" and len(extract_keywords(kunci, corpus, top_k=5)) == 5
+    assert extract_keywords("", corpus) == [] and extract_keywords("yang dan di", corpus) == []
+
+    # Skor kualitas lokal (tiered) sekarang memakai keyword match, bukan default 70
+    top = extract_keywords(kunci, corpus, top_k=4)[1:]
+    answers = ["Fotosintesis memakai cahaya matahari di daun untuk membuat glukosa.",
+               "Daun memakai sinar matahari untuk membuat makanan sendiri setiap hari."]
+    policy = TierPolicy(low_similarity=0.0, high_similarity=0.0, min_words=0)
+    with_kw = [d["quality"] for d in classify_answers(kunci, answers, policy, keywords=top)]
+    without_kw = [d["quality"] for d in classify_answers(kunci, answers, policy)]
+    assert with_kw[0] > without_kw[0] and with_kw[1] < without_kw[1]
+
+
+def test_indonesian_stemmer_and_token_bag_keyword_matching():
+    from app.utils.scoring import calculate_essay_score, score_essays_batch
+    from app.utils.stemmer import stem, token_bag
+
+    for derived, root in [("mempelajari", "belajar"), ("pembelajaran", "ajar"), ("menulis", "tulisan"),
+                          ("menyerap", "penyerapan"), ("memakai", "dipakai"), ("menghasilkan", "hasilnya"),
+                          ("perubahan", "mengubah"), ("kehidupan", "hidup"), ("pekerjaan", "bekerja"),
+                          ("mencari", "cari"), ("terjadi", "kejadian"), ("berfungsi", "fungsi")]:
+        assert stem(derived) == stem(root), (derived, root)
+    # Kata dasar tidak dipotong berlebihan
+    assert [stem(w) for w in ("makan", "bahan", "serap", "kerja", "sel")] == ["makan", "bahan", "serap", "kerja", "sel"]
+
+    bag = token_bag("Mahasiswa mempelajari penyerapan cahaya, dan cahaya diubah menjadi energi.")
+    assert bag["cahaya"] == 2 and stem("belajar") in bag and "dan" not in bag
+
+    text = "Mahasiswa mempelajari penyerapan cahaya oleh klorofil."
+    keywords = ["belajar", "serap", "klorofil", "glukosa"]
+    _, by_text = calculate_essay_score(text, keywords)
+    _, by_stem = calculate_essay_score(text, keywords, token_bag=token_bag(text))
+    assert "Kata kunci ditemukan: klorofil" in by_text
+    assert "Kata kunci ditemukan: belajar, serap, klorofil" in by_stem
+    assert score_essays_batch([text], keywords, token_bags=[token_bag(text)])[0] == \
+        calculate_essay_score(text, keywords, token_bag=token_bag(text))
+
+
+def test_token_bag_keyword_matching_ignores_stopwords_like_the_bag():
+    from app.utils.scoring import match_keywords
+    from app.utils.stemmer import keyword_stems, stem, token_bag
+
+    text = "Kompleksitas waktu algoritma bergantung pada jumlah memori yang dipakai."
+    bag = token_bag(text)
+    assert "waktu" not in bag and "jumlah" not in bag  # stopword tidak masuk bag
+    assert keyword_stems("jumlah memori") == {stem("memori")} and keyword_stems("waktu") == {"waktu"}
+
+    keywords = ["waktu", "kompleksitas waktu", "jumlah memori", "waktu tunggu"]
+    assert match_keywords(keywords, text.lower()) == ["waktu", "kompleksitas waktu", "jumlah memori"]
+    assert match_keywords(keywords, text.lower(), bag) == ["waktu", "kompleksitas waktu", "jumlah memori"]
+
+
+def test_upload_pipeline_spools_caps_and_extracts_off_loop(monkeypatch, tmp_path):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.routers import upload
+    from app.utils import file_extract
+    from benchmarks.upload_latency import make_pdf
+
+    pdf = make_pdf(3, 40)
+    app = FastAPI()
+    app.include_router(upload.router, prefix="/upload")
+    pool = file_extract.PdfExtractionPool(workers=2, timeout=30, shard_min_bytes=1,
+                                          cache=file_extract.ExtractionCache(str(tmp_path)))
+    monkeypatch.setattr(upload, "pdf_extractor", pool)
+    try:
+        with TestClient(app) as client:
+            res = client.post("/upload/file", files={"file": ("esai.pdf", pdf, "application/pdf")})
+            assert res.status_code == 200
+            body = res.json()
+            assert body["word_count"] == len(file_extract.extract_pdf_text(pdf).split()) > 100
+            assert body["pages"] == 3 and body["cached"] is False and "page_seconds" not in body
+
+            # Unggah ulang: dibaca dari cache disk (key SHA-256), hasil sama, urutan halaman terjaga
+            res = client.post("/upload/file?include_timings=true", files={"file": ("lagi.pdf", pdf, "application/pdf")})
+            assert res.json()["cached"] is True and res.json()["word_count"] == body["word_count"]
+            assert len(res.json()["page_seconds"]) == 3
+            assert len(list(tmp_path.glob("*/*.json"))) == 1
+
+            res = client.post("/upload/file", files={"file": ("esai.txt", "satu dua tiga".encode(), "text/plain")})
+            assert res.json() == {"filename": "esai.txt", "encoding": "utf-8", "word_count": 3, "char_count": 13}
+            res = client.post("/upload/file", files={"file": ("rusak.pdf", b"bukan pdf", "application/pdf")})
+            assert res.status_code == 400
+
+            monkeypatch.setattr(file_extract, "UPLOAD_MAX_BYTES", 1024)
+            res = client.post("/upload/file", files={"file": ("besar.txt", b"kata " * 1000, "text/plain")})
+            assert res.status_code == 413
+    finally:
+        pool.shutdown()
+
+    # Batas waktu per file ditegakkan di dalam proses ekstraksi (SIGALRM)
+    with pytest.raises(file_extract.ExtractionTimeout):
+        file_extract.extract_pdf_text(make_pdf(300, 300), timeout=0.01)
+
+
+def test_extraction_cache_expires_and_evicts_least_recently_used(tmp_path):
+    import json
+    import os
+    import time
+    from app.utils.file_extract import ExtractionCache
+
+    entry = {"text": "x" * 200, "pages": 1}
+    size = len(json.dumps(entry))
+    # Muat 3 entri, entri ke-4 melewati batas; pruning turun ke <= 80% batas = 3 entri
+    cache = ExtractionCache(str(tmp_path), max_bytes=int(size * 3.9), ttl_seconds=3600)
+    digests = [f"{i:02x}" * 32 for i in range(4)]
+    now = time.time()
+    for age, digest in zip((400, 300, 200), digests):
+        cache.put(digest, entry)
+        os.utime(cache._path(digest), (now - age, now - age))
+
+    # Hit menyentuh mtime: entri tertua kini yang paling baru dipakai
+    assert cache.get(digests[0]) == entry
+    cache.put(digests[3], entry)
+    assert [cache.get(d) is not None for d in digests] == [True, False, True, True]
+    assert cache._size == sum(f.stat().st_size for f in tmp_path.glob("*/*.json"))
+
+    # Entri yang tidak dipakai lebih lama dari TTL dianggap miss dan dihapus
+    os.utime(cache._path(digests[2]), (now - 7200, now - 7200))
+    assert cache.get(digests[2]) is None and not os.path.exists(cache._path(digests[2]))
+
+
+def test_archive_ingest_mapping_and_member_matching(monkeypatch):
+    import io
+    import json
+    import zipfile
+    from app.utils import archive_ingest
+    from app.utils.archive_ingest import IngestError, match_members, parse_mapping
+
+    mapping = parse_mapping(json.dumps({
+        "a.txt": {"nim_nip": "111", "id_question": "5"},
+        "kelas/b.pdf": ["222", 6],
+        "dobel.txt": ["333", 5],
+        "gambar.png": ["444", 5],
+        "hilang.txt": ["555", 5],
+    }))
+    assert mapping["a.txt"] == ("111", 5) and mapping["kelas/b.pdf"] == ("222", 6)
+    for bad in ("bukan json", "[]", json.dumps({"a.txt": {"nim_nip": "1"}})):
+        with pytest.raises(IngestError):
+            parse_mapping(bad)
+
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name in ("kelas/a.txt", "kelas/b.pdf", "x/dobel.txt", "y/dobel.txt", "gambar.png",
+                     "__MACOSX/kelas/._a.txt"):
+            zf.writestr(name, "isi")
+        zf.writestr("kelas/", "")
+    with zipfile.ZipFile(buf) as zf:
+        matched, errors = match_members(zf.infolist(), mapping)
+
+    # Nama tanpa folder cocok jika unik; path lengkap selalu cocok; metadata macOS diabaikan
+    assert [(info.filename, nim, qid) for info, nim, qid in matched] == [
+        ("kelas/a.txt", "111", 5), ("kelas/b.pdf", "222", 6)]
+    assert dict(errors).keys() == {"dobel.txt", "gambar.png", "hilang.txt"}
+
+    # Batch dibatasi jumlah file dan total byte
+    monkeypatch.setattr(archive_ingest, "INGEST_BATCH_SIZE", 2)
+    monkeypatch.setattr(archive_ingest, "INGEST_BATCH_BYTES", 100)
+    sizes = [10, 10, 10, 95, 20]
+    plan = [(zipfile.ZipInfo(f"{i}.txt"), i, 1) for i in range(len(sizes))]
+    for (info, _, _), size in zip(plan, sizes):
+        info.file_size = size
+    assert [[i for _, i, _ in batch] for batch in archive_ingest._batches(plan)] == [[0, 1], [2], [3], [4]]
+
+
+def test_archive_ingest_records_corrupt_members_as_per_file_errors(monkeypatch):
+    import asyncio
+    import io
+    import zipfile
+    from app.utils import archive_ingest
+
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_STORED) as zf:
+        zf.writestr("baik.txt", "Jawaban yang utuh.")
+        zf.writestr("rusak.txt", "Jawaban yang rusak.")
+    raw = bytearray(buf.getvalue())
+    at = raw.index(b"Jawaban yang rusak.")
+    raw[at] ^= 0xFF  # CRC-32 tidak cocok lagi -> zf.read() melempar BadZipFile
+    archive = io.BytesIO(bytes(raw))
+    with zipfile.ZipFile(archive) as zf:
+        plan = [(info, n + 1, 7) for n, info in enumerate(zf.infolist())]
+
+    stored, statuses = [], []
+    monkeypatch.setattr(archive_ingest, "_store_batch", lambda *args: stored.append(args))
+    monkeypatch.setattr(archive_ingest, "_set_status", lambda id_job, status, **kw: statuses.append(status))
+    asyncio.run(archive_ingest.run_ingest_job(1, archive, 9, plan))
+
+    [(id_job, id_assignment, rows, errors)] = stored
+    assert rows == [(1, 7, "Jawaban yang utuh.")]
+    assert [name for name, _ in errors] == ["rusak.txt"] and "CRC" in errors[0][1]
+    assert statuses == ["running", "done"] and archive.closed
+
+
+def test_text_upload_streaming_decoder_detects_charset_and_counts_across_chunks(monkeypatch):
+    import io
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.routers import upload
+    from app.utils import file_extract
+    from app.utils.file_extract import decode_text, detect_encoding, text_stats
+
+    # Sampel deteksi kecil agar sebagian besar teks didecode lewat chunk berikutnya
+    monkeypatch.setattr(file_extract, "TEXT_SAMPLE_BYTES", 64)
+    essay = "Jawaban saya: café naïve – “fotosintesis” terjadi pada suhu 30°C ±5%. " * 40
+    for encoding, expected in (("utf-8", "utf-8"), ("cp1252", "cp1252"), ("utf-16", "utf-16")):
+        data = essay.encode(encoding)
+        assert detect_encoding(data[:4096]) == expected
+        assert decode_text(data) == essay
+        # Chunk kecil: karakter multi-byte dan kata terpotong di batas chunk tetap dihitung benar
+        for chunk_size in (1, 7, 4096):
+            stats = text_stats(io.BytesIO(data), chunk_size=chunk_size)
+            assert stats == {"encoding": expected, "word_count": len(essay.split()), "char_count": len(essay)}
+
+    # UTF-8 yang terpotong di tengah karakter pada batas sampel tetap terdeteksi UTF-8
+    assert detect_encoding("ééé".encode("utf-8")[:5]) == "utf-8"
+
+    app = FastAPI()
+    app.include_router(upload.router, prefix="/upload")
+    with TestClient(app) as client:
+        res = client.post("/upload/file", files={"file": ("esai.txt", "Résumé ini ditulis di Windows".encode("cp1252"), "text/plain")})
+        assert res.status_code == 200
+        assert res.json() == {"filename": "esai.txt", "encoding": "cp1252", "word_count": 5, "char_count": 29}
+
+def test_async_read_endpoints_use_async_session_and_reject_bad_tokens():
+    import asyncio
+    import inspect
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.database import async_engine
+    from app.dependencies import get_async_db, get_current_user_async
+    from app.routers import assignment, course, submission
+
+    assert async_engine.url.drivername == "postgresql+asyncpg"
+    app = FastAPI()
+    app.include_router(course.router, prefix="/course")
+    app.include_router(assignment.router, prefix="/assignment")
+    app.include_router(submission.router, prefix="/submission")
+    handlers = {route.path: route.endpoint for route in app.routes if "GET" in getattr(route, "methods", ())}
+    for path in ("/submission/my", "/course/my", "/assignment/{assignment_id}"):
+        assert inspect.iscoroutinefunction(handlers[path]), path
+
+    # Token tidak valid ditolak sebelum menyentuh database
+    class Bearer:
+        credentials = "bukan.jwt.valid"
+    with pytest.raises(Exception) as exc:
+        asyncio.run(get_current_user_async(db=None, token=Bearer()))
+    assert exc.value.status_code == 401
+
+    app.dependency_overrides[get_async_db] = lambda: None
+    with TestClient(app) as client:
+        assert client.get("/submission/my", headers={"Authorization": "Bearer x"}).status_code == 401
+        assert client.get("/course/my", headers={"Authorization": "Bearer x"}).status_code == 401
+
+def test_grading_worker_retry_backoff_is_exponential_and_waits_for_open_breaker(monkeypatch):
+    from app.utils.ai_grader import CircuitBreaker
+    from app.utils.grading_worker import GradingWorkerPool
+
+    pool = GradingWorkerPool(workers=0)
+    pool.retry_base_seconds, pool.retry_max_seconds = 5.0, 30.0
+    monkeypatch.setattr(grader, "breaker", CircuitBreaker(min_calls=1, open_seconds=120))
+    assert [pool._retry_delay(n) for n in (1, 2, 3, 4, 5)] == [5.0, 10.0, 20.0, 30.0, 30.0]
+
+    # Breaker open: retry tidak boleh lebih cepat dari sisa waktu open
+    grader.breaker.record(success=False, latency=0.1)
+    assert 119.0 < pool._retry_delay(1) <= 120.0